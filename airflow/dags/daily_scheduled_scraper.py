@@ -30,24 +30,65 @@ dag = DAG(
 
 PROJECT_ROOT = "/opt/airflow/dags/.."  # If mapped as ./dags:/opt/airflow/dags, then project root is parent?
 # Actually, typically we map the whole project. Let's assume standard structure.
-# Command to run scraper
+# Command to refresh the hotel catalogue from every search result page
+discover_command = """
+cd /app && \
+python scraper/main.py \
+    --discover \
+    --url "https://www.agoda.com/city/da-nang-vn.html" \
+    --headless \
+    --block-resources \
+    --light-viewport
+"""
+
+# Command to run scraper (hotels ranked by expected new reviews within the budget)
 scrape_command = """
 cd /app && \
 python scraper/main.py \
     --mode multiple \
-    --max-hotels 10 \
+    --schedule \
+    --budget-minutes 60 \
+    --reviews 20 \
+    --url "https://www.agoda.com/city/da-nang-vn.html" \
+    --headless \
+    --block-resources \
+    --light-viewport \
+    --output "data/agoda_reviews_latest.json"
+"""
+
+# With SCRAPER_USE_QUEUE=1 the hotels are enqueued for the scraper_worker replicas
+# (docker-compose) and the results of the day's batch are collected afterwards
+USE_WORK_QUEUE = os.getenv("SCRAPER_USE_QUEUE") == "1"
+if USE_WORK_QUEUE:
+    scrape_command = """
+cd /app && \
+python scraper/main.py \
+    --enqueue \
+    --schedule \
+    --budget-minutes 120 \
     --reviews 20 \
+    --batch "{{ ds }}" \
     --url "https://www.agoda.com/city/da-nang-vn.html" \
     --headless \
+    --block-resources && \
+python scraper/main.py \
+    --collect \
+    --batch "{{ ds }}" \
     --output "data/agoda_reviews_latest.json"
 """
 
-# Command to ingest data
+# Command to ingest data: applies pending schema migrations, then merges only new reviews
 ingest_command = """
 cd /app && \
 python database/init_db.py --file "data/agoda_reviews_latest.json"
 """
 
+t0 = BashOperator(
+    task_id='discover_hotels',
+    bash_command=discover_command,
+    dag=dag,
+)
+
 t1 = BashOperator(
     task_id='run_scraper',
     bash_command=scrape_command,
@@ -60,4 +101,4 @@ t2 = BashOperator(
     dag=dag,
 )
 
-t1 >> t2
+t0 >> t1 >> t2
@@ -0,0 +1,49 @@
+#!/bin/bash
+
+# Local multi-worker test of the shared scrape queue.
+# Usage: automation/run_local_workers.sh [WORKERS] [HOTELS]
+#   USE_REPLAY=1 automation/run_local_workers.sh 4 20   # reviews from the local API stub (http engine)
+
+PROJECT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+cd "$PROJECT_DIR"
+
+WORKERS=${1:-3}
+HOTELS=${2:-10}
+BATCH="local-$(date +%Y%m%d-%H%M%S)"
+OUTPUT="data/${BATCH}.jsonl"
+LOG_DIR="data/worker_logs"
+mkdir -p "$LOG_DIR"
+
+# Queue lives in the compose Postgres (published on the host port)
+docker-compose up -d postgres
+export DB_HOST=localhost
+export DB_PORT=${POSTGRES_PORT:-5433}
+
+ENGINE_ARGS=""
+if [ "$USE_REPLAY" = "1" ]; then
+    python scraper/replay_server.py --port 8765 --latency 0.2 > "$LOG_DIR/replay.log" 2>&1 &
+    REPLAY_PID=$!
+    ENGINE_ARGS="--engine http --api-endpoint http://127.0.0.1:8765/api/cronos/property/review/ReviewComments"
+fi
+
+echo "[$(date)] Enqueuing $HOTELS hotels into batch $BATCH..."
+python scraper/main.py --enqueue --batch "$BATCH" --max-hotels "$HOTELS" --reviews 20 --headless --block-resources || exit 1
+
+echo "[$(date)] Starting $WORKERS workers..."
+PIDS=()
+for i in $(seq 1 "$WORKERS"); do
+    python scraper/main.py --worker --exit-when-empty --headless --block-resources --light-viewport $ENGINE_ARGS \
+        > "$LOG_DIR/${BATCH}_worker_${i}.log" 2>&1 &
+    PIDS+=($!)
+done
+
+for pid in "${PIDS[@]}"; do
+    wait "$pid"
+done
+
+python scraper/main.py --collect --batch "$BATCH" --output "$OUTPUT"
+
+if [ -n "$REPLAY_PID" ]; then
+    kill "$REPLAY_PID"
+fi
+echo "[$(date)] Batch $BATCH done. Results: $OUTPUT, worker logs: $LOG_DIR"
@@ -0,0 +1,292 @@
+"""
+Bulk ingestion of scraper output into ``reviews`` via COPY and a single merge.
+
+Rows are streamed from (hotel, review) pairs (see ``scraper.utils.iter_reviews``) into a temporary staging table with
+``COPY ... FROM STDIN`` (CSV), then merged with one
+``INSERT ... SELECT ... ON CONFLICT`` statement. Memory stays constant
+whatever the file size: the CSV is produced lazily as Postgres reads it.
+Hotels seen along the way are upserted into the ``hotels`` dimension first
+so every merged review carries its ``hotel_id``; their ``overall_statistics``
+are recorded as the day's stats and category score snapshots.
+
+NULLs never conflict in a unique constraint, so the ``CONFLICT_KEY`` columns
+are never staged empty: a missing reviewer or hotel name becomes
+``"Unknown"``, and reviews without a readable date are skipped.
+"""
+
+import io
+import os
+import json
+import re
+import csv
+import sys
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Add the project root directory to Python path so we can import 'scraper'
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from scraper.utils import parse_date, hotel_id_from_url
+from scraper.metrics import metrics
+
+REVIEW_COLUMNS = (
+    "hotel_name", "reviewer_name", "reviewer_score", "review_text", "review_date",
+    "room_type", "stay_duration", "country", "traveler_type"
+)
+CONFLICT_KEY = ("hotel_name", "reviewer_name", "review_date")
+COPY_CHUNK_ROWS = 1000  # rows rendered per read() from COPY
+UNKNOWN = "Unknown"  # stand-in for empty names in the conflict key
+
+
+def _score(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value) -> Optional[str]:
+    # Postgres text cannot hold NUL bytes
+    return str(value).replace("\x00", "") if value not in (None, "") else None
+
+
+def _number(value) -> Optional[float]:
+    """First number in values such as "8.5", "8,5" or "1,234 reviews"."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d[\d,.]*", str(value or ""))
+    if not match:
+        return None
+    text = match.group().rstrip(".,")
+    # "1,234" is a thousands separator, "8,5" a decimal comma
+    text = text.replace(",", "") if re.search(r",\d{3}\b", text) else text.replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _hotel_name(hotel: Dict) -> str:
+    return _text(hotel.get("hotel_name")) or UNKNOWN
+
+
+def review_rows(reviews: Iterable[Tuple[Dict, Dict]], hotels: Dict[str, Dict] = None,
+                skipped: Counter = None) -> Iterator[Tuple]:
+    """Turn (hotel, review) pairs into ``REVIEW_COLUMNS`` tuples.
+
+    When ``hotels`` is given, the hotel record of every row is kept in it by
+    name. Reviews without a readable date are dropped and counted in
+    ``skipped["no_date"]``.
+    """
+    for hotel, r in reviews:
+        review_date = r.get("review_date")
+        review_date = parse_date(review_date) if isinstance(review_date, str) else review_date
+        hotel_name = _hotel_name(hotel)
+        if hotels is not None:
+            hotels[hotel_name] = hotel
+        if review_date is None:
+            if skipped is not None:
+                skipped["no_date"] += 1
+            continue
+        yield (
+            hotel_name,
+            _text(r.get("reviewer_name")) or UNKNOWN,
+            _score(r.get("reviewer_score")),
+            _text(r.get("review_text")),
+            review_date,
+            _text(r.get("room_type")),
+            _text(r.get("stay_duration")),
+            _text(r.get("reviewer_country") or r.get("country")),
+            _text(r.get("traveler_type"))
+        )
+
+
+def upsert_hotels(cur, hotels: Dict[str, Dict]) -> int:
+    """Insert or refresh ``hotels`` rows; fields missing from a record keep their stored value.
+
+    Returns how many stats snapshots were written.
+    """
+    snapshots = 0
+    for hotel_name, hotel in hotels.items():
+        stats = hotel.get("overall_statistics") or {}
+        total = _number(stats.get("total_reviews"))
+        cur.execute("""
+            INSERT INTO hotels (hotel_name, agoda_hotel_id, hotel_url, overall_score, overall_rating_text,
+                                total_reviews, stats_updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, CASE WHEN %s THEN NOW() END)
+            ON CONFLICT (hotel_name) DO UPDATE SET
+                agoda_hotel_id = COALESCE(EXCLUDED.agoda_hotel_id, hotels.agoda_hotel_id),
+                hotel_url = COALESCE(EXCLUDED.hotel_url, hotels.hotel_url),
+                overall_score = COALESCE(EXCLUDED.overall_score, hotels.overall_score),
+                overall_rating_text = COALESCE(EXCLUDED.overall_rating_text, hotels.overall_rating_text),
+                total_reviews = COALESCE(EXCLUDED.total_reviews, hotels.total_reviews),
+                stats_updated_at = COALESCE(EXCLUDED.stats_updated_at, hotels.stats_updated_at),
+                updated_at = NOW()
+            RETURNING id
+        """, (
+            hotel_name,
+            hotel_id_from_url(hotel.get("hotel_url")),
+            _text(hotel.get("hotel_url")),
+            _number(stats.get("overall_score")),
+            _text(stats.get("overall_rating_text")),
+            int(total) if total is not None else None,
+            bool(stats)
+        ))
+        hotel_id = cur.fetchone()[0]
+        if stats:
+            save_stats_snapshot(cur, hotel_id, stats)
+            snapshots += 1
+    return snapshots
+
+
+def save_stats_snapshot(cur, hotel_id: int, stats: Dict):
+    """Record today's ``overall_statistics`` of a hotel; a reload on the same day replaces it."""
+    total = _number(stats.get("total_reviews"))
+    ratings = [_number(r.get("rating_value") if isinstance(r, dict) else r) for r in stats.get("recent_ratings") or []]
+    cur.execute("""
+        INSERT INTO hotel_stats_history (hotel_id, overall_score, overall_rating_text, total_reviews, recent_ratings)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (hotel_id, captured_on) DO UPDATE SET
+            overall_score = EXCLUDED.overall_score,
+            overall_rating_text = EXCLUDED.overall_rating_text,
+            total_reviews = EXCLUDED.total_reviews,
+            recent_ratings = EXCLUDED.recent_ratings
+    """, (
+        hotel_id,
+        _number(stats.get("overall_score")),
+        _text(stats.get("overall_rating_text")),
+        int(total) if total is not None else None,
+        json.dumps([r for r in ratings if r is not None])
+    ))
+    for category in stats.get("review_categories") or []:
+        name = _text((category or {}).get("category_name"))
+        if not name:
+            continue
+        cur.execute("""
+            INSERT INTO hotel_category_scores (hotel_id, category_name, category_score)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (hotel_id, captured_on, category_name) DO UPDATE SET category_score = EXCLUDED.category_score
+        """, (hotel_id, name, _number(category.get("category_score"))))
+
+
+class CsvRowStream(io.RawIOBase):
+    """Read-only file object rendering rows as CSV on demand, for ``copy_expert``."""
+
+    def __init__(self, rows: Iterable[Tuple], chunk_rows: int = COPY_CHUNK_ROWS):
+        self._rows = iter(rows)
+        self._chunk_rows = chunk_rows
+        self._buffer = b""
+        self.rows = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> bool:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for _ in range(self._chunk_rows):
+            row = next(self._rows, None)
+            if row is None:
+                break
+            writer.writerow(["" if v is None else v for v in row])
+            self.rows += 1
+        chunk = out.getvalue().encode("utf-8")
+        self._buffer += chunk
+        return bool(chunk)
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buffer) < size) and self._fill():
+            pass
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def bulk_load(conn, reviews: Iterable[Tuple[Dict, Dict]], update_existing: bool = False) -> Dict[str, int]:
+    """Stage (hotel, review) pairs with COPY and merge them into ``reviews`` in one transaction.
+
+    With ``update_existing`` rows that already exist are updated when any
+    column changed; otherwise they are left alone. Returns staged, inserted,
+    updated and unchanged row counts (from ``RETURNING (xmax = 0)``).
+    """
+    columns = ", ".join(REVIEW_COLUMNS)
+    staged = ", ".join(f"s.{c}" for c in REVIEW_COLUMNS)
+    key = ", ".join(CONFLICT_KEY)
+    staged_key = ", ".join(f"s.{c}" for c in CONFLICT_KEY)
+    if update_existing:
+        updatable = [c for c in REVIEW_COLUMNS if c not in CONFLICT_KEY] + ["hotel_id"]
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in updatable)
+        changed = " OR ".join(f"reviews.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in updatable)
+        on_conflict = f"DO UPDATE SET {assignments} WHERE {changed}"
+    else:
+        on_conflict = "DO NOTHING"
+
+    hotels: Dict[str, Dict] = {}
+    skipped = Counter()
+    stream = CsvRowStream(review_rows(reviews, hotels, skipped))
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TEMP TABLE reviews_staging (
+                seq BIGSERIAL,
+                hotel_name TEXT,
+                reviewer_name TEXT,
+                reviewer_score FLOAT,
+                review_text TEXT,
+                review_date DATE,
+                room_type TEXT,
+                stay_duration TEXT,
+                country TEXT,
+                traveler_type TEXT
+            ) ON COMMIT DROP
+        """)
+        with metrics.span("db.copy"):
+            cur.copy_expert(f"COPY reviews_staging ({columns}) FROM STDIN WITH (FORMAT csv)", stream)
+        with metrics.span("db.hotels"):
+            snapshots = upsert_hotels(cur, hotels)
+
+        # DISTINCT ON keeps the last copy of a review that appears twice in the input;
+        # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+        with metrics.span("db.merge"):
+            cur.execute(f"""
+                WITH merged AS (
+                    INSERT INTO reviews ({columns}, hotel_id)
+                    SELECT DISTINCT ON ({staged_key}) {staged}, h.id
+                    FROM reviews_staging s
+                    LEFT JOIN hotels h ON h.hotel_name = s.hotel_name
+                    ORDER BY {staged_key}, s.seq DESC
+                    ON CONFLICT ({key}) {on_conflict}
+                    RETURNING (xmax = 0) AS inserted
+                )
+                SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+            """)
+            inserted, updated = cur.fetchone()
+            cur.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT {key} FROM reviews_staging) s")
+            distinct = cur.fetchone()[0]
+    conn.commit()
+
+    counts = {
+        "staged": stream.rows,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": distinct - inserted - updated,
+        "duplicates_in_input": stream.rows - distinct,
+        "skipped_no_date": skipped["no_date"],
+        "hotels": len(hotels),
+        "stats_snapshots": snapshots
+    }
+    metrics.inc("db_rows_processed_total", stream.rows, table="reviews")
+    metrics.inc("db_rows_inserted_total", inserted, table="reviews")
+    metrics.inc("db_rows_updated_total", updated, table="reviews")
+    metrics.inc("db_rows_inserted_total", snapshots, table="hotel_stats_history")
+    metrics.inc("db_rows_skipped_total", skipped["no_date"], table="reviews", reason="no_date")
+    logging.info(
+        f"Bulk load: {counts['staged']} rows staged, {inserted} inserted, {updated} updated, "
+        f"{counts['unchanged']} unchanged, {counts['duplicates_in_input']} duplicates in input, "
+        f"{counts['skipped_no_date']} without a date skipped, "
+        f"{len(hotels)} hotels upserted ({snapshots} stats snapshots)."
+    )
+    if skipped["no_date"]:
+        # Undated reviews cannot be deduplicated (NULL never conflicts), so they are not loaded
+        logging.warning(f"Bulk load: {skipped['no_date']} reviews without a readable review_date were not loaded.")
+    return counts
@@ -1,16 +1,22 @@
 import json
 import os
+import sys
 import glob
-import pandas as pd
-from datetime import datetime
+import sqlite3
+import tempfile
+
+# Add the project root directory to Python path so we can import 'scraper'
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from scraper.utils import iter_reviews, batched
 
 # Paths
 DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
 OUTPUT_FILE = os.path.join(DATA_DIR, 'agoda_reviews_cleaned.json')
+BATCH_SIZE = 5000
 
 def clean_and_merge():
-    # 1. Find all JSON files (exclude buffer/temp files if any)
-    json_files = glob.glob(os.path.join(DATA_DIR, '*.json'))
+    # 1. Find all JSON/JSONL files (exclude buffer/temp files if any)
+    json_files = glob.glob(os.path.join(DATA_DIR, '*.json')) + glob.glob(os.path.join(DATA_DIR, '*.jsonl'))
     json_files = [f for f in json_files if 'cleaned' not in f and 'schema' not in f]
     
     if not json_files:
@@ -19,75 +25,84 @@ def clean_and_merge():
 
     print(f"Found {len(json_files)} files: {[os.path.basename(x) for x in json_files]}")
 
-    all_reviews = []
+    # 2. Stream reviews into an on-disk spool, deduplicating on the composite key.
+    # Reviews are never all held in memory; the spool lives in a temp SQLite file.
+    spool_dir = tempfile.mkdtemp(prefix="agoda_clean_")
+    spool_path = os.path.join(spool_dir, "reviews.sqlite")
+    conn = sqlite3.connect(spool_path)
+    try:
+        conn.execute("""
+            CREATE TABLE reviews (
+                seq INTEGER PRIMARY KEY,
+                review_key TEXT UNIQUE,
+                hotel_name TEXT,
+                hotel_url TEXT,
+                review TEXT
+            )
+        """)
+        initial_count = 0
+        for file_path in json_files:
+            try:
+                # Handles list of hotels, single hotel dict, or one hotel per JSONL line
+                rows = (_spool_row(hotel, r) for hotel, r in iter_reviews(file_path))
+                for batch in batched(rows, BATCH_SIZE):
+                    # INSERT OR IGNORE keeps the first copy of a duplicate review
+                    conn.executemany("INSERT OR IGNORE INTO reviews (review_key, hotel_name, hotel_url, review) VALUES (?, ?, ?, ?)", batch)
+                    initial_count += len(batch)
+                conn.commit()
+            except Exception as e:
+                conn.commit()
+                print(f"Error reading {file_path}: {e}")
 
-    # 2. Extract and Flatten
-    for file_path in json_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # Handle both list of hotels or single hotel dict
-                if isinstance(data, dict): data = [data]
-                
-                for hotel in data:
-                    hotel_name = hotel.get('hotel_name', 'Unknown')
-                    reviews = hotel.get('reviews', [])
-                    
-                    for r in reviews:
-                        # Flatten for DataFrame
-                        item = r.copy()
-                        item['hotel_name'] = hotel_name
-                        all_reviews.append(item)
-                        
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
+        final_count = conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        if not final_count:
+            print("No reviews extracted.")
+            return
 
-    if not all_reviews:
-        print("No reviews extracted.")
-        return
+        # 3. Duplicates were dropped on insert
+        # We rely on string exact match of review_date here;
+        # for now assuming consistent "Reviewed Month DD, YYYY" from scraper.
+        print(f"Removed {initial_count - final_count} duplicate reviews. Total unique: {final_count}")
 
-    # 3. Deduplicate using Pandas
-    df = pd.DataFrame(all_reviews)
-    
-    # Check duplicates based on composite key
-    initial_count = len(df)
-    
-    # Ensure review_date is consistent for dedup
-    # We don't parse it to date object here to keep JSON serializable easily, 
-    # but we rely on string exact match. 
-    # If date formats vary, we might need normalization. 
-    # For now assuming consistent "Reviewed Month DD, YYYY" from scraper.
-    
-    df.drop_duplicates(subset=['hotel_name', 'reviewer_name', 'review_date'], keep='first', inplace=True)
-    
-    final_count = len(df)
-    print(f"Removed {initial_count - final_count} duplicate reviews. Total unique: {final_count}")
+        # 4. Reconstruct JSON Structure (List of Hotels -> List of Reviews), one hotel at a time
+        conn.execute("CREATE INDEX idx_reviews_hotel ON reviews (hotel_name, seq)")
+        _write_grouped(conn, OUTPUT_FILE)
+    finally:
+        conn.close()
+        os.remove(spool_path)
+        os.rmdir(spool_dir)
 
-    # 4. Reconstruct JSON Structure (List of Hotels -> List of Reviews)
-    # Group by hotel_name to match original structure expected by init_db.py
-    grouped = df.groupby('hotel_name')
-    
-    output_data = []
-    for hotel_name, group in grouped:
-        # Convert group back to list of dicts, removing hotel_name from inner dict if desired
-        # or keeping it is fine. init_db expects 'reviews' list.
-        
-        # Drop hotel_name from inner dicts to match original schema (optional but cleaner)
-        reviews_list = group.drop(columns=['hotel_name']).to_dict(orient='records')
-        
-        hotel_entry = {
-            "hotel_name": hotel_name,
-            "reviews": reviews_list,
-            "reviews_count": len(reviews_list)
-        }
-        output_data.append(hotel_entry)
-
-    # 5. Save
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
-    
     print(f"Successfully saved cleaned data to: {OUTPUT_FILE}")
 
+def _spool_row(hotel, review):
+    hotel_name = hotel.get('hotel_name') or 'Unknown'
+    # Same key as the reviews table's unique constraint
+    key = json.dumps([hotel_name, review.get('reviewer_name'), review.get('review_date')], ensure_ascii=False)
+    # Drop hotel_name from inner dicts to match original schema
+    review = {k: v for k, v in review.items() if k != 'hotel_name'}
+    return key, hotel_name, hotel.get('hotel_url'), json.dumps(review, ensure_ascii=False, default=str)
+
+def _write_grouped(conn, output_file):
+    """Write the spool as a list of hotels (sorted by name), streaming reviews to a temp file."""
+    temp_file = f"{output_file}.tmp"
+    # Kept so loaders can key hotels by their stable Agoda ID
+    urls = dict(conn.execute("SELECT hotel_name, MAX(hotel_url) FROM reviews GROUP BY hotel_name"))
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write("[")
+        hotel_name, count = None, 0
+        for name, review in conn.execute("SELECT hotel_name, review FROM reviews ORDER BY hotel_name, seq"):
+            if name != hotel_name:
+                if hotel_name is not None:
+                    f.write(f'\n    ],\n    "reviews_count": {count}\n  }},')
+                f.write(f'\n  {{\n    "hotel_name": {json.dumps(name, ensure_ascii=False)},'
+                        f'\n    "hotel_url": {json.dumps(urls.get(name))},\n    "reviews": [')
+                hotel_name, count = name, 0
+            f.write(("," if count else "") + "\n      " + review)
+            count += 1
+        if hotel_name is not None:
+            f.write(f'\n    ],\n    "reviews_count": {count}\n  }}')
+        f.write("\n]\n")
+    os.replace(temp_file, output_file)
+
 if __name__ == "__main__":
     clean_and_merge()
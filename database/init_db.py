@@ -1,13 +1,12 @@
 import os
 import sys
-import json
 import logging
 import psycopg2
-from psycopg2.extras import execute_values
 from datetime import datetime
 
 # Add the project root directory to Python path so we can import 'scraper'
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from scraper.metrics import metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -55,34 +54,15 @@ def parse_date(date_str):
             logging.warning(f"Could not parse date: {date_str}")
             return None
 
-def create_table(conn):
+def ensure_schema(conn):
+    """Bring the schema up to date without touching existing rows (see migrations.py)."""
     try:
-        cur = conn.cursor()
-        logging.info("Creating table 'reviews'...")
-        cur.execute("""
-            CREATE EXTENSION IF NOT EXISTS vector;
-            DROP TABLE IF EXISTS reviews;
-            CREATE TABLE IF NOT EXISTS reviews (
-                id SERIAL PRIMARY KEY,
-                hotel_name TEXT,
-                reviewer_name TEXT,
-                reviewer_score FLOAT,
-                review_text TEXT,
-                review_date DATE,
-                room_type TEXT,
-                stay_duration TEXT,
-                country TEXT,
-                traveler_type TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                CONSTRAINT unique_review UNIQUE (hotel_name, reviewer_name, review_date)
-            );
-        """)
-        conn.commit()
-        cur.close()
-        logging.info("Table 'reviews' created successfully.")
+        from migrations import migrate
+        migrate(conn)
     except Exception as e:
-        logging.error(f"Error creating table: {e}")
+        logging.error(f"Error migrating schema: {e}")
         conn.rollback()
+        raise
 
 def load_data(conn):
     if not os.path.exists(JSON_FILE):
@@ -90,55 +70,20 @@ def load_data(conn):
         return
 
     try:
-        with open(JSON_FILE, 'r') as f:
-            data = json.load(f)
-        
-        # Flatten the data
-        from scraper.utils import parse_date # Import from utils to match scraper logic
-        
-        reviews_to_insert = []
-        for hotel in data:
-            hotel_name = hotel.get('hotel_name', 'Unknown')
-            for r in hotel.get('reviews', []):
-                reviews_to_insert.append((
-                    hotel_name,
-                    r.get('reviewer_name'),
-                    r.get('reviewer_score', 0.0),
-                    r.get('review_text'),
-                    parse_date(r.get('review_date')),
-                    r.get('room_type'),
-                    r.get('stay_duration'),
-                    r.get('reviewer_country') or r.get('country'),
-                    r.get('traveler_type')
-                ))
-        
-        if not reviews_to_insert:
+        from scraper.utils import iter_reviews
+        from bulk_load import bulk_load
+
+        logging.info(f"Loading {JSON_FILE}...")
+        # INCREMENTAL LOAD: Do not truncate; existing reviews are left untouched.
+        with metrics.span("db.insert"):
+            counts = bulk_load(conn, iter_reviews(JSON_FILE))
+        if not counts["staged"]:
             logging.warning("No reviews found to insert.")
             return
-
-        cur = conn.cursor()
-        # INCREMENTAL LOAD: Do not truncate.
-        
-        logging.info(f"Processing {len(reviews_to_insert)} reviews...")
-        
-        insert_query = """
-            INSERT INTO reviews (hotel_name, reviewer_name, reviewer_score, review_text, review_date, room_type, stay_duration, country, traveler_type)
-            VALUES %s
-            ON CONFLICT (hotel_name, reviewer_name, review_date) DO NOTHING
-        """
-        
-        execute_values(cur, insert_query, reviews_to_insert)
-        
-        # Check how many were inserted - execute_values doesn't return count easily with ON CONFLICT
-        # simplified logging
-        
-        conn.commit()
-        cur.close()
-        logging.info("Data upserted successfully (New reviews added, duplicates ignored).")
-        
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-        conn.rollback()
+        logging.info(
+            f"Data upserted successfully ({counts['inserted']} new reviews added, duplicates ignored, "
+            f"{counts['skipped_no_date']} without a date skipped)."
+        )
 
     except Exception as e:
         logging.error(f"Error loading data: {e}")
@@ -147,7 +92,8 @@ def load_data(conn):
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
-    parser.add_argument("--file", type=str, default=JSON_FILE, help="Path to JSON file to ingest")
+    parser.add_argument("--file", type=str, default=JSON_FILE, help="Path to JSON/JSONL file to ingest")
+    parser.add_argument("--metrics-textfile", type=str, help="Write load metrics in Prometheus textfile format")
     args = parser.parse_args()
     
     # Override global JSON_FILE if arg provided
@@ -156,8 +102,11 @@ if __name__ == "__main__":
 
     try:
         conn = get_db_connection()
-        create_table(conn)
+        ensure_schema(conn)
         load_data(conn)
         conn.close()
     except Exception as e:
-        logging.error(f"Failed to connect to database: {e}")
+        logging.error(f"Database ingest failed: {e}")
+    finally:
+        if args.metrics_textfile:
+            metrics.write_textfile(args.metrics_textfile)
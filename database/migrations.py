@@ -0,0 +1,163 @@
+"""
+Versioned, non-destructive schema migrations for the reviews database.
+
+    python database/migrations.py            # apply pending migrations
+    python database/migrations.py --status   # list applied and pending versions
+
+Each migration runs in its own transaction and is recorded in
+``schema_version``, so re-running is a no-op and existing rows are never
+dropped. Migrations only move forward; a new schema change is a new entry
+appended to ``MIGRATIONS``, never an edit of an applied one. A session
+advisory lock keeps concurrent loaders (e.g. overlapping Airflow runs) from
+applying the same version twice.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+MIGRATION_LOCK_ID = 7_403_117  # pg_advisory_lock key shared by every migrating process
+
+# (version, description, SQL). The first migration matches the table the old
+# DROP/CREATE in init_db produced, so existing databases adopt it unchanged.
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, "reviews table", """
+        CREATE EXTENSION IF NOT EXISTS vector;
+        CREATE TABLE IF NOT EXISTS reviews (
+            id SERIAL PRIMARY KEY,
+            hotel_name TEXT,
+            reviewer_name TEXT,
+            reviewer_score FLOAT,
+            review_text TEXT,
+            review_date DATE,
+            room_type TEXT,
+            stay_duration TEXT,
+            country TEXT,
+            traveler_type TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT unique_review UNIQUE (hotel_name, reviewer_name, review_date)
+        );
+    """),
+    # Hotels are keyed by name because unique_review is; the Agoda ID (from the
+    # hotel URL) is filled in once a scraper output carrying the URL is loaded.
+    (2, "hotels dimension, reviews.hotel_id and per-hotel indexes", """
+        CREATE TABLE IF NOT EXISTS hotels (
+            id SERIAL PRIMARY KEY,
+            hotel_name TEXT NOT NULL,
+            agoda_hotel_id TEXT,
+            hotel_url TEXT,
+            overall_score FLOAT,
+            overall_rating_text TEXT,
+            total_reviews INTEGER,
+            stats_updated_at TIMESTAMPTZ,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            CONSTRAINT unique_hotel_name UNIQUE (hotel_name)
+        );
+        CREATE INDEX IF NOT EXISTS idx_hotels_agoda_id ON hotels (agoda_hotel_id);
+
+        INSERT INTO hotels (hotel_name)
+        SELECT DISTINCT hotel_name FROM reviews WHERE hotel_name IS NOT NULL
+        ON CONFLICT (hotel_name) DO NOTHING;
+
+        ALTER TABLE reviews ADD COLUMN IF NOT EXISTS hotel_id INTEGER REFERENCES hotels (id);
+        UPDATE reviews SET hotel_id = hotels.id
+        FROM hotels WHERE hotels.hotel_name = reviews.hotel_name AND reviews.hotel_id IS NULL;
+
+        CREATE INDEX IF NOT EXISTS idx_reviews_hotel_id_date ON reviews (hotel_id, review_date DESC);
+        CREATE INDEX IF NOT EXISTS idx_reviews_hotel_name_date ON reviews (hotel_name, review_date);
+    """),
+    # One row per hotel per load day; the primary keys serve "latest for a hotel" lookups
+    (3, "hotel stats and category score history", """
+        CREATE TABLE IF NOT EXISTS hotel_stats_history (
+            hotel_id INTEGER NOT NULL REFERENCES hotels (id),
+            captured_on DATE NOT NULL DEFAULT CURRENT_DATE,
+            overall_score FLOAT,
+            overall_rating_text TEXT,
+            total_reviews INTEGER,
+            recent_ratings JSONB,
+            PRIMARY KEY (hotel_id, captured_on)
+        );
+        CREATE TABLE IF NOT EXISTS hotel_category_scores (
+            hotel_id INTEGER NOT NULL REFERENCES hotels (id),
+            captured_on DATE NOT NULL DEFAULT CURRENT_DATE,
+            category_name TEXT NOT NULL,
+            category_score FLOAT,
+            PRIMARY KEY (hotel_id, captured_on, category_name)
+        );
+    """),
+]
+
+
+def _ensure_version_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions(conn) -> List[int]:
+    with conn.cursor() as cur:
+        _ensure_version_table(cur)
+        cur.execute("SELECT version FROM schema_version ORDER BY version")
+        versions = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return versions
+
+
+def migrate(conn, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: latest); returns the versions applied."""
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        try:
+            # Read under the lock: another process may have just migrated
+            done = set(applied_versions(conn))
+            for version, description, sql in MIGRATIONS:
+                if version in done or (target is not None and version > target):
+                    continue
+                logging.info(f"Applying migration {version}: {description}...")
+                try:
+                    cur.execute(sql)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                        (version, description)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                applied.append(version)
+        finally:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+    if applied:
+        logging.info(f"Schema migrated to version {applied[-1]} ({len(applied)} migrations applied).")
+    else:
+        logging.info("Schema is up to date.")
+    return applied
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from init_db import get_db_connection
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--target", type=int, help="Migrate up to this version only")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        if args.status:
+            done = set(applied_versions(conn))
+            for version, description, _ in MIGRATIONS:
+                print(f"{version:>4}  {'applied' if version in done else 'pending':<8} {description}")
+        else:
+            migrate(conn, args.target)
+    finally:
+        conn.close()
@@ -6,14 +6,14 @@ Usage: python3 database/update_from_cleaned.py
 
 import os
 import sys
-import json
 import logging
 import psycopg2
-from psycopg2.extras import execute_values
-from datetime import datetime
 
 # Add project root to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from scraper.utils import iter_reviews
+from bulk_load import bulk_load
+from migrations import migrate
 
 # Configure logging
 logging.basicConfig(
@@ -47,23 +47,6 @@ def get_db_connection():
     )
 
 
-def parse_date(date_str):
-    """Parse date string to date object"""
-    if not date_str:
-        return None
-    try:
-        # Try format: "Reviewed October 02, 2025"
-        clean_str = date_str.replace("Reviewed ", "").strip()
-        return datetime.strptime(clean_str, "%B %d, %Y").date()
-    except ValueError:
-        try:
-            # Try ISO format: "2025-10-02"
-            return datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            logging.warning(f"Could not parse date: {date_str}")
-            return None
-
-
 def update_database():
     """Load data from cleaned JSON and update database"""
     
@@ -74,103 +57,29 @@ def update_database():
     
     logging.info(f"Reading data from: {CLEANED_JSON}")
     
-    # Load JSON data
-    try:
-        with open(CLEANED_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception as e:
-        logging.error(f"Error reading JSON file: {e}")
-        return False
-    
-    if not isinstance(data, list):
-        logging.error("JSON data should be a list of hotel objects")
-        return False
-    
-    logging.info(f"Found {len(data)} hotel(s) in the JSON file")
-    
     # Connect to database
     try:
         conn = get_db_connection()
-        cur = conn.cursor()
         logging.info("Connected to database successfully")
     except Exception as e:
         logging.error(f"Database connection error: {e}")
         return False
     
-    # Prepare reviews for insertion
-    reviews_to_insert = []
-    total_reviews = 0
-    
-    for hotel in data:
-        hotel_name = hotel.get('hotel_name', 'Unknown')
-        reviews = hotel.get('reviews', [])
-        total_reviews += len(reviews)
-        
-        logging.info(f"Processing hotel: {hotel_name} ({len(reviews)} reviews)")
-        
-        for review in reviews:
-            # Extract review data
-            review_data = (
-                hotel_name,
-                review.get('reviewer_name', 'Unknown'),
-                float(review.get('reviewer_score', 0.0)),
-                review.get('review_text', ''),
-                parse_date(review.get('review_date')),
-                review.get('room_type', ''),
-                review.get('stay_duration', ''),
-                review.get('reviewer_country') or review.get('country', ''),
-                review.get('traveler_type', '')
-            )
-            reviews_to_insert.append(review_data)
-    
-    if not reviews_to_insert:
-        logging.warning("No reviews found to insert")
-        conn.close()
-        return False
-    
-    logging.info(f"Total reviews to insert: {len(reviews_to_insert)}")
-    
-    # Insert data with ON CONFLICT handling
+    # Stream reviews into a staging table and merge them; changed reviews are updated
     try:
-        insert_query = """
-            INSERT INTO reviews (
-                hotel_name, reviewer_name, reviewer_score, review_text, 
-                review_date, room_type, stay_duration, country, traveler_type
-            )
-            VALUES %s
-            ON CONFLICT (hotel_name, reviewer_name, review_date) 
-            DO UPDATE SET
-                reviewer_score = EXCLUDED.reviewer_score,
-                review_text = EXCLUDED.review_text,
-                room_type = EXCLUDED.room_type,
-                stay_duration = EXCLUDED.stay_duration,
-                country = EXCLUDED.country,
-                traveler_type = EXCLUDED.traveler_type
-        """
-        
-        execute_values(cur, insert_query, reviews_to_insert)
-        conn.commit()
-        
-        # Get count
-        cur.execute("SELECT COUNT(*) FROM reviews")
-        total_in_db = cur.fetchone()[0]
-        
+        migrate(conn)
+        counts = bulk_load(conn, iter_reviews(CLEANED_JSON), update_existing=True)
+        if not counts["staged"]:
+            logging.warning("No reviews found to insert")
+            conn.close()
+            return False
+
         logging.info(f"✅ Database updated successfully!")
-        logging.info(f"Total reviews in database: {total_in_db}")
-        
-        # Show breakdown by hotel
-        cur.execute("""
-            SELECT hotel_name, COUNT(*) as review_count 
-            FROM reviews 
-            GROUP BY hotel_name 
-            ORDER BY review_count DESC
-        """)
-        
-        logging.info("\nBreakdown by hotel:")
-        for hotel_name, count in cur.fetchall():
-            logging.info(f"  - {hotel_name}: {count} reviews")
+        logging.info(
+            f"New reviews: {counts['inserted']}, updated: {counts['updated']}, unchanged: {counts['unchanged']}, "
+            f"skipped (no date): {counts['skipped_no_date']}"
+        )
         
-        cur.close()
         conn.close()
         return True
         
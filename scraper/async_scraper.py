@@ -0,0 +1,471 @@
+import time
+import asyncio
+import logging
+from typing import List, Dict, Optional
+from playwright.async_api import async_playwright
+from tenacity import AsyncRetrying, stop_after_attempt, wait_random_exponential
+from agentql import wrap_async, configure
+
+from config import (
+    AGENTQL_API_KEY,
+    HOTEL_LIST_QUERY,
+    OVERALL_REVIEW_STATS_QUERY,
+    INDIVIDUAL_REVIEWS_QUERY,
+    DEFAULT_VIEWPORT,
+    DEFAULT_USER_AGENT,
+    LIGHT_VIEWPORT,
+    BLOCK_RESOURCES,
+    POLITENESS_DELAY,
+    ASYNC_MAX_HOTELS,
+    ASYNC_MAX_REVIEW_PAGES,
+    INTERCEPT_REVIEWS,
+    HOTEL_CARD_SELECTOR,
+    REVIEW_CARD_SELECTOR,
+    FAST_EXTRACT,
+    REVIEW_PREFETCH_PAGES,
+    BACKDROP_SELECTOR,
+    CAPTCHA_SELECTOR,
+    THROTTLE_STATUSES,
+    THROTTLE_RESOURCE_TYPES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    AGODA_HOME_URL
+)
+from utils import ResultSink, normalize_hotel_url, resolve_stop_date, split_at_stop_date
+from review_interceptor import ReviewResponseCollector, PREFETCH_REVIEWS_JS, parse_prefetched, find_hotel_id
+from resource_blocker import ResourceBlocker
+from waits import AsyncWaitStrategy
+from rate_limiter import AdaptiveRateLimiter, get_limiter
+from metrics import metrics
+from query_cache import QueryCache
+from extractors import ReviewCardExtractor
+
+# Configure AgentQL
+if AGENTQL_API_KEY:
+    configure(api_key=AGENTQL_API_KEY)
+
+class AsyncAgodaScraper:
+    """Asyncio counterpart of ``AgodaScraper``.
+
+    One browser is shared by every hotel; each hotel gets its own isolated
+    context. ``max_concurrent_hotels`` bounds how many hotels are in flight and
+    ``max_concurrent_pages`` bounds concurrent AgentQL review-page queries.
+    """
+
+    def __init__(self, headless: bool = False, slow_mo: int = 300, logger: logging.Logger = None,
+                 max_concurrent_hotels: int = ASYNC_MAX_HOTELS, max_concurrent_pages: int = ASYNC_MAX_REVIEW_PAGES,
+                 intercept_reviews: bool = INTERCEPT_REVIEWS, block_resources: bool = BLOCK_RESOURCES,
+                 light_viewport: bool = False, rate_limiter: AdaptiveRateLimiter = None, query_cache: QueryCache = None,
+                 fast_extract: bool = FAST_EXTRACT, prefetch_pages: int = REVIEW_PREFETCH_PAGES):
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_concurrent_hotels = max_concurrent_hotels
+        self.max_concurrent_pages = max_concurrent_pages
+        self.intercept_reviews = intercept_reviews
+        self.light_viewport = light_viewport
+        self.resource_blocker = ResourceBlocker() if block_resources else None
+        self.rate_limiter = rate_limiter or get_limiter(AGODA_HOME_URL)
+        self.query_cache = query_cache
+        self.card_extractor = ReviewCardExtractor(log=self.logger) if fast_extract else None
+        self.prefetch_pages = prefetch_pages
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        self._hotel_semaphore = None
+        self._page_semaphore = None
+        self.waits = AsyncWaitStrategy(logger=self.logger)
+
+    async def start(self):
+        """Initialize Playwright and Browser."""
+        self.logger.info("Starting browser (async)...")
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            slow_mo=self.slow_mo if not self.headless else 0
+        )
+        self.context, self.page = await self._new_page()
+        # Semaphores must be created inside the running event loop
+        self._hotel_semaphore = asyncio.Semaphore(self.max_concurrent_hotels)
+        self._page_semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        self.logger.info("Browser started.")
+
+    async def close(self):
+        """Close browser resources."""
+        self.waits.log_report()
+        self.rate_limiter.log_stats(self.logger)
+        if self.resource_blocker:
+            self.resource_blocker.log_stats(self.logger)
+        if self.context:
+            await self.context.close()
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.logger.info("Browser closed.")
+
+    async def _new_page(self):
+        """Open an isolated context on the shared browser and wrap its page."""
+        context = await self.browser.new_context(
+            viewport=LIGHT_VIEWPORT if self.light_viewport else DEFAULT_VIEWPORT,
+            user_agent=DEFAULT_USER_AGENT
+        )
+        if self.resource_blocker:
+            await self.resource_blocker.attach_async(context)
+        context.on("response", self._on_response_status)
+        page = await wrap_async(await context.new_page())
+        return context, page
+
+    async def _activate_page(self, page):
+        """Right-click to activate Agoda DOM to avoid pointer event interception."""
+        try:
+            await self.waits.for_load(page, "activate.load", ceiling_ms=1000)
+            await page.keyboard.press("PageDown")
+            await self.waits.for_next_frame(page, "activate.scroll", ceiling_ms=300)
+
+            vp = page.viewport_size
+            cx, cy = vp["width"] // 2, vp["height"] // 2
+
+            await page.mouse.move(cx, cy)
+            await page.mouse.click(cx, cy, button="right")
+            await self.waits.for_next_frame(page, "activate.click", ceiling_ms=500)
+            self.logger.debug("Right-click activation success.")
+        except Exception as e:
+            self.logger.warning(f"Right-click activation failed: {e}")
+
+    async def _turn_off_overlay(self, page):
+        """Attempt to close overlays/backdrops."""
+        try:
+            backdrop = page.locator(BACKDROP_SELECTOR)
+
+            async def backdrop_gone():
+                return not await backdrop.first.is_visible()
+
+            if await backdrop.count() > 0 and await backdrop.first.is_visible():
+                self.logger.info("Backdrop detected, attempting to close...")
+                metrics.inc("overlays_removed_total")
+                self.rate_limiter.on_throttle("backdrop", soft=True)
+                try:
+                    await backdrop.first.click()
+                    if await self.waits.until("overlay.click", backdrop_gone, ceiling_ms=200):
+                        return
+                except:
+                    pass
+
+                try:
+                    await page.keyboard.press("Escape")
+                    if await self.waits.until("overlay.escape", backdrop_gone, ceiling_ms=200):
+                        return
+                except:
+                    pass
+
+                # JS Force remove
+                await page.evaluate("""
+                    () => {
+                        const b = document.querySelector("[data-selenium='backdrop']");
+                        if (b) {
+                            b.style.pointerEvents = 'none';
+                            b.style.opacity = '0';
+                        }
+                    }
+                """)
+                await self.waits.for_next_frame(page, "overlay.js", ceiling_ms=200)
+                self.logger.info("Backdrop disabled via JS.")
+        except Exception as e:
+            self.logger.debug(f"Overlay handling error: {e}")
+
+    def _on_response_status(self, response):
+        """Feed throttling status codes of Agoda pages and API calls into the rate limiter."""
+        if (response.status in THROTTLE_STATUSES and self.rate_limiter.name in response.url
+                and response.request.resource_type in THROTTLE_RESOURCE_TYPES):
+            self.rate_limiter.on_throttle(f"HTTP {response.status}")
+
+    async def navigate(self, url: str, max_retries: int = 3, page=None):
+        """Navigate to URL through the rate limiter, retrying with jittered exponential backoff."""
+        page = page or self.page
+        retrying = AsyncRetrying(stop=stop_after_attempt(max_retries), reraise=True,
+                                 wait=wait_random_exponential(multiplier=RETRY_BACKOFF_BASE, max=RETRY_BACKOFF_MAX))
+        try:
+            async for attempt in retrying:
+                with attempt, metrics.span("navigate"):
+                    n = attempt.retry_state.attempt_number
+                    if n > 1:
+                        metrics.inc("retries_total", step="navigate")
+                    await self.rate_limiter.acquire_async()
+                    self.logger.info(f"Navigating to {url} (Attempt {n}/{max_retries})")
+                    try:
+                        started = time.perf_counter()
+                        response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                        if response and response.status in THROTTLE_STATUSES:
+                            raise RuntimeError(f"HTTP {response.status}")
+                        if await page.locator(CAPTCHA_SELECTOR).count() > 0:
+                            self.rate_limiter.on_throttle("captcha")
+                            raise RuntimeError("Captcha page detected")
+                        self.rate_limiter.on_success(time.perf_counter() - started)
+                    except Exception as e:
+                        self.logger.warning(f"Navigation failed: {e}")
+                        raise
+                    await self.waits.for_load(page, "navigate.load", ceiling_ms=2000)
+                    await self._activate_page(page)
+                    return True
+        except Exception:
+            self.logger.error("All navigation retries failed.")
+            raise
+        return False
+
+    async def _click_read_all_reviews(self, page) -> bool:
+        """Click 'Read all reviews' button."""
+        self.logger.info("Attempting to click 'Read all reviews'...")
+        locator = page.locator("span[label='Read all reviews']")
+
+        try:
+            with metrics.span("read_all_reviews"):
+                if not await locator.is_visible():
+                    await self._turn_off_overlay(page)
+
+                await locator.click(force=True, timeout=5000)
+            self.logger.info("Clicked 'Read all reviews'.")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to click 'Read all reviews': {e}")
+            return False
+
+    async def _click_next_page(self, page, collector: Optional[ReviewResponseCollector] = None) -> bool:
+        """Click next pagination button."""
+        sel = "button[aria-label='Next reviews page'], button[data-element-name='review-paginator-next'], button[aria-label*='Next']"
+        loc = page.locator(sel)
+
+        count = await loc.count()
+        if count == 0:
+            return False
+
+        for i in range(count):
+            cand = loc.nth(i)
+            if await cand.is_visible():
+                try:
+                    with metrics.span("pagination"):
+                        before = await self.waits.review_signature(page)
+                        await self.rate_limiter.acquire_async()
+                        await cand.click(force=True, timeout=5000)
+                        await self.waits.for_review_list_change(page, "reviews.next_page", before, ceiling_ms=5000, collector=collector)
+                    return True
+                except:
+                    continue
+        return False
+
+    async def _query_data(self, page, query: str, timeout: int, scope: str = None) -> Dict:
+        """Run an AgentQL query, bounded by the review-page semaphore and answered from the query cache when possible."""
+        if self.query_cache:
+            return await self.query_cache.query_async(page, query, timeout, scope, run=self._run_query)
+        return await self._run_query(page, query, timeout)
+
+    async def _run_query(self, page, query: str, timeout: int) -> Dict:
+        async with self._page_semaphore:
+            return await page.query_data(query, timeout=timeout)
+
+    async def scrape_hotel(self, url: str, max_reviews: int = 50, stop_date: object = None) -> Dict:
+        """Scrape a single hotel in its own browser context."""
+        async with self._hotel_semaphore:
+            context, page = await self._new_page()
+            collector = None
+            if self.intercept_reviews:
+                collector = ReviewResponseCollector()
+                collector.attach(page)
+            try:
+                with metrics.span("hotel"):
+                    result = await self._scrape_hotel_page(page, url, max_reviews, stop_date, collector)
+                metrics.inc("hotels_total")
+                metrics.inc("reviews_total", result["total_reviews_scraped"])
+                return result
+            finally:
+                await context.close()
+
+    async def _extract_reviews(self, page, collector: Optional[ReviewResponseCollector]) -> List[Dict]:
+        """Reviews on the current page: intercepted API payload, then review-card selectors, then AgentQL."""
+        if collector:
+            reviews = await collector.pop_reviews_async()
+            if reviews:
+                self.logger.info(f"Using {len(reviews)} reviews from intercepted API response.")
+                metrics.inc("review_pages_total", source="intercepted")
+                return reviews
+            self.logger.info("No review payload captured, falling back to page extraction.")
+
+        if self.card_extractor:
+            try:
+                with metrics.span("extract.selectors"):
+                    reviews = await self.card_extractor.extract_async(page)
+                if reviews is not None:
+                    metrics.inc("review_pages_total", source="selectors")
+                    return reviews
+            except Exception as e:
+                self.logger.warning(f"Selector extraction failed: {e}")
+
+        with metrics.span("agentql.reviews"):
+            data = await self._query_data(page, INDIVIDUAL_REVIEWS_QUERY, timeout=15000, scope=REVIEW_CARD_SELECTOR)
+        metrics.inc("review_pages_total", source="agentql")
+        return data.get("reviews", [])
+
+    async def _prefetch_reviews(self, page, collector: Optional[ReviewResponseCollector], first_page: int, count: int):
+        """Async counterpart of ``AgodaScraper._prefetch_reviews``."""
+        if not collector or self.prefetch_pages <= 1:
+            return None
+        args = collector.prefetch_args(list(range(first_page, first_page + count)), find_hotel_id(page.url))
+        if not args:
+            return None
+        await self.rate_limiter.acquire_async(cost=count)
+        try:
+            with metrics.span("reviews.prefetch"):
+                results = await page.evaluate(PREFETCH_REVIEWS_JS, args)
+        except Exception as e:
+            self.logger.warning(f"Review prefetch failed: {e}")
+            return None
+        finally:
+            collector.clear()
+
+        pages, exhausted, status = parse_prefetched(results)
+        if status in THROTTLE_STATUSES:
+            self.rate_limiter.on_throttle(f"HTTP {status}")
+        if not pages and not exhausted:
+            return None
+        if pages:
+            metrics.inc("review_pages_total", len(pages), source="prefetch")
+            self.logger.info(f"Prefetched review pages {first_page}-{first_page + len(pages) - 1} in one batch.")
+        return pages, exhausted
+
+    async def _scrape_hotel_page(self, page, url: str, max_reviews: int, stop_date: object, collector: Optional[ReviewResponseCollector] = None) -> Dict:
+        self.logger.info(f"Scraping hotel: {url}")
+        await self.navigate(url, page=page)
+
+        title = await page.title()
+        hotel_name = title.split(" - ")[0] if " - " in title else "Unknown Hotel"
+        self.logger.info(f"Hotel Name: {hotel_name}")
+
+        before = await self.waits.review_signature(page)
+        if await self._click_read_all_reviews(page):
+            await self.waits.for_review_list_change(page, "reviews.open", before, ceiling_ms=5000, collector=collector)
+
+        # Overall Stats
+        overall_stats = {}
+        try:
+            with metrics.span("agentql.overall_stats"):
+                overall_stats = await self._query_data(page, OVERALL_REVIEW_STATS_QUERY, timeout=10000)
+            self.logger.info(f"Overall Score: {overall_stats.get('overall_score', 'N/A')}")
+        except Exception as e:
+            self.logger.warning(f"Failed to get overall stats: {e}")
+
+        # Reviews
+        all_reviews = []
+        page_num = 1
+        stop_scraping = False
+        prefetched = []
+        can_prefetch = True
+        exhausted = False
+        wave = 2
+        dom_page = page_num
+
+        while len(all_reviews) < max_reviews and not stop_scraping:
+            self.logger.info(f"[{hotel_name}] Scraping reviews page {page_num}...")
+            try:
+                reviews = prefetched.pop(0) if prefetched else await self._extract_reviews(page, collector)
+
+                if not reviews:
+                    self.logger.info("No reviews found on this page.")
+                    break
+
+                # Check for stop date
+                valid_reviews, stop_scraping = split_at_stop_date(reviews, stop_date)
+                if stop_scraping:
+                    self.logger.info(f"Encountered review older than {stop_date}. Stopping scraper for this hotel.")
+
+                all_reviews.extend(valid_reviews)
+                self.logger.info(f"[{hotel_name}] Collected {len(valid_reviews)} new reviews. Total: {len(all_reviews)}/{max_reviews}")
+
+                if stop_scraping or len(all_reviews) >= max_reviews:
+                    break
+
+                if not prefetched and can_prefetch and not exhausted:
+                    pages_left = -(-(max_reviews - len(all_reviews)) // len(reviews))
+                    batch = await self._prefetch_reviews(page, collector, page_num + 1, min(wave, self.prefetch_pages, pages_left))
+                    wave *= 2
+                    if batch is None:
+                        can_prefetch = False
+                    else:
+                        prefetched, exhausted = batch
+                if not prefetched and exhausted:
+                    self.logger.info("No more review pages.")
+                    break
+                if prefetched:
+                    page_num += 1
+                    continue
+
+                while dom_page < page_num and await self._click_next_page(page, collector):
+                    dom_page += 1
+                if dom_page < page_num or not await self._click_next_page(page, collector):
+                    self.logger.info("No next page found.")
+                    break
+
+                page_num += 1
+                dom_page = page_num
+            except Exception as e:
+                self.logger.error(f"Error scraping reviews: {e}")
+                break
+
+        return {
+            "hotel_name": hotel_name,
+            "hotel_url": url,
+            "overall_statistics": overall_stats,
+            "total_reviews_scraped": len(all_reviews),
+            "reviews": all_reviews[:max_reviews]
+        }
+
+    async def _discover_hotels(self, search_url: str, max_hotels: int) -> List[Dict]:
+        """Open the search page and return the first ``max_hotels`` hotels."""
+        self.logger.info(f"Searching hotels at: {search_url}")
+        await self.navigate(search_url)
+
+        # Scroll to load
+        for _ in range(3):
+            await self.page.keyboard.press("PageDown")
+            await self.waits.for_stable_count(self.page, "search.scroll", HOTEL_CARD_SELECTOR, ceiling_ms=1000)
+
+        try:
+            data = await self._query_data(self.page, HOTEL_LIST_QUERY, timeout=15000, scope=HOTEL_CARD_SELECTOR)
+            hotels_list = data.get("hotels", [])
+            self.logger.info(f"Found {len(hotels_list)} hotels.")
+        except Exception as e:
+            self.logger.error(f"Failed to get hotel list: {e}")
+            return []
+
+        return [
+            {"hotel_name": h.get("hotel_name", "Unknown"), "hotel_link": normalize_hotel_url(h["hotel_link"])}
+            for h in hotels_list[:max_hotels] if h.get("hotel_link")
+        ]
+
+    async def scrape_multiple(self, search_url: str, max_hotels: int = 3, reviews_per_hotel: int = 20, stop_dates: Dict[str, object] = None, output_path: str = "agoda_reviews.json") -> List[Dict]:
+        """Scrape multiple hotels from search results concurrently."""
+        target_hotels = await self._discover_hotels(search_url, max_hotels)
+        sink = ResultSink(output_path, self.logger)
+        target_hotels = [h for h in target_hotels if h["hotel_link"] not in sink.completed_urls]
+        results: List[Optional[Dict]] = [None] * len(target_hotels)
+
+        async def run(i: int, hotel: Dict):
+            url = hotel["hotel_link"]
+            stop_date = resolve_stop_date(hotel["hotel_name"], stop_dates, url)
+            if stop_date:
+                self.logger.info(f"Incremental mode: Stopping at date {stop_date} for '{hotel['hotel_name']}'")
+            # Stagger hotel starts so slots do not hit Agoda at the same instant
+            await asyncio.sleep(POLITENESS_DELAY * (i % self.max_concurrent_hotels) / self.max_concurrent_hotels)
+            try:
+                results[i] = await self.scrape_hotel(url, max_reviews=reviews_per_hotel, stop_date=stop_date)
+                with metrics.span("sink.write"):
+                    sink.add(results[i])
+            except Exception as e:
+                self.logger.error(f"Failed to scrape hotel {url}: {e}")
+                metrics.inc("hotels_failed_total")
+
+        try:
+            await asyncio.gather(*(run(i, hotel) for i, hotel in enumerate(target_hotels)))
+        finally:
+            sink.close()
+        return [r for r in results if r]
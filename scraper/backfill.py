@@ -0,0 +1,276 @@
+"""
+Full-history backfill: every review of a hotel, fetched as concurrent page-range shards.
+
+    python scraper/main.py --backfill --mode single --single-url "https://www.agoda.com/..." --shards 6
+    python scraper/main.py --backfill --from-catalogue --max-hotels 50 --output data/backfill.jsonl
+
+The hotel page is opened once in the browser to bootstrap the review API
+request (cookies, payload); the shards then page through the review API over
+HTTP, sharing the domain's rate limiter. Every fetched page is checkpointed
+per shard, so a crash only repeats the page that was in flight; the hotel's
+name, stats and review total are stored with the plan, so a resumed backfill
+skips the stats query.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import STATE_DB_PATH, BACKFILL_SHARDS, BACKFILL_MIN_SHARD_PAGES, BACKFILL_OVERLAP_PAGES
+from utils import ResultSink, review_key, hotel_result, hotel_id_from_url
+from review_api import ReviewApiClient
+from scheduler import parse_review_total
+from metrics import metrics
+
+SHARD_PENDING = "pending"
+SHARD_DONE = "done"
+
+
+def plan_shards(total_pages: Optional[int], shards: int, min_pages: int = BACKFILL_MIN_SHARD_PAGES) -> List[Tuple[int, Optional[int]]]:
+    """Split pages 1..total_pages into (first_page, last_page) ranges.
+
+    Every shard reads ``BACKFILL_OVERLAP_PAGES`` past its range, so reviews
+    posted while the backfill runs, which push older reviews onto later
+    pages, are still reached. Without a known total there is a single
+    open-ended shard (``last_page`` None) that stops on an empty page.
+    """
+    if not total_pages:
+        return [(1, None)]
+    count = max(1, min(shards, total_pages // min_pages or 1))
+    size = math.ceil(total_pages / count)
+    ranges = []
+    for i in range(count):
+        first = i * size + 1
+        if first > total_pages:
+            break
+        ranges.append((first, min(first + size - 1, total_pages)))
+    return ranges
+
+
+def merge_pages(pages: List[List[Dict]]) -> Tuple[List[Dict], int]:
+    """Concatenate pages in order, dropping reviews repeated across shard boundaries."""
+    seen, merged, dropped = set(), [], 0
+    for reviews in pages:
+        for r in reviews:
+            key = review_key(r)
+            if key in seen:
+                dropped += 1
+                continue
+            seen.add(key)
+            merged.append(r)
+    return merged, dropped
+
+
+class BackfillStore:
+    """SQLite progress of sharded backfills: one row per hotel plan, per shard and per fetched page."""
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS backfill_hotels (
+                hotel_url TEXT PRIMARY KEY,
+                hotel_name TEXT,
+                overall_stats TEXT,
+                total_reviews INTEGER,
+                api_hotel_id TEXT,
+                created_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS backfill_shards (
+                hotel_url TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                first_page INTEGER NOT NULL,
+                last_page INTEGER,
+                next_page INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                updated_at TEXT,
+                PRIMARY KEY (hotel_url, shard)
+            );
+            CREATE TABLE IF NOT EXISTS backfill_pages (
+                hotel_url TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                page_num INTEGER NOT NULL,
+                reviews TEXT NOT NULL,
+                PRIMARY KEY (hotel_url, shard, page_num)
+            );
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(backfill_hotels)")}
+        if "api_hotel_id" not in columns:
+            self._conn.execute("ALTER TABLE backfill_hotels ADD COLUMN api_hotel_id TEXT")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def hotel(self, hotel_url: str) -> Optional[Dict]:
+        """Name, stats, review total and review API hotel ID recorded when the hotel's backfill was planned."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hotel_name, overall_stats, total_reviews, api_hotel_id FROM backfill_hotels WHERE hotel_url = ?",
+                (hotel_url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"hotel_name": row[0], "overall_stats": json.loads(row[1] or "{}"), "total_reviews": row[2],
+                "api_hotel_id": row[3]}
+
+    def save_hotel(self, hotel_url: str, hotel_name: str, overall_stats: Dict, total_reviews: Optional[int],
+                   api_hotel_id=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backfill_hotels "
+                "(hotel_url, hotel_name, overall_stats, total_reviews, api_hotel_id, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (hotel_url, hotel_name, json.dumps(overall_stats or {}, ensure_ascii=False, default=str),
+                 total_reviews, str(api_hotel_id) if api_hotel_id else None, datetime.now().isoformat())
+            )
+            self._conn.commit()
+
+    def shards(self, hotel_url: str, plan: List[Tuple[int, Optional[int]]]) -> List[Dict]:
+        """Shards of a hotel, creating them from ``plan`` on the first run."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shard, first_page, last_page, next_page, status FROM backfill_shards "
+                "WHERE hotel_url = ? ORDER BY shard", (hotel_url,)
+            ).fetchall()
+            if not rows:
+                now = datetime.now().isoformat()
+                rows = [(i, first, last, first, SHARD_PENDING) for i, (first, last) in enumerate(plan)]
+                self._conn.executemany(
+                    "INSERT INTO backfill_shards (hotel_url, shard, first_page, last_page, next_page, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", [(hotel_url, *row, now) for row in rows]
+                )
+                self._conn.commit()
+        return [{"shard": r[0], "first_page": r[1], "last_page": r[2], "next_page": r[3], "status": r[4]} for r in rows]
+
+    def save_page(self, hotel_url: str, shard: int, page_num: int, reviews: List[Dict]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backfill_pages (hotel_url, shard, page_num, reviews) VALUES (?, ?, ?, ?)",
+                (hotel_url, shard, page_num, json.dumps(reviews, ensure_ascii=False, default=str))
+            )
+            self._conn.execute(
+                "UPDATE backfill_shards SET next_page = ?, updated_at = ? WHERE hotel_url = ? AND shard = ?",
+                (page_num + 1, datetime.now().isoformat(), hotel_url, shard)
+            )
+            self._conn.commit()
+
+    def finish_shard(self, hotel_url: str, shard: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE backfill_shards SET status = ?, updated_at = ? WHERE hotel_url = ? AND shard = ?",
+                (SHARD_DONE, datetime.now().isoformat(), hotel_url, shard)
+            )
+            self._conn.commit()
+
+    def pages(self, hotel_url: str) -> List[List[Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT reviews FROM backfill_pages WHERE hotel_url = ? ORDER BY page_num, shard", (hotel_url,)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def clear(self, hotel_url: str):
+        """Forget a hotel once its merged result has been written."""
+        with self._lock:
+            self._conn.execute("DELETE FROM backfill_pages WHERE hotel_url = ?", (hotel_url,))
+            self._conn.execute("DELETE FROM backfill_shards WHERE hotel_url = ?", (hotel_url,))
+            self._conn.execute("DELETE FROM backfill_hotels WHERE hotel_url = ?", (hotel_url,))
+            self._conn.commit()
+
+
+class HotelBackfill:
+    """Fetch every review page of one hotel as concurrent shards."""
+
+    def __init__(self, scraper, store: BackfillStore, shards: int = BACKFILL_SHARDS, **client_kwargs):
+        self.scraper = scraper
+        self.store = store
+        self.shards = max(1, shards)
+        self.client_kwargs = client_kwargs
+        self.logger = scraper.logger
+
+    def _run_shard(self, client: ReviewApiClient, url: str, shard: Dict, total_pages: Optional[int]):
+        page_num = shard["next_page"]
+        # Read past the range: reviews posted mid-run push older ones onto the next shard's pages.
+        # Open-ended shards of older plans are bounded by the planned total.
+        last_page = shard["last_page"] or total_pages
+        last = last_page + BACKFILL_OVERLAP_PAGES if last_page else None
+        while last is None or page_num <= last:
+            reviews = client.fetch_page(page_num)
+            if not reviews:
+                break
+            self.store.save_page(url, shard["shard"], page_num, reviews)
+            page_num += 1
+        self.store.finish_shard(url, shard["shard"])
+        self.logger.info(f"[shard {shard['shard']}] Pages {shard['first_page']}-{page_num - 1} done.")
+
+    def _check_hotel_id(self, client: ReviewApiClient, url: str, planned: Optional[Dict]):
+        """Refuse to page through another hotel's reviews, which merge_pages could not tell apart."""
+        expected = hotel_id_from_url(url)
+        if not (expected and expected.isdigit()):
+            expected = planned and planned.get("api_hotel_id")
+        if expected and str(client.hotel_id) != str(expected):
+            raise ValueError(f"Review API is set up for hotel {client.hotel_id}, expected {expected} for {url}")
+
+    def run(self, url: str) -> Dict:
+        planned = self.store.hotel(url)
+        if planned:
+            # Resuming: the page is only opened to bootstrap the API, the stats are stored
+            self.scraper.open_hotel(url, with_stats=False)
+            hotel_name, overall_stats, total = planned["hotel_name"], planned["overall_stats"], planned["total_reviews"]
+        else:
+            hotel_name, overall_stats = self.scraper.open_hotel(url)
+            total = parse_review_total((overall_stats or {}).get("total_reviews"))
+        client = ReviewApiClient.from_scraper(self.scraper, concurrency=self.shards, **self.client_kwargs)
+        try:
+            self._check_hotel_id(client, url, planned)
+            if not planned:
+                self.store.save_hotel(url, hotel_name, overall_stats, total, client.hotel_id)
+            total_pages = math.ceil(total / client.page_size) if total else None
+            shards = self.store.shards(url, plan_shards(total_pages, self.shards))
+            pending = [s for s in shards if s["status"] != SHARD_DONE]
+            self.logger.info(
+                f"Backfill '{hotel_name}': {total or 'unknown'} reviews, {len(shards)} shards "
+                f"({len(shards) - len(pending)} already done)."
+            )
+            with metrics.span("backfill.hotel"), ThreadPoolExecutor(max_workers=len(pending) or 1) as executor:
+                futures = [executor.submit(self._run_shard, client, url, s, total_pages) for s in pending]
+                errors = [f.exception() for f in futures if f.exception()]
+        finally:
+            client.close()
+        if errors:
+            raise RuntimeError(f"{len(errors)} backfill shards failed (progress kept for resume): {errors[0]}")
+
+        reviews, dropped = merge_pages(self.store.pages(url))
+        self.logger.info(f"Backfill '{hotel_name}': {len(reviews)} reviews ({dropped} boundary duplicates dropped).")
+        if self.scraper.index:
+            self.scraper.index.add(hotel_id_from_url(url), reviews)
+        metrics.inc("hotels_total")
+        metrics.inc("reviews_total", len(reviews))
+        return hotel_result(hotel_name, url, overall_stats, reviews, len(reviews))
+
+
+def run_backfill(scraper, hotels: List[Dict], output_path: str, store: BackfillStore,
+                 shards: int = BACKFILL_SHARDS, **client_kwargs) -> List[Dict]:
+    """Backfill hotels one after another; hotels already in a .jsonl output are skipped."""
+    backfill = HotelBackfill(scraper, store, shards, **client_kwargs)
+    sink = ResultSink(output_path, scraper.logger)
+    try:
+        for i, hotel in enumerate(h for h in hotels if h["hotel_link"] not in sink.completed_urls):
+            url = hotel["hotel_link"]
+            scraper.logger.info(f"Backfilling hotel {i + 1}: {url}")
+            try:
+                sink.add(backfill.run(url))
+                store.clear(url)
+            except Exception as e:
+                scraper.logger.error(f"Backfill of {url} failed: {e}")
+                metrics.inc("hotels_failed_total")
+    finally:
+        sink.close()
+    return sink.results
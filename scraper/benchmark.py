@@ -0,0 +1,559 @@
+"""
+Offline benchmark suite for the scraper engines.
+
+Runs ``AgodaScraper`` (sequential and parallel) and ``AsyncAgodaScraper``
+against a local synthetic Agoda site, or against recorded pages replayed
+from a Playwright HAR, with AgentQL replaced by a stub that answers from the
+DOM after a configurable latency. Nothing touches live Agoda or AgentQL:
+
+    python scraper/benchmark.py run --modes sequential parallel async --hotels 6 --reviews 40
+    python scraper/benchmark.py record --search-url "https://www.agoda.com/city/da-nang-vn.html" --har data/fixtures/agoda.har
+    python scraper/benchmark.py run --har data/fixtures/agoda.har --search-url "https://www.agoda.com/city/da-nang-vn.html"
+
+Reports hotels/min, review pages/min, per-step latency percentiles and peak
+memory per mode. ``--baseline`` compares against an earlier report and exits
+non-zero on a throughput regression, for CI.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import resource
+import threading
+from collections import defaultdict
+from http.server import ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+from config import (
+    HOTEL_LIST_QUERY,
+    OVERALL_REVIEW_STATS_QUERY,
+    INDIVIDUAL_REVIEWS_QUERY,
+    HOTEL_CARD_SELECTOR,
+    REVIEW_API_PAGE_SIZE,
+    REVIEW_PREFETCH_PAGES
+)
+from replay_server import ReplayHandler
+from discovery import HOTEL_CARDS_JS
+from rate_limiter import AdaptiveRateLimiter
+from utils import setup_logging
+
+BENCH_HOTELS_PER_PAGE = 10
+
+REVIEW_CARDS_JS = """
+    () => Array.from(document.querySelectorAll("[data-review-id]")).map(el => ({
+        reviewer_name: el.dataset.name || null,
+        reviewer_country: el.dataset.country || null,
+        reviewer_score: el.dataset.score || null,
+        review_title: el.dataset.title || null,
+        review_text: el.dataset.text || el.innerText,
+        review_date: el.dataset.date || null
+    }))
+"""
+
+SEARCH_PAGE_HTML = """<!DOCTYPE html>
+<html><head><title>Bench City Hotels</title></head><body>
+<ol>__CARDS__</ol>
+__NEXT__
+</body></html>"""
+
+HOTEL_CARD_HTML = """
+<li data-selenium="hotel-item" data-hotelid="__ID__">
+  <a href="__BASE__/bench-hotel-__ID__/hotel/bench-city.html"><h3 data-selenium="hotel-name">Bench Hotel __ID__</h3></a>
+  <span data-selenium="review-count">__TOTAL__ reviews</span>
+</li>"""
+
+HOTEL_PAGE_HTML = """<!DOCTYPE html>
+<html><head><title>Bench Hotel __ID__ - Agoda</title></head><body>
+<script>window.propertyData = {"hotelId": __ID__};</script>
+<h1>Bench Hotel __ID__</h1>
+<span label="Read all reviews" onclick="openReviews()">Read all reviews</span>
+<div id="reviews"></div>
+<button aria-label="Next reviews page" onclick="nextPage()">Next</button>
+<script>
+let page = 1;
+async function load() {
+    const r = await fetch("/api/cronos/property/review/ReviewComments", {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify({hotelId: __ID__, page: page, pageSize: __PAGE_SIZE__})
+    });
+    const d = await r.json();
+    const box = document.getElementById("reviews");
+    box.innerHTML = "";
+    for (const c of d.commentList.comments) {
+        const el = document.createElement("div");
+        el.className = "Review-comment";
+        el.setAttribute("data-review-id", c.hotelReviewId);
+        el.dataset.name = c.reviewerInfo.displayMemberName;
+        el.dataset.country = c.reviewerInfo.countryName;
+        el.dataset.score = c.rating;
+        el.dataset.scoreText = c.ratingText;
+        el.dataset.title = c.reviewTitle;
+        el.dataset.text = c.reviewComments;
+        el.dataset.date = c.reviewDate.slice(0, 10);
+        el.innerText = c.reviewTitle + " - " + c.reviewComments;
+        box.appendChild(el);
+    }
+}
+function openReviews() { page = 1; load(); }
+function nextPage() { page += 1; load(); }
+</script>
+</body></html>"""
+
+
+class BenchSiteHandler(ReplayHandler):
+    """Synthetic search/hotel pages on top of the review API stub."""
+
+    hotels = 6
+    page_latency = 0.0
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        base = f"http://{self.headers.get('Host')}"
+        if self.page_latency:
+            time.sleep(self.page_latency)
+
+        if parsed.path.startswith("/city/"):
+            page_num = int(parse_qs(parsed.query).get("page", ["1"])[0])
+            first = (page_num - 1) * BENCH_HOTELS_PER_PAGE + 1
+            last = min(self.hotels, page_num * BENCH_HOTELS_PER_PAGE)
+            cards = "".join(
+                HOTEL_CARD_HTML.replace("__ID__", str(i)).replace("__BASE__", base)
+                .replace("__TOTAL__", str(self.synthetic_total))
+                for i in range(first, last + 1)
+            )
+            next_button = ""
+            if last < self.hotels:
+                next_button = (f'<button id="paginationNext" '
+                               f'onclick="location.href=\'{parsed.path}?page={page_num + 1}\'">Next</button>')
+            self._send_html(SEARCH_PAGE_HTML.replace("__CARDS__", cards).replace("__NEXT__", next_button))
+        elif "/hotel/" in parsed.path:
+            hotel_id = parsed.path.strip("/").split("/")[0].rsplit("-", 1)[-1]
+            if not hotel_id.isdigit():
+                self.send_error(404)
+                return
+            self._send_html(HOTEL_PAGE_HTML.replace("__ID__", hotel_id)
+                            .replace("__PAGE_SIZE__", str(REVIEW_API_PAGE_SIZE)))
+        else:
+            self._send_html("<!DOCTYPE html><html><head><title>Bench</title></head><body></body></html>")
+
+    def _send_html(self, html: str):
+        data = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_site(port: int = 0, hotels: int = 6, reviews_per_hotel: int = 200,
+               api_latency: float = 0.0, page_latency: float = 0.0):
+    """Start the synthetic site in a background thread; returns (server, search_url)."""
+    handler = type("ConfiguredBenchSiteHandler", (BenchSiteHandler,), {
+        "hotels": hotels,
+        "synthetic_total": reviews_per_hotel,
+        "latency": api_latency,
+        "page_latency": page_latency
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/city/bench-city.html"
+
+
+class BenchRecorder:
+    """Step timings, review page counts and memory shared by every scraper of a run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.review_pages = 0
+
+    def record(self, name: str, ms: float):
+        with self._lock:
+            self.timings[name].append(ms)
+
+    def count_page(self):
+        with self._lock:
+            self.review_pages += 1
+
+    def merge(self, waits):
+        with self._lock:
+            for name, values in waits.timings.items():
+                self.timings[name].extend(values)
+
+    def percentiles(self) -> Dict[str, Dict]:
+        out = {}
+        for name, values in sorted(self.timings.items()):
+            ordered = sorted(values)
+            pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+            out[name] = {"count": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1], 1)}
+        return out
+
+
+class MemorySampler(threading.Thread):
+    """Peak RSS of this process plus its browser children (needs psutil for the children)."""
+
+    def __init__(self, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_bytes = 0
+        self.stopped = threading.Event()
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def _sample(self) -> int:
+        if self._process is None:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        total = 0
+        for proc in [self._process] + self._process.children(recursive=True):
+            try:
+                total += proc.memory_info().rss
+            except Exception:
+                continue
+        return total
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self._sample())
+
+    def stop(self) -> float:
+        self.stopped.set()
+        self.peak_bytes = max(self.peak_bytes, self._sample())
+        return round(self.peak_bytes / 1e6, 1)
+
+
+class StubAgentQL:
+    """Stand-in for AgentQL's ``query_data``: answers from the DOM after ``latency`` seconds."""
+
+    def __init__(self, recorder: BenchRecorder, latency: float = 0.5, canned: Dict = None):
+        self.recorder = recorder
+        self.latency = latency
+        self.canned = canned or {}
+
+    @staticmethod
+    def _kind(query: str) -> str:
+        if query == HOTEL_LIST_QUERY:
+            return "hotels"
+        if query == OVERALL_REVIEW_STATS_QUERY:
+            return "overall"
+        if query == INDIVIDUAL_REVIEWS_QUERY:
+            return "reviews"
+        return "other"
+
+    def _canned_overall(self) -> Dict:
+        return self.canned.get("overall") or {
+            "overall_score": "8.6",
+            "overall_rating_text": "Excellent",
+            "total_reviews": "1,234",
+            "recent_ratings": [{"rating_value": "9.0"}, {"rating_value": "8.0"}],
+            "review_categories": [{"category_name": name, "category_score": score} for name, score in
+                                  (("Cleanliness", "8.8"), ("Facilities", "8.4"), ("Location", "9.1"),
+                                   ("Service", "8.7"), ("Value for money", "8.9"))]
+        }
+
+    def answer(self, kind: str, evaluate) -> Dict:
+        if kind == "hotels":
+            if "hotels" in self.canned:
+                return {"hotels": self.canned["hotels"]}
+            cards = evaluate(HOTEL_CARDS_JS, HOTEL_CARD_SELECTOR) or []
+            return {"hotels": [{"hotel_name": c["hotel_name"], "hotel_link": c["hotel_link"]} for c in cards if c.get("hotel_link")]}
+        if kind == "overall":
+            return self._canned_overall()
+        if kind == "reviews":
+            return {"reviews": evaluate(REVIEW_CARDS_JS) or []}
+        return {}
+
+    def wrap(self, page):
+        return _StubPage(page, self)
+
+    async def wrap_async(self, page):
+        return _AsyncStubPage(page, self)
+
+
+class _StubPage:
+    def __init__(self, page, stub: StubAgentQL):
+        self._page = page
+        self._stub = stub
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    def query_data(self, query: str, timeout: int = None, **kwargs) -> Dict:
+        kind = self._stub._kind(query)
+        started = time.perf_counter()
+        time.sleep(self._stub.latency)
+        result = self._stub.answer(kind, lambda js, *args: self._page.evaluate(js, *args))
+        self._stub.recorder.record(f"agentql.{kind}", (time.perf_counter() - started) * 1000)
+        return result
+
+
+class _AsyncStubPage:
+    def __init__(self, page, stub: StubAgentQL):
+        self._page = page
+        self._stub = stub
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    async def query_data(self, query: str, timeout: int = None, **kwargs) -> Dict:
+        kind = self._stub._kind(query)
+        started = time.perf_counter()
+        await asyncio.sleep(self._stub.latency)
+        if kind in ("hotels", "reviews") and not (kind == "hotels" and "hotels" in self._stub.canned):
+            js = HOTEL_CARDS_JS if kind == "hotels" else REVIEW_CARDS_JS
+            args = (HOTEL_CARD_SELECTOR,) if kind == "hotels" else ()
+            evaluated = await self._page.evaluate(js, *args)
+            result = self._stub.answer(kind, lambda *_: evaluated)
+        else:
+            result = self._stub.answer(kind, None)
+        self._stub.recorder.record(f"agentql.{kind}", (time.perf_counter() - started) * 1000)
+        return result
+
+
+def install_stub(stub: StubAgentQL):
+    """Point both engines' AgentQL ``wrap`` at the stub."""
+    import scraper as sync_module
+    import async_scraper as async_module
+    sync_module.wrap = stub.wrap
+    async_module.wrap_async = stub.wrap_async
+
+
+def bench_scraper_class(recorder: BenchRecorder, har_path: str = None):
+    """``AgodaScraper`` subclass that replays a HAR and reports into ``recorder``."""
+    from scraper import AgodaScraper
+
+    class BenchScraper(AgodaScraper):
+        def _new_context(self):
+            super()._new_context()
+            if har_path:
+                self.context.route_from_har(har_path, not_found="abort")
+
+        def _extract_reviews(self):
+            recorder.count_page()
+            return super()._extract_reviews()
+
+        def _prefetch_reviews(self, first_page, count):
+            batch = super()._prefetch_reviews(first_page, count)
+            for _ in (batch[0] if batch else []):
+                recorder.count_page()
+            return batch
+
+        def close(self):
+            recorder.merge(self.waits)
+            super().close()
+
+    return BenchScraper
+
+
+def bench_async_scraper_class(recorder: BenchRecorder, har_path: str = None):
+    """``AsyncAgodaScraper`` counterpart of ``bench_scraper_class``."""
+    from async_scraper import AsyncAgodaScraper
+
+    class BenchAsyncScraper(AsyncAgodaScraper):
+        async def _new_page(self):
+            context, page = await super()._new_page()
+            if har_path:
+                await context.route_from_har(har_path, not_found="abort")
+            return context, page
+
+        async def _extract_reviews(self, page, collector):
+            recorder.count_page()
+            return await super()._extract_reviews(page, collector)
+
+        async def _prefetch_reviews(self, page, collector, first_page, count):
+            batch = await super()._prefetch_reviews(page, collector, first_page, count)
+            for _ in (batch[0] if batch else []):
+                recorder.count_page()
+            return batch
+
+        async def close(self):
+            recorder.merge(self.waits)
+            await super().close()
+
+    return BenchAsyncScraper
+
+
+def _fast_limiter() -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter("bench", rate=1000, max_rate=1000, burst=1000)
+
+
+def run_mode(mode: str, args, search_url: str, stub_latency: float, canned: Dict, logger: logging.Logger) -> Dict:
+    """Scrape the benchmark site once in ``mode`` and return its report."""
+    recorder = BenchRecorder()
+    install_stub(StubAgentQL(recorder, stub_latency, canned))
+    output = os.path.join(tempfile.mkdtemp(prefix="agoda_bench_"), f"{mode}.jsonl")
+    kwargs = {"headless": True, "logger": logger, "block_resources": args.block_resources, "rate_limiter": _fast_limiter(),
+              "intercept_reviews": not args.no_intercept, "fast_extract": not args.no_fast_extract,
+              "prefetch_pages": args.prefetch_pages}
+
+    memory = MemorySampler()
+    memory.start()
+    started = time.perf_counter()
+    if mode == "async":
+        async def run():
+            scraper = bench_async_scraper_class(recorder, args.har)(max_concurrent_hotels=args.workers, **kwargs)
+            try:
+                await scraper.start()
+                return await scraper.scrape_multiple(search_url, max_hotels=args.hotels,
+                                                     reviews_per_hotel=args.reviews, output_path=output)
+            finally:
+                await scraper.close()
+        results = asyncio.run(run())
+    else:
+        scraper = bench_scraper_class(recorder, args.har)(**kwargs)
+        try:
+            scraper.start()
+            results = scraper.scrape_multiple(search_url, max_hotels=args.hotels, reviews_per_hotel=args.reviews,
+                                              output_path=output, workers=args.workers if mode == "parallel" else 1)
+        finally:
+            scraper.close()
+    elapsed = time.perf_counter() - started
+    peak_mb = memory.stop()
+
+    minutes = elapsed / 60
+    return {
+        "mode": mode,
+        "hotels": len(results),
+        "reviews": sum(r.get("total_reviews_scraped", 0) for r in results),
+        "review_pages": recorder.review_pages,
+        "seconds": round(elapsed, 1),
+        "hotels_per_min": round(len(results) / minutes, 2) if minutes else 0,
+        "pages_per_min": round(recorder.review_pages / minutes, 2) if minutes else 0,
+        "peak_memory_mb": peak_mb,
+        "steps": recorder.percentiles()
+    }
+
+
+def print_report(reports: List[Dict]):
+    print(f"\n{'mode':<12}{'hotels':>8}{'pages':>8}{'secs':>9}{'hotels/min':>12}{'pages/min':>11}{'peak MB':>10}")
+    for r in reports:
+        print(f"{r['mode']:<12}{r['hotels']:>8}{r['review_pages']:>8}{r['seconds']:>9}"
+              f"{r['hotels_per_min']:>12}{r['pages_per_min']:>11}{r['peak_memory_mb']:>10}")
+    for r in reports:
+        print(f"\n[{r['mode']}] step latency (ms)")
+        for name, s in sorted(r["steps"].items(), key=lambda kv: -kv[1]["p95_ms"]):
+            print(f"  {name:<28} n={s['count']:<5} p50={s['p50_ms']:<9} p95={s['p95_ms']:<9} max={s['max_ms']}")
+
+
+def compare_to_baseline(reports: List[Dict], baseline_path: str, max_regression: float) -> List[str]:
+    """Modes whose hotels/min dropped more than ``max_regression`` below the baseline."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["mode"]: r for r in json.load(f)["modes"]}
+    regressions = []
+    for r in reports:
+        base = baseline.get(r["mode"])
+        if base and base["hotels_per_min"] and r["hotels_per_min"] < base["hotels_per_min"] * (1 - max_regression):
+            regressions.append(f"{r['mode']}: {r['hotels_per_min']} hotels/min vs baseline {base['hotels_per_min']}")
+    return regressions
+
+
+def record_har(search_url: str, har_path: str, hotels: int, review_pages: int, headless: bool = True):
+    """Record a search page, its first hotels and their review pages into a HAR file."""
+    from playwright.sync_api import sync_playwright
+    from config import DEFAULT_VIEWPORT, DEFAULT_USER_AGENT
+    from utils import normalize_hotel_url
+
+    os.makedirs(os.path.dirname(har_path) or ".", exist_ok=True)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        context = browser.new_context(viewport=DEFAULT_VIEWPORT, user_agent=DEFAULT_USER_AGENT,
+                                      record_har_path=har_path, record_har_content="embed")
+        page = context.new_page()
+        page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
+        page.wait_for_load_state("load")
+        cards = page.evaluate(HOTEL_CARDS_JS, HOTEL_CARD_SELECTOR) or []
+        links = [normalize_hotel_url(c["hotel_link"]) for c in cards if c.get("hotel_link")][:hotels]
+        for link in links:
+            page.goto(link, wait_until="domcontentloaded", timeout=60000)
+            page.wait_for_load_state("load")
+            try:
+                page.locator("span[label='Read all reviews']").click(force=True, timeout=5000)
+                page.wait_for_timeout(2000)
+                for _ in range(review_pages - 1):
+                    page.locator("button[aria-label='Next reviews page']").first.click(force=True, timeout=5000)
+                    page.wait_for_timeout(2000)
+            except Exception as e:
+                print(f"Review pages not fully recorded for {link}: {e}")
+        context.close()
+        browser.close()
+    print(f"Recorded {len(links)} hotels into {har_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the Agoda scraper")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Benchmark the engines against the synthetic site or a HAR")
+    run_parser.add_argument("--modes", nargs="+", choices=["sequential", "parallel", "async"],
+                            default=["sequential", "parallel", "async"])
+    run_parser.add_argument("--hotels", type=int, default=6)
+    run_parser.add_argument("--reviews", type=int, default=40, help="Reviews per hotel")
+    run_parser.add_argument("--workers", type=int, default=3, help="Workers (parallel) / hotels in flight (async)")
+    run_parser.add_argument("--agentql-latency", type=float, default=0.5, help="Seconds per stubbed query_data call")
+    run_parser.add_argument("--api-latency", type=float, default=0.05, help="Seconds per review API response")
+    run_parser.add_argument("--page-latency", type=float, default=0.05, help="Seconds per synthetic HTML page")
+    run_parser.add_argument("--canned", type=str, help="JSON file with canned 'hotels'/'overall' AgentQL answers")
+    run_parser.add_argument("--har", type=str, help="Replay recorded pages from this HAR instead of the synthetic site")
+    run_parser.add_argument("--search-url", type=str, help="Search URL inside the HAR")
+    run_parser.add_argument("--block-resources", action="store_true")
+    run_parser.add_argument("--no-intercept", action="store_true", help="Extract from the DOM instead of captured review API responses")
+    run_parser.add_argument("--prefetch-pages", type=int, default=REVIEW_PREFETCH_PAGES, help="Review pages per in-page batch (1 = click through pages)")
+    run_parser.add_argument("--no-fast-extract", action="store_true", help="Send every DOM extraction to the (stubbed) AgentQL")
+    run_parser.add_argument("--output", type=str, default="data/benchmark.json")
+    run_parser.add_argument("--baseline", type=str, help="Earlier report to compare hotels/min against")
+    run_parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed hotels/min drop vs the baseline")
+
+    record_parser = sub.add_parser("record", help="Record live pages into a HAR file")
+    record_parser.add_argument("--search-url", type=str, required=True)
+    record_parser.add_argument("--har", type=str, default="data/fixtures/agoda.har")
+    record_parser.add_argument("--hotels", type=int, default=3)
+    record_parser.add_argument("--review-pages", type=int, default=2)
+    record_parser.add_argument("--headed", action="store_true")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_har(args.search_url, args.har, args.hotels, args.review_pages, headless=not args.headed)
+        sys.exit(0)
+
+    logger = setup_logging("benchmark.log")
+    canned = {}
+    if args.canned:
+        with open(args.canned, "r", encoding="utf-8") as f:
+            canned = json.load(f)
+
+    server = None
+    if args.har:
+        if not args.search_url:
+            parser.error("--har requires --search-url")
+        search_url = args.search_url
+    else:
+        server, search_url = start_site(hotels=args.hotels, api_latency=args.api_latency,
+                                        page_latency=args.page_latency)
+
+    try:
+        reports = [run_mode(mode, args, search_url, args.agentql_latency, canned, logger) for mode in args.modes]
+    finally:
+        if server:
+            server.shutdown()
+
+    print_report(reports)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": vars(args), "modes": reports}, f, indent=2)
+    print(f"\nReport saved to {args.output}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(reports, args.baseline, args.max_regression)
+        if regressions:
+            print("Throughput regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
@@ -0,0 +1,153 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from config import STATE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+class CheckpointStore:
+    """SQLite record of per-hotel scrape progress, keyed by hotel URL and review page.
+
+    Every scraped review page is stored as it completes, so an interrupted run
+    can skip finished hotels and continue a partial hotel from its last page
+    without repeating AgentQL calls. Progress belongs to ``run_id``: opening
+    the store for a different run drops what earlier runs left behind, so a
+    nightly run scrapes hotels afresh instead of re-emitting old results.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH, run_id: str = None):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hotel_progress (
+                hotel_url TEXT PRIMARY KEY,
+                hotel_name TEXT,
+                status TEXT NOT NULL,
+                run_id TEXT,
+                last_page INTEGER DEFAULT 0,
+                last_review_key TEXT,
+                overall_statistics TEXT,
+                error TEXT,
+                updated_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS review_pages (
+                hotel_url TEXT NOT NULL,
+                page_num INTEGER NOT NULL,
+                reviews TEXT NOT NULL,
+                PRIMARY KEY (hotel_url, page_num)
+            );
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(hotel_progress)")}
+        if "run_id" not in columns:
+            self._conn.execute("ALTER TABLE hotel_progress ADD COLUMN run_id TEXT")
+        if run_id is not None:
+            self._expire_other_runs()
+        self._conn.commit()
+
+    def _expire_other_runs(self):
+        stale = "SELECT hotel_url FROM hotel_progress WHERE run_id IS NOT ?"
+        self._conn.execute(f"DELETE FROM review_pages WHERE hotel_url IN ({stale})", (self.run_id,))
+        dropped = self._conn.execute("DELETE FROM hotel_progress WHERE run_id IS NOT ?", (self.run_id,)).rowcount
+        if dropped:
+            logger.info(f"Checkpoint: dropped {dropped} hotels left by runs other than {self.run_id}.")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, hotel_url: str) -> Optional[Dict]:
+        """Progress row for a hotel plus the reviews collected so far."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hotel_name, status, last_page, last_review_key, overall_statistics "
+                "FROM hotel_progress WHERE hotel_url = ?", (hotel_url,)
+            ).fetchone()
+            if not row:
+                return None
+            pages = self._conn.execute(
+                "SELECT reviews FROM review_pages WHERE hotel_url = ? ORDER BY page_num", (hotel_url,)
+            ).fetchall()
+
+        reviews = []
+        for (page_reviews,) in pages:
+            reviews.extend(json.loads(page_reviews))
+        return {
+            "hotel_url": hotel_url,
+            "hotel_name": row[0],
+            "status": row[1],
+            "last_page": row[2],
+            "last_review_key": row[3],
+            "overall_statistics": json.loads(row[4]) if row[4] else {},
+            "reviews": reviews
+        }
+
+    def start_hotel(self, hotel_url: str, hotel_name: str, overall_stats: Dict):
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO hotel_progress (hotel_url, hotel_name, status, run_id, overall_statistics, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (hotel_url) DO UPDATE SET
+                    hotel_name = excluded.hotel_name,
+                    status = excluded.status,
+                    run_id = excluded.run_id,
+                    overall_statistics = excluded.overall_statistics,
+                    error = NULL,
+                    updated_at = excluded.updated_at
+            """, (hotel_url, hotel_name, STATUS_IN_PROGRESS, self.run_id, json.dumps(overall_stats, ensure_ascii=False),
+                  datetime.now().isoformat()))
+            self._conn.commit()
+
+    def save_page(self, hotel_url: str, page_num: int, reviews: List[Dict], last_review_key: str = None):
+        """Store one review page and advance the hotel's resume point."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO review_pages (hotel_url, page_num, reviews) VALUES (?, ?, ?)",
+                (hotel_url, page_num, json.dumps(reviews, ensure_ascii=False, default=str))
+            )
+            self._conn.execute(
+                "UPDATE hotel_progress SET last_page = ?, last_review_key = COALESCE(?, last_review_key), updated_at = ? "
+                "WHERE hotel_url = ?",
+                (page_num, last_review_key, datetime.now().isoformat(), hotel_url)
+            )
+            self._conn.commit()
+
+    def _set_status(self, hotel_url: str, status: str, error: str = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE hotel_progress SET status = ?, error = ?, updated_at = ? WHERE hotel_url = ?",
+                (status, error, datetime.now().isoformat(), hotel_url)
+            )
+            self._conn.commit()
+
+    def complete(self, hotel_url: str):
+        self._set_status(hotel_url, STATUS_COMPLETED)
+
+    def fail(self, hotel_url: str, error: str):
+        self._set_status(hotel_url, STATUS_FAILED, error)
+
+    def completed_urls(self) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hotel_url FROM hotel_progress WHERE status = ?", (STATUS_COMPLETED,)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def reset(self):
+        """Forget all progress (start the next run from scratch)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM review_pages")
+            self._conn.execute("DELETE FROM hotel_progress")
+            self._conn.commit()
@@ -8,10 +8,165 @@ load_dotenv()
 AGENTQL_API_KEY = os.getenv("AGENTQL_API_KEY")
 
 # Default Configuration
+AGODA_HOME_URL = "https://www.agoda.com/"
 DEFAULT_TIMEOUT = 30000
 DEFAULT_WAIT_TIMEOUT = 2000
 DEFAULT_VIEWPORT = {'width': 1920, 'height': 1080}
 DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+LIGHT_VIEWPORT = {'width': 1280, 'height': 720}
+
+# Resource blocking (lightweight page profile)
+BLOCK_RESOURCES = False
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+BLOCKED_URL_PATTERNS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "connect.facebook.net",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "criteo.",
+    "taboola.com",
+    "tiktok.com/i18n/pixel",
+    "analytics.",
+)
+# Rough average transfer size per blocked request, used for the savings report
+BLOCKED_BYTES_ESTIMATE = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 50_000,
+    "other": 5_000,
+}
+
+# Event-driven waits (old fixed delays are kept as ceilings)
+WAIT_POLL_MS = 100
+REVIEW_CARD_SELECTOR = "[data-review-id], .Review-comment"
+HOTEL_CARD_SELECTOR = "[data-selenium='hotel-item'], li[data-hotelid]"
+BACKDROP_SELECTOR = "[data-selenium='backdrop']"
+
+# Selector fast path for INDIVIDUAL_REVIEWS_QUERY (AgentQL is the fallback).
+# Selectors are tried in order inside each review card; "@attr" reads an attribute of the card.
+FAST_EXTRACT = True
+FAST_EXTRACT_MIN_COVERAGE = 0.9  # share of cards that must have every required field
+REVIEW_FIELD_SELECTORS = {
+    "reviewer_score": [".Review-comment-leftScore", "[data-testid='review-score']", "@data-score"],
+    "reviewer_score_text": [".Review-comment-leftScoreText", "[data-testid='review-score-text']", "@data-score-text"],
+    "reviewer_name": ["[data-info-type='reviewer-name'] strong", "[data-info-type='reviewer-name']", "@data-name"],
+    "reviewer_country": ["[data-info-type='reviewer-name'] span", "[data-info-type='reviewer-country']", "@data-country"],
+    "traveler_type": ["[data-info-type='group-name']", "@data-traveler-type"],
+    "room_type": ["[data-info-type='room-type']", "@data-room-type"],
+    "stay_duration": ["[data-info-type='stay-detail']", "@data-stay"],
+    "review_title": ["[data-testid='review-title']", ".Review-comment-bodyTitle", "@data-title"],
+    "review_text": ["[data-testid='review-comment']", ".Review-comment-bodyText", "@data-text"],
+    "review_date": [".Review-statusBar-date", "[data-testid='review-date']", "@data-date"],
+}
+
+# Adaptive rate limiting (AIMD token bucket per domain)
+RATE_LIMIT_START_RPS = 1.0
+RATE_LIMIT_MIN_RPS = 0.1
+RATE_LIMIT_MAX_RPS = 5.0
+RATE_LIMIT_BURST = 4  # requests allowed back to back
+RATE_LIMIT_INCREASE = 0.05  # req/s added per success
+RATE_LIMIT_DECREASE = 0.5  # rate factor on 429/403/captcha
+RATE_LIMIT_SOFT_DECREASE = 0.8  # rate factor on backdrops and latency spikes
+RATE_LIMIT_LATENCY_SPIKE = 3.0  # latency above this multiple of the average is a spike
+RATE_LIMIT_COOLDOWN_BASE = 5  # seconds, doubled per consecutive hard throttle
+RATE_LIMIT_COOLDOWN_MAX = 300
+THROTTLE_STATUSES = (429, 403)
+THROTTLE_RESOURCE_TYPES = ("document", "xhr", "fetch")  # a 403 on an image or tracker is not throttling
+CAPTCHA_SELECTOR = "iframe[src*='captcha'], #px-captcha, [class*='captcha' i]"
+RETRY_BACKOFF_BASE = 2  # seconds, jittered exponential backoff between navigation retries
+RETRY_BACKOFF_MAX = 60
+
+# Local scraper state (checkpoints, incremental index, hotel catalogue)
+STATE_DB_PATH = os.getenv("SCRAPER_STATE_DB", "data/scraper_state.sqlite")
+INDEX_KEEP_PER_HOTEL = 500  # newest review fingerprints kept per hotel
+
+# AgentQL answer cache (keyed by query + hash of the DOM it reads)
+QUERY_CACHE_PATH = os.getenv("SCRAPER_QUERY_CACHE", "data/agentql_cache.sqlite")
+QUERY_CACHE_TTL_HOURS = 168
+QUERY_CACHE_MAX_MB = 64
+
+# Hotel discovery (search results crawler)
+SEARCH_API_PATTERNS = (
+    "/graphql/search",
+    "/api/cronos/search",
+)
+NEXT_PAGE_SELECTOR = "#paginationNext, [data-selenium='pagination-next-btn']"
+DISCOVERY_MAX_PAGES = 20  # search result pages walked per city
+DISCOVERY_MAX_SCROLLS = 15  # infinite-scroll steps per result page
+
+# Full-history backfill (review API page-range shards)
+BACKFILL_SHARDS = 4
+BACKFILL_MIN_SHARD_PAGES = 5  # fewer, larger shards for small hotels
+BACKFILL_OVERLAP_PAGES = 1  # pages read past each shard's end; duplicates are dropped on merge
+
+# Re-scrape scheduling (nightly browser-minute budget)
+SCHEDULE_BUDGET_MINUTES = 60
+SCHEDULE_VELOCITY_DAYS = 90  # window used to measure reviews per day
+SCHEDULE_HOTEL_OVERHEAD_S = 45  # open page, stats query, overlays
+SCHEDULE_PAGE_COST_S = 8  # one review page (click + extraction)
+SCHEDULE_REVIEWS_PER_PAGE = 10
+SCHEDULE_NEW_HOTEL_REVIEWS = 50  # assumed backlog of a hotel with no stats yet
+SCHEDULE_MIN_EXPECTED = 0.5  # skip hotels expected to have fewer new reviews
+
+# Parallel scraping
+DEFAULT_WORKERS = 1
+POLITENESS_DELAY = 3  # seconds a worker waits between two hotels
+
+# Distributed work queue (Postgres scrape_jobs table)
+QUEUE_LEASE_SECONDS = 900  # a job is re-queued if its worker stops heartbeating for this long
+QUEUE_HEARTBEAT_SECONDS = 60
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_POLL_SECONDS = 10  # idle wait of a long-running worker
+
+# Review API interception
+INTERCEPT_REVIEWS = True
+REVIEW_API_PATTERNS = (
+    "/api/cronos/property/review/ReviewComments",
+    "/api/cronos/property/review/HotelReviews",
+)
+
+# Direct review API (HTTP engine)
+REVIEW_API_URL = "https://www.agoda.com/api/cronos/property/review/ReviewComments"
+REVIEW_API_PAGE_SIZE = 20
+REVIEW_API_CONCURRENCY = 4
+REVIEW_API_TIMEOUT = 15  # seconds
+REVIEW_PREFETCH_PAGES = 10  # max review pages fetched per in-page batch (waves grow 2, 4, 8, ...); <= 1 disables
+REVIEW_API_DEFAULT_PAYLOAD = {
+    "hotelId": None,
+    "providerId": 332,
+    "demographicId": 0,
+    "page": 1,
+    "pageSize": REVIEW_API_PAGE_SIZE,
+    "sorting": 1,
+    "providerIds": [332],
+    "isReviewPage": False,
+    "isCrawlablePage": True,
+    "filters": {"language": [], "room": []},
+    "searchKeyword": "",
+    "searchFilters": []
+}
+
+# Warm browser daemon
+DAEMON_HOST = os.getenv("SCRAPER_DAEMON_HOST", "127.0.0.1")
+DAEMON_PORT = int(os.getenv("SCRAPER_DAEMON_PORT", 8766))
+DAEMON_SLOTS = 2  # warmed browsers kept by the daemon
+DAEMON_RECYCLE_AFTER = 20  # hotels per context before it is recycled
+DAEMON_JOB_TIMEOUT = 3600  # seconds a client waits for a job result
+DAEMON_RESTART_ATTEMPTS = 3  # browser restarts tried before the job at hand is failed
+DAEMON_RESTART_BACKOFF = 5  # seconds, doubled per failed restart attempt
+
+# Metrics (see metrics.py)
+METRICS_PORT = int(os.getenv("SCRAPER_METRICS_PORT", 0))  # 0 = no /metrics endpoint
+METRICS_TEXTFILE = os.getenv("SCRAPER_METRICS_TEXTFILE")  # node_exporter textfile collector path
+
+# Async engine
+ASYNC_MAX_HOTELS = 4  # hotels (browser contexts) in flight at once
+ASYNC_MAX_REVIEW_PAGES = 8  # concurrent review-page extractions across hotels
 
 # --- QUERIES ---
 HOTEL_LIST_QUERY = """
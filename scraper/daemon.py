@@ -0,0 +1,297 @@
+"""
+Long-lived scraper worker that keeps warmed browsers between jobs.
+
+Start it once:
+
+    python scraper/daemon.py --slots 2 --recycle-after 20 --headless
+
+then submit jobs instead of cold-starting Chromium:
+
+    python scraper/main.py --daemon 127.0.0.1:8766 --max-hotels 10 --reviews 20
+
+Jobs are newline-delimited JSON over a local TCP socket. Each slot owns one
+``AgodaScraper`` in its own thread (Playwright's sync API is thread-bound)
+and recycles its context after ``recycle_after`` hotels to cap memory.
+"""
+
+import json
+import time
+import queue
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from datetime import date
+from typing import Dict, List, Optional
+
+from config import (
+    DAEMON_HOST,
+    DAEMON_PORT,
+    DAEMON_SLOTS,
+    DAEMON_RECYCLE_AFTER,
+    DAEMON_JOB_TIMEOUT,
+    DAEMON_RESTART_ATTEMPTS,
+    DAEMON_RESTART_BACKOFF
+)
+from scraper import AgodaScraper
+from utils import setup_logging, resolve_stop_date
+
+
+def _encode(obj) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False, default=lambda o: o.isoformat() if isinstance(o, date) else str(o)) + "\n").encode("utf-8")
+
+
+def _parse_date(value) -> Optional[date]:
+    if not value or isinstance(value, date):
+        return value or None
+    return date.fromisoformat(value[:10])
+
+
+class _Job:
+    def __init__(self, action: str, params: Dict):
+        self.action = action
+        self.params = params
+        self.done = threading.Event()
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout: float = DAEMON_JOB_TIMEOUT):
+        if not self.done.wait(timeout):
+            # A slot that picks the job up later skips it instead of scraping for nobody
+            self.cancelled = True
+            raise TimeoutError(f"Job {self.action} timed out after {timeout}s")
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.result
+
+
+class BrowserSlot(threading.Thread):
+    """One warmed browser that executes jobs from the shared queue."""
+
+    def __init__(self, slot_id: int, jobs: "queue.Queue[_Job]", scraper_kwargs: Dict,
+                 recycle_after: int, logger: logging.Logger):
+        super().__init__(name=f"browser-slot-{slot_id}", daemon=True)
+        self.slot_id = slot_id
+        self.jobs = jobs
+        self.scraper_kwargs = scraper_kwargs
+        self.recycle_after = recycle_after
+        self.logger = logger
+        self.hotels_since_recycle = 0
+        self.jobs_done = 0
+        self.recycles = 0
+        self.ready = threading.Event()
+
+    def run(self):
+        scraper = self._start_browser()
+        self.ready.set()
+
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancelled:
+                continue
+            if scraper is None:
+                scraper = self._restart(None)
+            if scraper is None:
+                # No browser after every attempt: fail the job rather than leave its client waiting
+                job.error = f"Slot {self.slot_id} has no working browser"
+                job.done.set()
+                continue
+            try:
+                job.result = self._execute(scraper, job)
+            except Exception as e:
+                self.logger.error(f"[slot {self.slot_id}] Job {job.action} failed: {e}")
+                job.error = str(e)
+            finally:
+                self.jobs_done += 1
+                job.done.set()
+
+            if self.hotels_since_recycle >= self.recycle_after:
+                try:
+                    scraper.recycle()
+                    self._warm(scraper)
+                    self.recycles += 1
+                    self.hotels_since_recycle = 0
+                except Exception as e:
+                    self.logger.error(f"[slot {self.slot_id}] Recycle failed, restarting browser: {e}")
+                    scraper = self._restart(scraper)
+
+        if scraper:
+            scraper.close()
+
+    def _start_browser(self) -> Optional[AgodaScraper]:
+        scraper = AgodaScraper(logger=self.logger, **self.scraper_kwargs)
+        try:
+            scraper.start()
+        except Exception as e:
+            self.logger.error(f"[slot {self.slot_id}] Browser failed to start: {e}")
+            try:
+                scraper.close()
+            except Exception:
+                pass
+            return None
+        self._warm(scraper)
+        self.hotels_since_recycle = 0
+        return scraper
+
+    def _restart(self, scraper: Optional[AgodaScraper]) -> Optional[AgodaScraper]:
+        """Replace the slot's browser, backing off between attempts; None if every attempt fails."""
+        if scraper:
+            try:
+                scraper.close()
+            except Exception as e:
+                self.logger.warning(f"[slot {self.slot_id}] Closing the old browser failed: {e}")
+        for attempt in range(DAEMON_RESTART_ATTEMPTS):
+            if attempt:
+                time.sleep(DAEMON_RESTART_BACKOFF * 2 ** (attempt - 1))
+            scraper = self._start_browser()
+            if scraper:
+                return scraper
+        self.logger.error(f"[slot {self.slot_id}] Browser restart failed {DAEMON_RESTART_ATTEMPTS} times; failing its next job.")
+        return None
+
+    def _warm(self, scraper: AgodaScraper):
+        try:
+            scraper.warm_up()
+        except Exception as e:
+            self.logger.warning(f"[slot {self.slot_id}] Warm-up failed: {e}")
+
+    def _execute(self, scraper: AgodaScraper, job: _Job):
+        p = job.params
+        if job.action == "scrape_hotel":
+            self.hotels_since_recycle += 1
+            return scraper.scrape_hotel(p["url"], max_reviews=p.get("max_reviews", 50),
+                                        stop_date=_parse_date(p.get("stop_date")))
+        if job.action == "discover":
+            return scraper._discover_hotels(p["search_url"], p.get("max_hotels", 3))
+        raise ValueError(f"Unknown slot action: {job.action}")
+
+
+class BrowserPool:
+    """A fixed set of warmed browser slots fed from one job queue."""
+
+    def __init__(self, slots: int = DAEMON_SLOTS, recycle_after: int = DAEMON_RECYCLE_AFTER,
+                 logger: logging.Logger = None, **scraper_kwargs):
+        self.logger = logger or logging.getLogger(__name__)
+        self.jobs: "queue.Queue[_Job]" = queue.Queue()
+        self.slots = [BrowserSlot(i, self.jobs, scraper_kwargs, recycle_after, self.logger) for i in range(slots)]
+
+    def start(self):
+        for slot in self.slots:
+            slot.start()
+        for slot in self.slots:
+            slot.ready.wait()
+        self.logger.info(f"Browser pool ready with {len(self.slots)} warmed slots.")
+
+    def stop(self):
+        for _ in self.slots:
+            self.jobs.put(None)
+        for slot in self.slots:
+            slot.join(timeout=30)
+
+    def submit(self, action: str, **params) -> _Job:
+        job = _Job(action, params)
+        self.jobs.put(job)
+        return job
+
+    def scrape_hotel(self, url: str, max_reviews: int = 50, stop_date=None) -> Dict:
+        return self.submit("scrape_hotel", url=url, max_reviews=max_reviews, stop_date=stop_date).wait()
+
+    def scrape_multiple(self, search_url: str, max_hotels: int = 3, reviews_per_hotel: int = 20,
+                        stop_dates: Dict[str, object] = None) -> List[Dict]:
+        """Discover on one slot, then fan hotels out over every slot (results keep search order)."""
+        target_hotels = self.submit("discover", search_url=search_url, max_hotels=max_hotels).wait()
+        jobs = [
+            self.submit("scrape_hotel", url=h["hotel_link"], max_reviews=reviews_per_hotel,
+                        stop_date=resolve_stop_date(h["hotel_name"], stop_dates, h["hotel_link"]))
+            for h in target_hotels
+        ]
+        results = []
+        for job in jobs:
+            try:
+                results.append(job.wait())
+            except Exception as e:
+                self.logger.error(f"Failed to scrape hotel: {e}")
+        return results
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.jobs.qsize(),
+            "slots": [
+                {"slot": s.slot_id, "jobs_done": s.jobs_done, "recycles": s.recycles,
+                 "hotels_since_recycle": s.hotels_since_recycle, "alive": s.is_alive()}
+                for s in self.slots
+            ]
+        }
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        pool: BrowserPool = self.server.pool
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            action = request.pop("action", None)
+            if action == "ping":
+                result = "pong"
+            elif action == "stats":
+                result = pool.stats()
+            elif action == "scrape_hotel":
+                result = pool.scrape_hotel(request["url"], request.get("max_reviews", 50), request.get("stop_date"))
+            elif action == "scrape_multiple":
+                stop_dates = {k: _parse_date(v) for k, v in (request.get("stop_dates") or {}).items()}
+                result = pool.scrape_multiple(request["search_url"], request.get("max_hotels", 3),
+                                              request.get("reviews_per_hotel", 20), stop_dates)
+            else:
+                raise ValueError(f"Unknown action: {action}")
+            self.wfile.write(_encode({"ok": True, "result": result}))
+        except Exception as e:
+            pool.logger.error(f"Daemon request failed: {e}")
+            self.wfile.write(_encode({"ok": False, "error": str(e)}))
+
+
+class ScraperDaemon(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, pool: BrowserPool, host: str = DAEMON_HOST, port: int = DAEMON_PORT):
+        self.pool = pool
+        super().__init__((host, port), _JobHandler)
+
+
+def submit_job(job: Dict, host: str = DAEMON_HOST, port: int = DAEMON_PORT, timeout: float = DAEMON_JOB_TIMEOUT):
+    """Send one job to a running daemon and return its result."""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(_encode(job))
+        reader = sock.makefile("rb")
+        response = json.loads(reader.readline().decode("utf-8"))
+    if not response.get("ok"):
+        raise RuntimeError(f"Daemon job failed: {response.get('error')}")
+    return response["result"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm browser pool daemon for the Agoda scraper")
+    parser.add_argument("--host", type=str, default=DAEMON_HOST)
+    parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    parser.add_argument("--slots", type=int, default=DAEMON_SLOTS, help="Warmed browsers to keep")
+    parser.add_argument("--recycle-after", type=int, default=DAEMON_RECYCLE_AFTER, help="Hotels per context before recycling")
+    parser.add_argument("--headless", action="store_true", help="Run in headless mode")
+    parser.add_argument("--block-resources", action="store_true", help="Abort image/media/font and tracker requests")
+    args = parser.parse_args()
+
+    logger = setup_logging("scraper_daemon.log")
+    pool = BrowserPool(slots=args.slots, recycle_after=args.recycle_after, logger=logger,
+                       headless=args.headless, block_resources=args.block_resources)
+    pool.start()
+    server = ScraperDaemon(pool, args.host, args.port)
+    logger.info(f"Scraper daemon listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.stop()
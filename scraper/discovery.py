@@ -0,0 +1,324 @@
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from config import (
+    STATE_DB_PATH,
+    HOTEL_LIST_QUERY,
+    HOTEL_CARD_SELECTOR,
+    SEARCH_API_PATTERNS,
+    NEXT_PAGE_SELECTOR,
+    DISCOVERY_MAX_PAGES,
+    DISCOVERY_MAX_SCROLLS
+)
+from utils import normalize_hotel_url, hotel_id_from_url
+
+logger = logging.getLogger(__name__)
+
+# One evaluate call for every rendered hotel card instead of an AgentQL query
+HOTEL_CARDS_JS = """
+    (sel) => Array.from(document.querySelectorAll(sel)).map(card => {
+        const link = card.querySelector("a[href*='/hotel/']");
+        const name = card.querySelector("[data-selenium='hotel-name'], h3");
+        const reviews = card.querySelector("[data-element-name='review-count'], [data-selenium='review-count']");
+        return {
+            hotel_link: link ? link.getAttribute("href") : null,
+            hotel_name: name ? name.innerText.trim() : (link ? link.innerText.trim() : null),
+            review_count: reviews ? reviews.innerText.replace(/[^0-9]/g, "") : null
+        };
+    })
+"""
+
+
+def is_search_api_url(url: str) -> bool:
+    """Whether a response URL belongs to Agoda's search results API."""
+    return any(pattern in url for pattern in SEARCH_API_PATTERNS)
+
+
+def _find_properties(payload) -> List[Dict]:
+    """Locate the list of properties inside a search API payload."""
+    if isinstance(payload, list):
+        if payload and isinstance(payload[0], dict) and ("propertyId" in payload[0] or "hotelId" in payload[0]):
+            return payload
+        for item in payload:
+            found = _find_properties(item)
+            if found:
+                return found
+        return []
+    if not isinstance(payload, dict):
+        return []
+    if isinstance(payload.get("properties"), list):
+        return payload["properties"]
+    for value in payload.values():
+        if isinstance(value, (dict, list)):
+            found = _find_properties(value)
+            if found:
+                return found
+    return []
+
+
+def map_search_payload(payload) -> List[Dict]:
+    """Map a search API payload onto the HOTEL_LIST_QUERY schema."""
+    hotels = []
+    for p in _find_properties(payload):
+        content = p.get("content") or {}
+        summary = content.get("informationSummary") or {}
+        links = p.get("propertyLinks") or summary.get("propertyLinks") or {}
+        reviews = (content.get("reviews") or {}).get("cumulative") or {}
+        link = links.get("propertyPage") or p.get("propertyUrl") or p.get("hotelUrl")
+        if not link:
+            continue
+        hotels.append({
+            "hotel_name": summary.get("localeName") or summary.get("defaultName") or p.get("hotelName"),
+            "hotel_link": link,
+            "property_id": str(p.get("propertyId") or p.get("hotelId") or "") or None,
+            "review_count": reviews.get("reviewCount") or p.get("reviewCount")
+        })
+    return hotels
+
+
+class SearchResponseCollector:
+    """Capture search API responses fired while the result list loads and scrolls."""
+
+    def __init__(self):
+        self._responses = []
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    def detach(self, page):
+        page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.status == 200 and is_search_api_url(response.url):
+            self._responses.append(response)
+
+    def has_pending(self) -> bool:
+        return bool(self._responses)
+
+    def pop_hotels(self) -> List[Dict]:
+        responses, self._responses = self._responses, []
+        hotels = []
+        for response in responses:
+            try:
+                hotels.extend(map_search_payload(response.json()))
+            except Exception as e:
+                logger.debug(f"Unreadable search payload from {response.url}: {e}")
+        return hotels
+
+
+class HotelCatalogue:
+    """SQLite catalogue of discovered hotels, keyed by stable hotel ID.
+
+    Discovery upserts every hotel it sees with a ``last_seen`` timestamp;
+    scraping marks ``last_scraped`` and the review total seen then
+    (``scraped_review_count``), so later runs can pick hotels from here
+    without re-crawling the search page.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hotels (
+                hotel_id TEXT PRIMARY KEY,
+                hotel_name TEXT,
+                hotel_url TEXT NOT NULL,
+                property_id TEXT,
+                city_url TEXT,
+                review_count INTEGER,
+                first_seen TEXT,
+                last_seen TEXT,
+                last_scraped TEXT,
+                scraped_review_count INTEGER
+            );
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(hotels)")}
+        if "scraped_review_count" not in columns:
+            self._conn.execute("ALTER TABLE hotels ADD COLUMN scraped_review_count INTEGER")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, hotels: Iterable[Dict], city_url: str = None) -> int:
+        """Insert or refresh discovered hotels; returns how many were new."""
+        now = datetime.now().isoformat()
+        new = 0
+        with self._lock:
+            for h in hotels:
+                if not self._conn.execute("SELECT 1 FROM hotels WHERE hotel_id = ?", (h["hotel_id"],)).fetchone():
+                    new += 1
+                self._conn.execute("""
+                    INSERT INTO hotels (hotel_id, hotel_name, hotel_url, property_id, city_url, review_count, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (hotel_id) DO UPDATE SET
+                        hotel_name = COALESCE(excluded.hotel_name, hotel_name),
+                        hotel_url = excluded.hotel_url,
+                        property_id = COALESCE(excluded.property_id, property_id),
+                        city_url = COALESCE(excluded.city_url, city_url),
+                        review_count = COALESCE(excluded.review_count, review_count),
+                        last_seen = excluded.last_seen
+                """, (h["hotel_id"], h.get("hotel_name"), h["hotel_link"], h.get("property_id"), city_url,
+                      h.get("review_count"), now, now))
+            self._conn.commit()
+        return new
+
+    def mark_scraped(self, results: Iterable[Dict]):
+        """Record when each scraped hotel was last refreshed and its current review total."""
+        now = datetime.now().isoformat()
+        rows = []
+        for r in results:
+            if not r.get("hotel_url"):
+                continue
+            total = "".join(ch for ch in str((r.get("overall_statistics") or {}).get("total_reviews") or "") if ch.isdigit())
+            rows.append((now, int(total) if total else None, hotel_id_from_url(r["hotel_url"])))
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE hotels SET last_scraped = ?1, review_count = COALESCE(?2, review_count), "
+                "scraped_review_count = COALESCE(?2, scraped_review_count) WHERE hotel_id = ?3",
+                rows
+            )
+            self._conn.commit()
+
+    def hotels(self, limit: Optional[int] = None, city_url: str = None) -> List[Dict]:
+        """Catalogue hotels as scrape targets, never-scraped and stalest first."""
+        sql = ("SELECT hotel_id, hotel_name, hotel_url, review_count, last_seen, last_scraped, scraped_review_count "
+               "FROM hotels")
+        params = []
+        if city_url:
+            sql += " WHERE city_url = ?"
+            params.append(city_url)
+        sql += " ORDER BY last_scraped IS NOT NULL, last_scraped, last_seen DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"hotel_id": r[0], "hotel_name": r[1] or "Unknown", "hotel_link": r[2], "review_count": r[3],
+             "last_seen": r[4], "last_scraped": r[5], "scraped_review_count": r[6]}
+            for r in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM hotels").fetchone()[0]
+
+
+class DiscoveryCrawler:
+    """Walk a city's search results with infinite scroll and pagination.
+
+    Hotels are taken from captured search API responses and from the rendered
+    cards (one ``page.evaluate`` call per step); AgentQL's ``HOTEL_LIST_QUERY``
+    is only used when neither yields anything. Results are deduplicated by
+    hotel ID and, when a catalogue is given, persisted to it.
+    """
+
+    def __init__(self, scraper, catalogue: HotelCatalogue = None, logger: logging.Logger = None,
+                 max_pages: int = DISCOVERY_MAX_PAGES, max_scrolls: int = DISCOVERY_MAX_SCROLLS):
+        self.scraper = scraper
+        self.catalogue = catalogue
+        self.logger = logger or scraper.logger
+        self.max_pages = max_pages
+        self.max_scrolls = max_scrolls
+        self.collector = SearchResponseCollector()
+
+    def _card_hotels(self) -> List[Dict]:
+        try:
+            return self.scraper.page.evaluate(HOTEL_CARDS_JS, HOTEL_CARD_SELECTOR) or []
+        except Exception as e:
+            self.logger.debug(f"Hotel card extraction failed: {e}")
+            return []
+
+    def _agentql_hotels(self) -> List[Dict]:
+        try:
+            data = self.scraper._query_data(HOTEL_LIST_QUERY, timeout=15000, scope=HOTEL_CARD_SELECTOR)
+            return data.get("hotels", [])
+        except Exception as e:
+            self.logger.error(f"Failed to get hotel list: {e}")
+            return []
+
+    def _merge(self, found: Dict[str, Dict], hotels: List[Dict]) -> int:
+        added = 0
+        for hotel in hotels:
+            link = normalize_hotel_url(hotel.get("hotel_link"))
+            hotel_id = hotel_id_from_url(link)
+            if not hotel_id:
+                continue
+            if hotel_id not in found:
+                found[hotel_id] = {"hotel_id": hotel_id, "hotel_name": hotel.get("hotel_name") or "Unknown",
+                                   "hotel_link": link}
+                added += 1
+            entry = found[hotel_id]
+            for key in ("property_id", "review_count"):
+                value = hotel.get(key)
+                if value and not entry.get(key):
+                    entry[key] = int(value) if key == "review_count" and str(value).isdigit() else value
+        return added
+
+    def _harvest(self, found: Dict[str, Dict]) -> int:
+        return self._merge(found, self.collector.pop_hotels()) + self._merge(found, self._card_hotels())
+
+    def _scroll_page(self, found: Dict[str, Dict], max_hotels: Optional[int]):
+        """Scroll until the result list stops growing or enough hotels are known."""
+        page, waits = self.scraper.page, self.scraper.waits
+        self._harvest(found)
+        for _ in range(self.max_scrolls):
+            if max_hotels and len(found) >= max_hotels:
+                return
+            before = page.locator(HOTEL_CARD_SELECTOR).count()
+            page.keyboard.press("End")
+            waits.until("discover.scroll", lambda: page.locator(HOTEL_CARD_SELECTOR).count() > before
+                        or self.collector.has_pending(), ceiling_ms=2000)
+            waits.for_stable_count("discover.settle", HOTEL_CARD_SELECTOR, ceiling_ms=1000)
+            if not self._harvest(found) and page.locator(HOTEL_CARD_SELECTOR).count() <= before:
+                return
+
+    def _next_page(self) -> bool:
+        page, waits = self.scraper.page, self.scraper.waits
+        try:
+            button = page.locator(NEXT_PAGE_SELECTOR).first
+            if page.locator(NEXT_PAGE_SELECTOR).count() == 0 or not button.is_enabled():
+                return False
+            first_card = page.locator(HOTEL_CARD_SELECTOR).first.inner_text()[:200]
+            button.click()
+            waits.until("discover.next_page",
+                        lambda: self.collector.has_pending() or page.locator(HOTEL_CARD_SELECTOR).first.inner_text()[:200] != first_card,
+                        ceiling_ms=5000)
+            waits.for_stable_count("discover.settle", HOTEL_CARD_SELECTOR, ceiling_ms=2000)
+            return True
+        except Exception as e:
+            self.logger.debug(f"No further search result page: {e}")
+            return False
+
+    def crawl(self, search_url: str, max_hotels: Optional[int] = None) -> List[Dict]:
+        """Collect hotels from every result page of ``search_url`` (up to ``max_hotels``)."""
+        self.logger.info(f"Discovering hotels at: {search_url}")
+        page = self.scraper.page
+        self.collector.attach(page)
+        found: Dict[str, Dict] = {}
+        try:
+            self.scraper.navigate(search_url)
+            for page_num in range(1, self.max_pages + 1):
+                self._scroll_page(found, max_hotels)
+                if not found:
+                    self.logger.warning("No hotels from search API or cards, falling back to AgentQL.")
+                    self._merge(found, self._agentql_hotels())
+                self.logger.info(f"Search page {page_num}: {len(found)} unique hotels so far.")
+                if max_hotels and len(found) >= max_hotels:
+                    break
+                if not self._next_page():
+                    break
+        finally:
+            self.collector.detach(page)
+
+        hotels = list(found.values())[:max_hotels] if max_hotels else list(found.values())
+        if self.catalogue and hotels:
+            new = self.catalogue.upsert(hotels, city_url=search_url)
+            self.logger.info(f"Catalogue updated: {new} new hotels, {self.catalogue.count()} total.")
+        return hotels
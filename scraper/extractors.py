@@ -0,0 +1,136 @@
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    INDIVIDUAL_REVIEWS_QUERY,
+    REVIEW_CARD_SELECTOR,
+    REVIEW_FIELD_SELECTORS,
+    FAST_EXTRACT_MIN_COVERAGE
+)
+from utils import parse_date
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# One evaluate call for every rendered review card. Each field tries its
+# selectors in order ("@attr" reads an attribute of the card itself) and the
+# index of the selector that matched is reported so a break can be pinned to
+# the selector that stopped matching.
+REVIEW_CARDS_JS = """
+    ([cardSel, fields]) => Array.from(document.querySelectorAll(cardSel)).map(card => {
+        const review = {}, matched = {};
+        for (const [field, selectors] of Object.entries(fields)) {
+            review[field] = null;
+            matched[field] = -1;
+            for (let i = 0; i < selectors.length; i++) {
+                const sel = selectors[i];
+                let value = null;
+                if (sel.startsWith("@")) {
+                    value = card.getAttribute(sel.slice(1));
+                } else {
+                    const el = card.querySelector(sel);
+                    value = el ? el.innerText : null;
+                }
+                value = value ? value.replace(/\\s+/g, " ").trim() : "";
+                if (value) {
+                    review[field] = value;
+                    matched[field] = i;
+                    break;
+                }
+            }
+        }
+        return {review, matched};
+    })
+"""
+
+
+def query_fields(query: str) -> Tuple[List[str], List[str]]:
+    """Leaf fields of a single-list AgentQL query, split into (required, optional)."""
+    required, optional = [], []
+    for line in query.splitlines():
+        line = line.strip()
+        if not line or line.endswith("{") or line == "}":
+            continue
+        name = line.split()[0]
+        (optional if "(Optional)" in line else required).append(name)
+    return required, optional
+
+
+REQUIRED_FIELDS, OPTIONAL_FIELDS = query_fields(INDIVIDUAL_REVIEWS_QUERY)
+
+
+def _parses(field: str, value: Optional[str]) -> bool:
+    """Whether a value can feed stop dates and fingerprints (only scores and dates are checked)."""
+    if not value:
+        return True
+    if field == "reviewer_score":
+        return re.fullmatch(r"\d+(\.\d+)?", value) is not None
+    if field == "review_date":
+        return parse_date(value) is not None
+    return True
+
+
+def validate_reviews(cards: List[Dict], min_coverage: float = FAST_EXTRACT_MIN_COVERAGE) -> Optional[str]:
+    """None when the cards satisfy the INDIVIDUAL_REVIEWS_QUERY schema, else the broken field."""
+    if not cards:
+        return "cards"
+    for field in REQUIRED_FIELDS:
+        hits = sum(1 for c in cards if c["review"].get(field))
+        if hits < len(cards) * min_coverage:
+            return field
+    for c in cards:
+        for field in ("reviewer_score", "review_date"):
+            if not _parses(field, c["review"].get(field)):
+                return field
+    return None
+
+
+class ReviewCardExtractor:
+    """Selector-based fast path for INDIVIDUAL_REVIEWS_QUERY.
+
+    Parses every review card on the page in one ``page.evaluate`` call and
+    validates the result against the query schema. ``extract`` returns None
+    when validation fails, after logging which selector broke, so callers can
+    fall back to AgentQL.
+    """
+
+    def __init__(self, card_selector: str = REVIEW_CARD_SELECTOR, fields: Dict[str, List[str]] = None,
+                 log: logging.Logger = None):
+        self.card_selector = card_selector
+        self.fields = fields or REVIEW_FIELD_SELECTORS
+        self.logger = log or logger
+        self.hits = 0
+        self.fallbacks = 0
+
+    @property
+    def js_args(self):
+        return [self.card_selector, self.fields]
+
+    def extract(self, page) -> Optional[List[Dict]]:
+        return self.parse(page.evaluate(REVIEW_CARDS_JS, self.js_args))
+
+    async def extract_async(self, page) -> Optional[List[Dict]]:
+        return self.parse(await page.evaluate(REVIEW_CARDS_JS, self.js_args))
+
+    def parse(self, cards: List[Dict]) -> Optional[List[Dict]]:
+        """Validated reviews from the evaluate result, or None to fall back to AgentQL."""
+        cards = cards or []
+        broken = validate_reviews(cards)
+        if broken:
+            self.fallbacks += 1
+            metrics.inc("extractor_fallbacks_total", field=broken)
+            self.logger.warning(f"Selector extractor failed on '{broken}' ({self._describe(broken, cards)}), falling back to AgentQL.")
+            return None
+        self.hits += 1
+        return [c["review"] for c in cards]
+
+    def _describe(self, field: str, cards: List[Dict]) -> str:
+        if field == "cards":
+            return f"no cards match {self.card_selector!r}"
+        selectors = self.fields.get(field, [])
+        bad = next((c for c in cards if c["review"].get(field) and not _parses(field, c["review"][field])), None)
+        if bad:
+            return f"unparseable value {bad['review'][field]!r} from {selectors[bad['matched'][field]]!r}"
+        matched = sum(1 for c in cards if c["review"].get(field))
+        return f"{matched}/{len(cards)} cards matched any of {', '.join(repr(s) for s in selectors)}"
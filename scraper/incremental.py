@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from config import STATE_DB_PATH, INDEX_KEEP_PER_HOTEL
+from utils import parse_date, review_key
+
+
+class IncrementalIndex:
+    """Fingerprints of already-scraped reviews, keyed by stable hotel ID.
+
+    ``scrape_hotel`` stops at the first review whose fingerprint is known,
+    so nightly runs fetch only the pages that hold new reviews. Lookups hit an
+    in-memory set per hotel; the SQLite table keeps the newest
+    ``keep_per_hotel`` fingerprints of each hotel between runs.
+
+    ``seeder(hotel_id, hotel_name)`` may return existing reviews (e.g. from
+    Postgres) to bootstrap hotels the index has never seen.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH, keep_per_hotel: int = INDEX_KEEP_PER_HOTEL,
+                 seeder: Callable[[str, Optional[str]], List[Dict]] = None):
+        self.path = path
+        self.keep_per_hotel = keep_per_hotel
+        self.seeder = seeder
+        self._cache: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen_reviews (
+                hotel_id TEXT NOT NULL,
+                review_key TEXT NOT NULL,
+                review_date TEXT,
+                added_at TEXT,
+                PRIMARY KEY (hotel_id, review_key)
+            );
+        """)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def keys_for(self, hotel_id: str, hotel_name: Optional[str] = None) -> Set[str]:
+        """Known fingerprints for a hotel, seeding from ``seeder`` on first sight."""
+        with self._lock:
+            if hotel_id in self._cache:
+                return self._cache[hotel_id]
+            rows = self._conn.execute(
+                "SELECT review_key FROM seen_reviews WHERE hotel_id = ?", (hotel_id,)
+            ).fetchall()
+            keys = {r[0] for r in rows}
+            self._cache[hotel_id] = keys
+
+        if not keys and self.seeder and (hotel_id or hotel_name):
+            seeded = self.seeder(hotel_id, hotel_name)
+            if seeded:
+                self.add(hotel_id, seeded)
+        return self._cache[hotel_id]
+
+    def add(self, hotel_id: str, reviews: Iterable[Dict]):
+        """Remember reviews as seen and prune the hotel to its newest fingerprints."""
+        now = datetime.now().isoformat()
+        rows = []
+        for r in reviews:
+            r_date = parse_date(r.get("review_date")) if isinstance(r.get("review_date"), str) else r.get("review_date")
+            rows.append((hotel_id, review_key(r), r_date.isoformat() if r_date else None, now))
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen_reviews (hotel_id, review_key, review_date, added_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute("""
+                DELETE FROM seen_reviews
+                WHERE hotel_id = ? AND review_key NOT IN (
+                    SELECT review_key FROM seen_reviews WHERE hotel_id = ?
+                    ORDER BY review_date DESC, added_at DESC LIMIT ?
+                )
+            """, (hotel_id, hotel_id, self.keep_per_hotel))
+            self._conn.commit()
+            self._cache.setdefault(hotel_id, set()).update(r[1] for r in rows)
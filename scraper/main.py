@@ -1,28 +1,44 @@
 import argparse
+import asyncio
 import logging
 import os
+import time
+from datetime import datetime
 from scraper import AgodaScraper
-from utils import setup_logging, save_data
+from utils import setup_logging, save_results, is_jsonl, stop_date_key
+from config import STATE_DB_PATH, INDEX_KEEP_PER_HOTEL, SCHEDULE_BUDGET_MINUTES, SCHEDULE_VELOCITY_DAYS, METRICS_PORT, METRICS_TEXTFILE, QUERY_CACHE_PATH, REVIEW_PREFETCH_PAGES, BACKFILL_SHARDS
+from metrics import metrics
+
+def _db_connect():
+    import psycopg2
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        database=os.getenv("DB_NAME", "hotel_insights"),
+        user=os.getenv("DB_USER", "admin"),
+        password=os.getenv("DB_PASS", "password123"),
+        port=os.getenv("DB_PORT", "5432")
+    )
 
 def get_latest_review_dates():
-    """Fetch the latest review date for each hotel from the database."""
+    """Latest review date per hotel from the database, keyed by stable hotel ID and by name."""
     try:
-        import psycopg2
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            database=os.getenv("DB_NAME", "hotel_insights"),
-            user=os.getenv("DB_USER", "admin"),
-            password=os.getenv("DB_PASS", "password123"),
-            port=os.getenv("DB_PORT", "5432")
-        )
+        conn = _db_connect()
         cur = conn.cursor()
-        cur.execute("SELECT hotel_name, MAX(review_date) FROM reviews GROUP BY hotel_name")
+        # One index probe per hotel on reviews (hotel_id, review_date DESC) instead of a full GROUP BY
+        cur.execute(
+            "SELECT h.hotel_name, h.hotel_url, (SELECT r.review_date FROM reviews r "
+            "WHERE r.hotel_id = h.id AND r.review_date IS NOT NULL "
+            "ORDER BY r.review_date DESC LIMIT 1) FROM hotels h"
+        )
         results = cur.fetchall()
         
         stop_dates = {}
-        for row in results:
-            if row[1]:
-                stop_dates[row[0]] = row[1]
+        for hotel_name, hotel_url, latest in results:
+            if latest:
+                stop_dates[hotel_name] = latest
+                key = stop_date_key(hotel_url)
+                if key:
+                    stop_dates[key] = latest
         
         conn.close()
         return stop_dates
@@ -30,6 +46,91 @@ def get_latest_review_dates():
         logging.warning(f"Could not fetch latest dates from DB: {e}")
         return {}
 
+def get_review_stats():
+    """Per-hotel review count, newest review date and recent review volume, keyed by stable hotel ID."""
+    try:
+        conn = _db_connect()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT h.agoda_hotel_id, COUNT(*), MAX(r.review_date), "
+            "COUNT(*) FILTER (WHERE r.review_date >= CURRENT_DATE - %s) "
+            "FROM reviews r JOIN hotels h ON h.id = r.hotel_id "
+            "WHERE h.agoda_hotel_id IS NOT NULL GROUP BY h.agoda_hotel_id",
+            (SCHEDULE_VELOCITY_DAYS,)
+        )
+        stats = {row[0]: {"held": row[1], "latest": row[2], "recent": row[3]} for row in cur.fetchall()}
+        conn.close()
+        return stats
+    except Exception as e:
+        logging.warning(f"Could not fetch review stats from DB: {e}")
+        return {}
+
+def seed_reviews_from_db(hotel_id, hotel_name=None):
+    """Newest stored reviews of a hotel, used to bootstrap the incremental index.
+
+    Looked up by stable hotel ID; the name is only used for hotels without one.
+    """
+    try:
+        conn = _db_connect()
+        cur = conn.cursor()
+        if hotel_id:
+            cur.execute(
+                "SELECT r.reviewer_name, r.review_date, r.review_text FROM reviews r "
+                "JOIN hotels h ON h.id = r.hotel_id WHERE h.agoda_hotel_id = %s "
+                "ORDER BY r.review_date DESC LIMIT %s",
+                (hotel_id, INDEX_KEEP_PER_HOTEL)
+            )
+        else:
+            cur.execute(
+                "SELECT reviewer_name, review_date, review_text FROM reviews "
+                "WHERE hotel_name = %s ORDER BY review_date DESC LIMIT %s",
+                (hotel_name, INDEX_KEEP_PER_HOTEL)
+            )
+        rows = cur.fetchall()
+        conn.close()
+        return [{"reviewer_name": r[0], "review_date": r[1], "review_text": r[2]} for r in rows]
+    except Exception as e:
+        logging.warning(f"Could not seed incremental index for {hotel_id or hotel_name}: {e}")
+        return []
+
+def _open_query_cache(args):
+    if args.no_query_cache:
+        return None
+    from query_cache import QueryCache
+    os.makedirs(os.path.dirname(QUERY_CACHE_PATH) or ".", exist_ok=True)
+    return QueryCache(QUERY_CACHE_PATH)
+
+def _close_query_cache(query_cache, logger):
+    if query_cache:
+        stats = query_cache.stats()
+        logger.info(f"AgentQL cache: {stats['hits']} hits, {stats['misses']} misses, "
+                    f"{stats['entries']} entries ({stats['size_mb']} MB)")
+        query_cache.close()
+
+async def run_async(args, output_path, stop_dates, logger):
+    """Run the scrape on the asyncio engine."""
+    from async_scraper import AsyncAgodaScraper
+
+    # --workers doubles as the number of hotels in flight; otherwise keep the engine default
+    kwargs = {"max_concurrent_hotels": args.workers} if args.workers > 1 else {}
+    query_cache = _open_query_cache(args)
+    scraper = AsyncAgodaScraper(headless=args.headless, logger=logger, intercept_reviews=not args.no_intercept,
+                                block_resources=args.block_resources, light_viewport=args.light_viewport,
+                                query_cache=query_cache, fast_extract=not args.no_fast_extract,
+                                prefetch_pages=args.prefetch_pages, **kwargs)
+    try:
+        await scraper.start()
+        if args.mode == "single":
+            data = await scraper.scrape_hotel(args.single_url, max_reviews=args.reviews)
+            save_results([data], output_path, logger)
+        else:
+            reviews = await scraper.scrape_multiple(args.url, max_hotels=args.max_hotels, reviews_per_hotel=args.reviews, stop_dates=stop_dates, output_path=output_path)
+            if not is_jsonl(output_path):
+                save_results(reviews, output_path, logger)
+    finally:
+        await scraper.close()
+        _close_query_cache(query_cache, logger)
+
 def main():
     logger = setup_logging()
     
@@ -42,39 +143,225 @@ def main():
                        help="Search URL")
     parser.add_argument("--mode", choices=["multiple", "single"], default="multiple", help="Scrape mode")
     parser.add_argument("--single-url", type=str, help="URL for single hotel mode")
-    parser.add_argument("--output", type=str, default="data/agoda_reviews.json", help="Output .json file path")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel workers for multiple mode (async: hotels in flight)")
+    parser.add_argument("--engine", choices=["sync", "async", "http"], default="sync", help="Scraping engine (http: browser bootstrap, reviews over the API)")
+    parser.add_argument("--api-endpoint", type=str, help="Review API endpoint for the http engine (e.g. a local replay stub)")
+    parser.add_argument("--api-concurrency", type=int, default=4, help="Concurrent review-page requests per hotel for the http engine")
+    parser.add_argument("--no-intercept", action="store_true", help="Always extract reviews with AgentQL instead of captured API responses")
+    parser.add_argument("--block-resources", action="store_true", help="Abort image/media/font and tracker requests")
+    parser.add_argument("--light-viewport", action="store_true", help="Use a smaller browser viewport")
+    parser.add_argument("--daemon", type=str, help="Submit the job to a running scraper daemon (HOST:PORT) instead of starting a browser")
+    parser.add_argument("--checkpoint", type=str, help="SQLite checkpoint file; resumes finished/partial hotels of the same --batch")
+    parser.add_argument("--reset-checkpoint", action="store_true", help="Clear the checkpoint file before scraping")
+    parser.add_argument("--discover", action="store_true", help="Only crawl every search result page into the hotel catalogue")
+    parser.add_argument("--from-catalogue", action="store_true", help="Scrape the stalest --max-hotels hotels from the catalogue instead of searching")
+    parser.add_argument("--schedule", action="store_true", help="Scrape catalogue hotels ranked by expected new reviews within --budget-minutes")
+    parser.add_argument("--budget-minutes", type=float, default=SCHEDULE_BUDGET_MINUTES, help="Browser-minute budget for --schedule")
+    parser.add_argument("--backfill", action="store_true", help="Fetch every review of the selected hotels as concurrent page-range shards")
+    parser.add_argument("--shards", type=int, default=BACKFILL_SHARDS, help="Concurrent shards per hotel for --backfill")
+    parser.add_argument("--enqueue", action="store_true", help="Put the selected hotels on the shared work queue instead of scraping them")
+    parser.add_argument("--worker", action="store_true", help="Scrape jobs from the shared work queue")
+    parser.add_argument("--exit-when-empty", action="store_true", help="Stop a --worker once the queue is drained")
+    parser.add_argument("--collect", action="store_true", help="Wait for a queue batch to finish and write its results to --output")
+    parser.add_argument("--batch", type=str, help="Queue batch / checkpoint run name (default: today's date)")
+    parser.add_argument("--prefetch-pages", type=int, default=REVIEW_PREFETCH_PAGES, help="Max review pages fetched per in-page batch (1 = click through every page)")
+    parser.add_argument("--no-fast-extract", action="store_true", help="Skip the review-card selector extractor and go straight to AgentQL")
+    parser.add_argument("--no-query-cache", action="store_true", help="Always send AgentQL queries, even for pages already analysed")
+    parser.add_argument("--no-index", action="store_true", help="Disable the incremental review index and stop on the latest DB review date instead")
+    parser.add_argument("--output", type=str, default="data/agoda_reviews.json", help="Output .json or .jsonl file path")
+    parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="Format of the default timestamped output file")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="Serve Prometheus metrics on this port at /metrics while running")
+    parser.add_argument("--metrics-textfile", type=str, default=METRICS_TEXTFILE, help="Write Prometheus metrics to this .prom file when the run ends")
+    parser.add_argument("--run-summary", type=str, help="Run-summary JSON path (default: <output dir>/runs/<output name>_summary.json)")
     
     args = parser.parse_args()
-    
+    if args.engine == "async" and not args.daemon and not args.collect:
+        # The async engine only scrapes search results or a single hotel
+        unsupported = [flag for flag, on in (
+            ("--schedule", args.schedule), ("--discover", args.discover), ("--backfill", args.backfill),
+            ("--enqueue", args.enqueue), ("--worker", args.worker), ("--from-catalogue", args.from_catalogue),
+            ("--checkpoint", args.checkpoint)
+        ) if on]
+        if unsupported:
+            parser.error(f"--engine async does not support {', '.join(unsupported)}")
+
     # Handle output path
     if args.output == "data/agoda_reviews.json": # Default value
-        from datetime import datetime
         timestamp = datetime.now().strftime("%d_%m_%Y_%H_%M_%S")
-        output_path = f"data/{timestamp}.json"
+        output_path = f"data/{timestamp}.{args.format}"
     else:
         output_path = args.output
 
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        logger.info(f"Serving metrics on :{args.metrics_port}/metrics")
+    try:
+        run(args, output_path, logger)
+    finally:
+        # Kept out of the output directory so clean_data.py does not pick summaries up as hotel data
+        summary_path = args.run_summary or os.path.join(os.path.dirname(output_path), "runs",
+                                                        os.path.splitext(os.path.basename(output_path))[0] + "_summary.json")
+        summary = metrics.write_summary(summary_path, mode=args.mode, engine=args.engine, output=output_path)
+        logger.info(f"Run summary written to {summary_path} ({summary['duration_s']}s)")
+        if args.metrics_textfile:
+            metrics.write_textfile(args.metrics_textfile)
+
+
+def run(args, output_path, logger):
+    """Dispatch the parsed command line to the daemon, queue or a scraper engine."""
+
     # Fetch existing data for incremental scraping
     stop_dates = get_latest_review_dates()
     if stop_dates:
         logger.info(f"Incremental Scraping Active. Loaded {len(stop_dates)} existing hotels.")
     
-    scraper = AgodaScraper(headless=args.headless, logger=logger)
+    if args.mode == "single" and not args.single_url:
+        logger.error("Single mode requires --single-url")
+        return
+
+    if args.daemon:
+        from daemon import submit_job
+        host, port = args.daemon.rsplit(":", 1)
+        try:
+            if args.mode == "single":
+                data = submit_job({"action": "scrape_hotel", "url": args.single_url, "max_reviews": args.reviews}, host, int(port))
+                save_results([data], output_path, logger)
+            else:
+                reviews = submit_job({"action": "scrape_multiple", "search_url": args.url, "max_hotels": args.max_hotels,
+                                      "reviews_per_hotel": args.reviews, "stop_dates": stop_dates}, host, int(port))
+                save_results(reviews, output_path, logger)
+        except Exception as e:
+            logger.critical(f"Daemon job failed: {e}")
+        return
+
+    batch = args.batch or datetime.now().strftime("%Y-%m-%d")
+    if args.collect:
+        from work_queue import ScrapeQueue
+        work_queue = ScrapeQueue(_db_connect)
+        try:
+            while work_queue.pending(batch):
+                logger.info(f"Waiting for batch {batch}: {work_queue.stats(batch)}")
+                time.sleep(30)
+            results = list(work_queue.results(batch))
+            logger.info(f"Batch {batch} finished: {work_queue.stats(batch)}")
+            save_results(results, output_path, logger)
+        finally:
+            work_queue.close()
+        return
+
+    if args.engine == "async":
+        try:
+            asyncio.run(run_async(args, output_path, stop_dates, logger))
+        except Exception as e:
+            logger.critical(f"Unhandled exception: {e}")
+            import traceback
+            traceback.print_exc()
+        return
+
+    os.makedirs(os.path.dirname(STATE_DB_PATH) or ".", exist_ok=True)
+    index = None
+    if not args.no_index:
+        from incremental import IncrementalIndex
+        index = IncrementalIndex(STATE_DB_PATH, seeder=seed_reviews_from_db)
+
+    from discovery import HotelCatalogue
+    catalogue = HotelCatalogue(STATE_DB_PATH)
+    hotels = None
+    if args.from_catalogue:
+        hotels = catalogue.hotels(limit=args.max_hotels)
+        logger.info(f"Scheduling {len(hotels)} hotels from the catalogue ({catalogue.count()} known).")
+
+    checkpoint = None
+    if args.checkpoint:
+        from checkpoint import CheckpointStore
+        checkpoint = CheckpointStore(args.checkpoint, run_id=batch)
+        if args.reset_checkpoint:
+            checkpoint.reset()
+        logger.info(f"Checkpointing run {batch} to {args.checkpoint} ({len(checkpoint.completed_urls())} hotels already completed).")
+
+    query_cache = _open_query_cache(args)
+    scraper = AgodaScraper(headless=args.headless, logger=logger, intercept_reviews=not args.no_intercept,
+                           block_resources=args.block_resources, light_viewport=args.light_viewport,
+                           checkpoint=checkpoint, index=index, query_cache=query_cache,
+                           fast_extract=not args.no_fast_extract, prefetch_pages=args.prefetch_pages)
+    work_queue = None
+    if args.enqueue or args.worker:
+        from work_queue import ScrapeQueue
+        work_queue = ScrapeQueue(_db_connect)
+
     try:
         scraper.start()
         
-        if args.mode == "single":
-            if not args.single_url:
-                logger.error("Single mode requires --single-url")
-                return
+        if args.schedule:
+            from scheduler import ScrapeScheduler
+            if not catalogue.count():
+                logger.info("Catalogue is empty, discovering hotels first.")
+                scraper._discover_hotels(args.url, None, catalogue)
+            scheduler = ScrapeScheduler(get_review_stats(), budget_minutes=args.budget_minutes,
+                                        max_reviews=args.reviews, logger=logger)
+            hotels = scheduler.plan(catalogue.hotels())
+
+        if args.enqueue:
+            if hotels is None:
+                hotels = scraper._discover_hotels(args.url, args.max_hotels, catalogue)
+            added = work_queue.enqueue(batch, hotels, args.reviews, stop_dates)
+            logger.info(f"Enqueued {added} hotels into batch {batch}: {work_queue.stats(batch)}")
+        elif args.worker:
+            from work_queue import run_worker
+            if args.engine == "http":
+                from review_api import scrape_hotel_via_api
+                client_kwargs = {"concurrency": args.api_concurrency}
+                if args.api_endpoint:
+                    client_kwargs["endpoint"] = args.api_endpoint
+                scrape = lambda url, n, stop: scrape_hotel_via_api(scraper, url, max_reviews=n, stop_date=stop, **client_kwargs)
+            else:
+                scrape = lambda url, n, stop: scraper.scrape_hotel(url, max_reviews=n, stop_date=stop)
+            run_worker(work_queue, scrape, exit_when_empty=args.exit_when_empty, logger=logger,
+                       on_result=lambda r: catalogue.mark_scraped([r]))
+        elif args.backfill:
+            from backfill import BackfillStore, run_backfill
+            if args.mode == "single":
+                hotels = [{"hotel_name": None, "hotel_link": args.single_url}]
+            elif hotels is None:
+                hotels = scraper._discover_hotels(args.url, args.max_hotels, catalogue)
+            client_kwargs = {"endpoint": args.api_endpoint} if args.api_endpoint else {}
+            store = BackfillStore(STATE_DB_PATH)
+            try:
+                results = run_backfill(scraper, hotels, output_path, store, shards=args.shards, **client_kwargs)
+            finally:
+                store.close()
+            catalogue.mark_scraped(results)
+            if not is_jsonl(output_path):
+                save_results(results, output_path, logger)
+        elif args.discover:
+            found = scraper._discover_hotels(args.url, None, catalogue)
+            logger.info(f"Discovery finished: {len(found)} hotels on {args.url}.")
+        elif args.engine == "http":
+            from review_api import scrape_hotel_via_api, scrape_multiple_via_api
+            client_kwargs = {"concurrency": args.api_concurrency}
+            if args.api_endpoint:
+                client_kwargs["endpoint"] = args.api_endpoint
+            if args.mode == "single":
+                data = scrape_hotel_via_api(scraper, args.single_url, max_reviews=args.reviews, **client_kwargs)
+                save_results([data], output_path, logger)
+            else:
+                reviews = scrape_multiple_via_api(scraper, args.url, max_hotels=args.max_hotels, reviews_per_hotel=args.reviews, stop_dates=stop_dates, output_path=output_path,
+                                                  hotels=hotels, catalogue=catalogue, **client_kwargs)
+                catalogue.mark_scraped(reviews)
+                if not is_jsonl(output_path):
+                    save_results(reviews, output_path, logger)
+        elif args.mode == "single":
             data = scraper.scrape_hotel(args.single_url, max_reviews=args.reviews)
-            save_data([data], output_path, logger)
+            save_results([data], output_path, logger)
         else:
-            reviews = scraper.scrape_multiple(args.url, max_hotels=args.max_hotels, reviews_per_hotel=args.reviews, stop_dates=stop_dates, output_path=output_path)
-            save_data(reviews, output_path, logger)
+            reviews = scraper.scrape_multiple(args.url, max_hotels=args.max_hotels, reviews_per_hotel=args.reviews, stop_dates=stop_dates, output_path=output_path, workers=args.workers,
+                                             hotels=hotels, catalogue=catalogue)
+            catalogue.mark_scraped(reviews)
+            if not is_jsonl(output_path):
+                save_results(reviews, output_path, logger)
             
     except Exception as e:
         logger.critical(f"Unhandled exception: {e}")
@@ -82,6 +369,14 @@ def main():
         traceback.print_exc()
     finally:
         scraper.close()
+        if checkpoint:
+            checkpoint.close()
+        if index:
+            index.close()
+        catalogue.close()
+        _close_query_cache(query_cache, logger)
+        if work_queue:
+            work_queue.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,205 @@
+"""
+Process-wide counters, step spans and latency histograms for scraper runs.
+
+    from metrics import metrics
+
+    with metrics.span("navigate"):
+        page.goto(url)
+    metrics.inc("reviews_total", 20, source="intercepted")
+
+Export with ``write_textfile`` (node_exporter textfile collector),
+``serve`` (local ``/metrics`` endpoint) and ``write_summary`` (run-summary
+JSON). Kept free of ``config`` imports so the database scripts can use it too.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Tuple
+
+PREFIX = "agoda_scraper_"
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+MAX_SAMPLES = 5000  # latency samples kept per step for summary percentiles
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render_labels(key: LabelKey, extra: Dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in items) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and per-step histograms."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self._hist_counts = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self._hist_sum = defaultdict(float)
+        self._samples = defaultdict(list)
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now()
+            self.counters.clear()
+            self.gauges.clear()
+            self._hist_counts.clear()
+            self._hist_sum.clear()
+            self._samples.clear()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self.counters[(name, _labels(labels))] += value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, step: str, seconds: float):
+        """Record one latency sample of ``step``."""
+        with self._lock:
+            counts = self._hist_counts[step]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._hist_sum[step] += seconds
+            samples = self._samples[step]
+            samples.append(seconds)
+            if len(samples) > MAX_SAMPLES:
+                del samples[:len(samples) - MAX_SAMPLES]
+
+    @contextmanager
+    def span(self, step: str):
+        """Time a block as ``step``; failures are also counted per step."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("step_errors_total", step=step)
+            raise
+        finally:
+            self.observe(step, time.perf_counter() - started)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            by_name = defaultdict(list)
+            for (name, key), value in self.counters.items():
+                by_name[name].append((key, value))
+            for name in sorted(by_name):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                for key, value in sorted(by_name[name]):
+                    lines.append(f"{PREFIX}{name}{_render_labels(key)} {value:g}")
+
+            gauges = defaultdict(list)
+            for (name, key), value in self.gauges.items():
+                gauges[name].append((key, value))
+            for name in sorted(gauges):
+                lines.append(f"# TYPE {PREFIX}{name} gauge")
+                for key, value in sorted(gauges[name]):
+                    lines.append(f"{PREFIX}{name}{_render_labels(key)} {value:g}")
+
+            if self._hist_counts:
+                metric = f"{PREFIX}step_duration_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for step in sorted(self._hist_counts):
+                    key = (("step", step),)
+                    cumulative = 0
+                    for bound, count in zip(list(self.buckets) + ["+Inf"], self._hist_counts[step]):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_render_labels(key, {'le': bound})} {cumulative}")
+                    lines.append(f"{metric}_sum{_render_labels(key)} {self._hist_sum[step]:.6f}")
+                    lines.append(f"{metric}_count{_render_labels(key)} {cumulative}")
+
+            lines.append(f"# TYPE {PREFIX}run_started_timestamp_seconds gauge")
+            lines.append(f"{PREFIX}run_started_timestamp_seconds {self.started_at.timestamp():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Atomically write the metrics for node_exporter's textfile collector."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def summary(self) -> Dict:
+        """Counters and per-step latency stats for the run-summary JSON."""
+        finished = datetime.now()
+        with self._lock:
+            counters = {}
+            for (name, key), value in sorted(self.counters.items()):
+                label = ",".join(f"{k}={v}" for k, v in key)
+                counters[f"{name}{{{label}}}" if label else name] = value
+            steps = {}
+            for step, samples in sorted(self._samples.items()):
+                ordered = sorted(samples)
+                pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+                total = sum(self._hist_counts[step])
+                steps[step] = {
+                    "count": total,
+                    "total_s": round(self._hist_sum[step], 3),
+                    "avg_s": round(self._hist_sum[step] / total, 3) if total else 0,
+                    "p50_s": pick(0.5),
+                    "p95_s": pick(0.95),
+                    "max_s": round(ordered[-1], 3)
+                }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": finished.isoformat(),
+            "duration_s": round((finished - self.started_at).total_seconds(), 1),
+            "counters": counters,
+            "steps": steps
+        }
+
+    def write_summary(self, path: str, **extra) -> Dict:
+        summary = dict(self.summary(), **extra)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+        return summary
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serve ``/metrics`` from a background thread for the lifetime of the run."""
+        registry = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,153 @@
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional
+
+from config import QUERY_CACHE_PATH, QUERY_CACHE_TTL_HOURS, QUERY_CACHE_MAX_MB
+from metrics import metrics
+
+# Normalised text of the DOM a query reads: the elements matching ``scope``
+# (falling back to the whole body when nothing matches), with scripts, styles
+# and whitespace differences removed. Review/hotel IDs are included so two
+# cards with identical text still hash differently.
+DOM_FINGERPRINT_JS = """
+    (scope) => {
+        let nodes = scope ? Array.from(document.querySelectorAll(scope)) : [];
+        if (!nodes.length) nodes = [document.body];
+        return nodes.map(el => {
+            const clone = el.cloneNode(true);
+            clone.querySelectorAll('script, style, noscript, svg').forEach(n => n.remove());
+            const id = el.getAttribute('data-review-id') || el.getAttribute('data-hotelid') || '';
+            return id + '|' + (clone.innerText || clone.textContent || '').replace(/\\s+/g, ' ').trim();
+        }).join('\\n');
+    }
+"""
+
+
+def cache_key(query: str, dom_text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(" ".join(query.split()).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(dom_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cacheable(result) -> bool:
+    """Only keep answers that found something; an empty answer may be a half-rendered page."""
+    return isinstance(result, dict) and any(result.values())
+
+
+class QueryCache:
+    """Content-addressed SQLite cache of AgentQL ``query_data`` answers.
+
+    The key is the query text plus a hash of the DOM subtree the query reads,
+    so overlay retries, resumed runs and re-scrapes of unchanged hotels get
+    the previous answer without another AgentQL round trip. Entries expire
+    after ``ttl_hours``; once the stored answers exceed ``max_mb`` the least
+    recently used ones are evicted. Safe to share between worker threads.
+    """
+
+    def __init__(self, path: str = QUERY_CACHE_PATH, ttl_hours: float = QUERY_CACHE_TTL_HOURS,
+                 max_mb: float = QUERY_CACHE_MAX_MB):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS agentql_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_agentql_cache_last_used ON agentql_cache (last_used);
+        """)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM agentql_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM agentql_cache WHERE cache_key = ?", (key,))
+                row = None
+            elif row:
+                self._conn.execute("UPDATE agentql_cache SET last_used = ? WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.inc("query_cache_total", result="hit" if row else "miss")
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, result: Dict):
+        if not _cacheable(result):
+            return
+        data = json.dumps(result, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO agentql_cache (cache_key, result, size, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, (key, data, len(data), now, now))
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM agentql_cache WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM agentql_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used answers until the cache is back at 90% of its budget
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT cache_key, size FROM agentql_cache ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM agentql_cache WHERE cache_key = ?", victims)
+
+    def fingerprint(self, page, scope: str = None) -> str:
+        return page.evaluate(DOM_FINGERPRINT_JS, scope)
+
+    def query(self, page, query: str, timeout: int, scope: str = None) -> Dict:
+        """``page.query_data`` answered from the cache when the scoped DOM is unchanged."""
+        key = cache_key(query, self.fingerprint(page, scope))
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = page.query_data(query, timeout=timeout)
+        self.put(key, result)
+        return result
+
+    async def query_async(self, page, query: str, timeout: int, scope: str = None,
+                          run: Callable = None) -> Dict:
+        """Async ``query``; ``run(page, query, timeout)`` performs the real call (e.g. under a semaphore)."""
+        key = cache_key(query, await page.evaluate(DOM_FINGERPRINT_JS, scope))
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = await (run(page, query, timeout) if run else page.query_data(query, timeout=timeout))
+        self.put(key, result)
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM agentql_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size_mb": round(size / 1024 / 1024, 2)}
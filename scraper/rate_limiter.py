@@ -0,0 +1,153 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict
+from urllib.parse import urlparse
+
+from config import (
+    RATE_LIMIT_START_RPS,
+    RATE_LIMIT_MIN_RPS,
+    RATE_LIMIT_MAX_RPS,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_INCREASE,
+    RATE_LIMIT_DECREASE,
+    RATE_LIMIT_SOFT_DECREASE,
+    RATE_LIMIT_LATENCY_SPIKE,
+    RATE_LIMIT_COOLDOWN_BASE,
+    RATE_LIMIT_COOLDOWN_MAX
+)
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate adapts with AIMD.
+
+    Every navigation, review page turn and review API call takes a token.
+    Successes raise the rate additively; throttling signals (HTTP 429/403,
+    captcha, latency spikes) cut it multiplicatively, and hard signals also
+    pause the bucket for a jittered, exponentially growing cooldown. One
+    instance per domain is shared by every page and worker thread of the
+    process (see ``get_limiter``).
+    """
+
+    def __init__(self, name: str = "default", rate: float = RATE_LIMIT_START_RPS,
+                 min_rate: float = RATE_LIMIT_MIN_RPS, max_rate: float = RATE_LIMIT_MAX_RPS,
+                 burst: float = RATE_LIMIT_BURST, log: logging.Logger = None):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.logger = log or logger
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self._latency_avg = None
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttles = 0
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens and return how long the caller must wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= cost
+            delay = max(0.0, -self._tokens / self.rate, self._cooldown_until - now)
+            self.acquired += 1
+            self.waited += delay
+        # Jitter keeps parallel workers from waking in lockstep
+        return delay * random.uniform(1.0, 1.1) if delay else 0.0
+
+    def acquire(self, cost: float = 1.0) -> float:
+        delay = self.reserve(cost)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, cost: float = 1.0) -> float:
+        delay = self.reserve(cost)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    def on_success(self, latency: float = None):
+        """Additive increase; a latency spike counts as a soft throttle instead."""
+        with self._lock:
+            if latency is not None:
+                spike = self._latency_avg is not None and latency > self._latency_avg * RATE_LIMIT_LATENCY_SPIKE
+                self._latency_avg = latency if self._latency_avg is None else 0.8 * self._latency_avg + 0.2 * latency
+                if spike:
+                    self._decrease(RATE_LIMIT_SOFT_DECREASE, f"latency spike ({latency:.1f}s)")
+                    return
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + RATE_LIMIT_INCREASE)
+            metrics.set_gauge("rate_limit_rps", self.rate, domain=self.name)
+
+    def on_throttle(self, reason: str, soft: bool = False):
+        """Multiplicative decrease; hard signals also start a backoff cooldown."""
+        with self._lock:
+            if soft:
+                self._decrease(RATE_LIMIT_SOFT_DECREASE, reason)
+                return
+            self._decrease(RATE_LIMIT_DECREASE, reason)
+            self._consecutive_throttles += 1
+            cooldown = min(RATE_LIMIT_COOLDOWN_MAX, RATE_LIMIT_COOLDOWN_BASE * 2 ** (self._consecutive_throttles - 1))
+            cooldown = random.uniform(cooldown / 2, cooldown)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+            self._tokens = min(self._tokens, 0.0)
+            self.logger.warning(f"[{self.name}] Throttled ({reason}): pausing {cooldown:.0f}s, rate now {self.rate:.2f} req/s")
+
+    def _decrease(self, factor: float, reason: str):
+        self.throttles += 1
+        metrics.inc("throttles_total", reason=reason.split(" (")[0])
+        self.rate = max(self.min_rate, self.rate * factor)
+        metrics.set_gauge("rate_limit_rps", self.rate, domain=self.name)
+        self.logger.info(f"[{self.name}] Slowing down ({reason}): {self.rate:.2f} req/s")
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "rate": round(self.rate, 3),
+            "acquired": self.acquired,
+            "throttles": self.throttles,
+            "waited_s": round(self.waited, 1)
+        }
+
+    def log_stats(self, log: logging.Logger = None):
+        s = self.stats()
+        (log or self.logger).info(
+            f"Rate limiter [{s['name']}]: {s['acquired']} requests, {s['throttles']} slow-downs, "
+            f"{s['waited_s']}s waited, final rate {s['rate']} req/s"
+        )
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def domain_of(url: str) -> str:
+    """Registrable part of a URL's host ("www.agoda.com" -> "agoda.com")."""
+    host = urlparse(url).hostname or url
+    parts = host.split(".")
+    return ".".join(parts[-2:]) if len(parts) > 2 and not host.replace(".", "").isdigit() else host
+
+
+def get_limiter(url_or_domain: str, **kwargs) -> AdaptiveRateLimiter:
+    """Process-wide limiter for a domain, created on first use."""
+    domain = domain_of(url_or_domain) if "/" in url_or_domain else url_or_domain
+    with _limiters_lock:
+        if domain not in _limiters:
+            _limiters[domain] = AdaptiveRateLimiter(domain, **kwargs)
+        return _limiters[domain]
@@ -0,0 +1,139 @@
+"""
+Local stub of Agoda's review API for offline runs of the HTTP engine.
+
+Recorded payloads are served from ``<fixtures>/<hotel_id>/page_<n>.json``.
+Hotels without fixtures get synthetic reviews so throughput can be measured
+without touching Agoda:
+
+    python scraper/replay_server.py --fixtures data/fixtures --port 8765
+    python scraper/main.py --engine http --api-endpoint http://127.0.0.1:8765/api/cronos/property/review/ReviewComments ...
+"""
+
+import os
+import gzip
+import json
+import time
+import argparse
+import threading
+from datetime import date, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def synthetic_page(hotel_id, page_num: int, page_size: int, total: int):
+    """Generate a review API payload with deterministic fake comments."""
+    start = (page_num - 1) * page_size
+    comments = []
+    for i in range(start, min(start + page_size, total)):
+        comments.append({
+            "hotelReviewId": int(hotel_id or 0) * 100000 + i,
+            "rating": round(6 + (i % 40) / 10, 1),
+            "ratingText": "Excellent",
+            "reviewTitle": f"Review {i}",
+            "reviewComments": f"Synthetic review {i} for hotel {hotel_id}.",
+            "reviewDate": (date(2025, 10, 1) - timedelta(days=i)).isoformat() + "T00:00:00+07:00",
+            "reviewerInfo": {
+                "displayMemberName": f"Guest {i}",
+                "countryName": "Vietnam",
+                "reviewGroupName": "Couple",
+                "roomTypeName": "Deluxe Room",
+                "lengthOfStay": 1 + i % 4
+            }
+        })
+    return {"commentList": {"comments": comments}, "totalCount": total}
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    fixtures_dir = None
+    synthetic_total = 200
+    latency = 0.0
+    page_size_cap = None  # serve at most this many reviews per page, like an API ignoring pageSize
+    fail_statuses = None  # statuses answered to the first requests, in order (e.g. [429])
+    served = None  # (hotel_id, page) of every request served
+    lock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_error(400, "Invalid JSON body")
+            return
+
+        hotel_id = body.get("hotelId")
+        page_num = int(body.get("page", 1))
+        page_size = int(body.get("pageSize", 20))
+        if self.page_size_cap:
+            page_size = min(page_size, self.page_size_cap)
+
+        with self.lock:
+            self.served.append((hotel_id, page_num))
+            status = self.fail_statuses.pop(0) if self.fail_statuses else None
+        if status:
+            self.send_error(status)
+            return
+
+        payload = None
+        if self.fixtures_dir:
+            path = os.path.join(self.fixtures_dir, str(hotel_id), f"page_{page_num}.json")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+        if payload is None:
+            payload = synthetic_page(hotel_id, page_num, page_size, self.synthetic_total)
+
+        if self.latency:
+            time.sleep(self.latency)
+        self._send_json(payload)
+
+    def _send_json(self, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(port: int = 0, fixtures_dir: str = None, synthetic_total: int = 200, latency: float = 0.0,
+                 page_size_cap: int = None, fail_statuses: list = None):
+    """Start the stub in a background thread; returns (server, endpoint_url).
+
+    ``server.RequestHandlerClass.served`` records every (hotel_id, page) served.
+    """
+    handler = type("ConfiguredReplayHandler", (ReplayHandler,), {
+        "fixtures_dir": fixtures_dir,
+        "synthetic_total": synthetic_total,
+        "latency": latency,
+        "page_size_cap": page_size_cap,
+        "fail_statuses": list(fail_statuses or []),
+        "served": [],
+        "lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/api/cronos/property/review/ReviewComments"
+    return server, endpoint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay stub for Agoda's review API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", type=str, help="Directory of recorded <hotel_id>/page_<n>.json payloads")
+    parser.add_argument("--synthetic-total", type=int, default=200, help="Reviews per hotel when no fixture exists")
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial latency per request (seconds)")
+    args = parser.parse_args()
+
+    server, endpoint = start_server(args.port, args.fixtures, args.synthetic_total, args.latency)
+    print(f"Serving review API stub at {endpoint}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,86 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable
+
+from config import (
+    BLOCKED_RESOURCE_TYPES,
+    BLOCKED_URL_PATTERNS,
+    BLOCKED_BYTES_ESTIMATE
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceBlocker:
+    """Abort heavy or tracking requests via ``context.route``.
+
+    Aborted requests are never downloaded, so bytes saved are estimated from
+    ``BLOCKED_BYTES_ESTIMATE`` per resource type. Bytes actually loaded are
+    taken from response ``Content-Length`` headers where present.
+    """
+
+    def __init__(self, resource_types: Iterable[str] = BLOCKED_RESOURCE_TYPES,
+                 url_patterns: Iterable[str] = BLOCKED_URL_PATTERNS):
+        self.resource_types = set(resource_types)
+        self.url_patterns = tuple(url_patterns)
+        self.blocked = Counter()
+        self.allowed = 0
+        self.bytes_loaded = 0
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            return True
+        return any(pattern in url for pattern in self.url_patterns)
+
+    def _decide(self, request) -> bool:
+        resource_type = request.resource_type
+        if self.should_block(resource_type, request.url):
+            self.blocked[resource_type] += 1
+            return True
+        self.allowed += 1
+        return False
+
+    def handle_route(self, route):
+        if self._decide(route.request):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def handle_route_async(self, route):
+        if self._decide(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _on_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+
+    def attach(self, context):
+        context.route("**/*", self.handle_route)
+        context.on("response", self._on_response)
+
+    async def attach_async(self, context):
+        await context.route("**/*", self.handle_route_async)
+        context.on("response", self._on_response)
+
+    def stats(self) -> Dict:
+        bytes_saved = sum(BLOCKED_BYTES_ESTIMATE.get(t, BLOCKED_BYTES_ESTIMATE["other"]) * n
+                          for t, n in self.blocked.items())
+        return {
+            "requests_blocked": sum(self.blocked.values()),
+            "requests_allowed": self.allowed,
+            "blocked_by_type": dict(self.blocked),
+            "bytes_saved_estimate": bytes_saved,
+            "bytes_loaded": self.bytes_loaded
+        }
+
+    def log_stats(self, log: logging.Logger = None):
+        s = self.stats()
+        (log or logger).info(
+            f"Resource blocking: {s['requests_blocked']} requests blocked "
+            f"(~{s['bytes_saved_estimate'] / 1e6:.1f} MB saved), "
+            f"{s['requests_allowed']} allowed ({s['bytes_loaded'] / 1e6:.1f} MB loaded). "
+            f"By type: {s['blocked_by_type']}"
+        )
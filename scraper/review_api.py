@@ -0,0 +1,238 @@
+import copy
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from config import (
+    REVIEW_API_URL,
+    REVIEW_API_PAGE_SIZE,
+    REVIEW_API_CONCURRENCY,
+    REVIEW_API_TIMEOUT,
+    REVIEW_API_DEFAULT_PAYLOAD,
+    DEFAULT_USER_AGENT,
+    THROTTLE_STATUSES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX
+)
+from review_interceptor import map_review_payload, review_total, find_hotel_id
+from utils import ResultSink, split_at_stop_date, split_at_seen, resolve_stop_date, review_key, hotel_result, hotel_id_from_url
+from checkpoint import STATUS_COMPLETED
+from rate_limiter import AdaptiveRateLimiter, get_limiter
+from metrics import metrics
+
+class ThrottledError(Exception):
+    """The review API answered with a throttling status."""
+
+
+class ReviewApiClient:
+    """Page through a hotel's reviews over plain HTTP, without a browser.
+
+    A pooled ``requests.Session`` keeps connections alive and negotiates gzip.
+    Pages are requested in waves of ``concurrency`` so deep hotels do not pay
+    one round trip per page.
+    """
+
+    def __init__(self, payload_template: Dict, endpoint: str = REVIEW_API_URL, cookies: Dict[str, str] = None,
+                 headers: Dict[str, str] = None, concurrency: int = REVIEW_API_CONCURRENCY,
+                 page_size: int = REVIEW_API_PAGE_SIZE, logger: logging.Logger = None,
+                 rate_limiter: AdaptiveRateLimiter = None):
+        self.endpoint = endpoint
+        self.rate_limiter = rate_limiter or get_limiter(endpoint)
+        self.payload_template = payload_template
+        self.concurrency = max(1, concurrency)
+        self.page_size = page_size
+        self.total_reviews = None  # as reported by the API, once a page has been fetched
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Content-Type": "application/json"
+        })
+        if headers:
+            self.session.headers.update(headers)
+        if cookies:
+            self.session.cookies.update(cookies)
+
+    @property
+    def hotel_id(self):
+        return self.payload_template.get("hotelId")
+
+    def close(self):
+        self.session.close()
+
+    @retry(retry=retry_if_exception_type((ThrottledError, requests.ConnectionError, requests.Timeout)),
+           stop=stop_after_attempt(4), reraise=True,
+           wait=wait_random_exponential(multiplier=RETRY_BACKOFF_BASE, max=RETRY_BACKOFF_MAX),
+           before_sleep=lambda state: metrics.inc("retries_total", step="review_api.page"))
+    def fetch_page(self, page_num: int) -> List[Dict]:
+        """Fetch one review page and map it onto the review schema."""
+        payload = copy.deepcopy(self.payload_template)
+        payload["page"] = page_num
+        payload["pageSize"] = self.page_size
+        self.rate_limiter.acquire()
+        with metrics.span("review_api.page"):
+            started = time.perf_counter()
+            resp = self.session.post(self.endpoint, json=payload, timeout=REVIEW_API_TIMEOUT)
+            if resp.status_code in THROTTLE_STATUSES:
+                self.rate_limiter.on_throttle(f"HTTP {resp.status_code}")
+                raise ThrottledError(f"Review API returned {resp.status_code} for page {page_num}")
+            resp.raise_for_status()
+            self.rate_limiter.on_success(time.perf_counter() - started)
+            data = resp.json()
+            reviews = map_review_payload(data)
+            total = review_total(data)
+            if total is not None:
+                self.total_reviews = total
+        metrics.inc("review_pages_total", source="review_api")
+        return reviews
+
+    def fetch_reviews(self, max_reviews: int = 50, stop_date: object = None, start_page: int = 1,
+                      on_page: Callable[[int, List[Dict], List[Dict]], None] = None, seen_keys: set = None) -> List[Dict]:
+        """Collect up to ``max_reviews`` reviews newer than ``stop_date`` and not in ``seen_keys``.
+
+        ``on_page(page_num, valid_reviews, raw_reviews)`` is called for every
+        page consumed, in page order. Paging ends on an empty page or once the
+        API's reported total is reached; a short page alone does not end it,
+        since the API may cap ``pageSize`` below what was asked for.
+        """
+        all_reviews = []
+        page_num = start_page
+        page_len = 0  # largest page actually returned
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while len(all_reviews) < max_reviews:
+                remaining_pages = -(-(max_reviews - len(all_reviews)) // self.page_size)
+                wave = list(range(page_num, page_num + min(self.concurrency, remaining_pages)))
+                self.logger.info(f"[hotel {self.hotel_id}] Fetching review pages {wave[0]}-{wave[-1]} over HTTP...")
+                pages = list(executor.map(self.fetch_page, wave))
+
+                for offset, reviews in enumerate(pages):
+                    if not reviews:
+                        return all_reviews[:max_reviews]
+
+                    valid_reviews, hit_stop_date = split_at_stop_date(reviews, stop_date)
+                    valid_reviews, hit_seen = split_at_seen(valid_reviews, seen_keys)
+                    all_reviews.extend(valid_reviews)
+                    if on_page:
+                        on_page(wave[offset], valid_reviews, reviews)
+                    if hit_stop_date or hit_seen:
+                        reason = f"a review dated on or before {stop_date}" if hit_stop_date else "an already-scraped review"
+                        self.logger.info(f"Reached {reason}. Stopping for hotel {self.hotel_id}.")
+                        return all_reviews[:max_reviews]
+                    page_len = max(page_len, len(reviews))
+                    if self.total_reviews is not None and wave[offset] * page_len >= self.total_reviews:
+                        return all_reviews[:max_reviews]
+
+                page_num += len(wave)
+
+        return all_reviews[:max_reviews]
+
+    @classmethod
+    def from_scraper(cls, scraper, **kwargs) -> "ReviewApiClient":
+        """Build a client from the cookies and review request of an open hotel page.
+
+        The captured review request is only reused when it is for the hotel
+        on the page; a request left over from the previous hotel is ignored.
+        """
+        hotel_id = find_hotel_id(scraper.page.url, scraper.page.content())
+        payload = None
+        if scraper.review_collector and hotel_id:
+            payload = scraper.review_collector.request_payload(hotel_id)
+        if not payload:
+            payload = copy.deepcopy(REVIEW_API_DEFAULT_PAYLOAD)
+            payload["hotelId"] = hotel_id
+        if not payload.get("hotelId"):
+            raise ValueError(f"Could not determine hotel ID for {scraper.page.url}")
+
+        cookies = {c["name"]: c["value"] for c in scraper.context.cookies()}
+        headers = {"Referer": scraper.page.url}
+        return cls(payload, cookies=cookies, headers=headers, logger=scraper.logger, **kwargs)
+
+
+def scrape_hotel_via_api(scraper, url: str, max_reviews: int = 50, stop_date: object = None, **client_kwargs) -> Dict:
+    """Scrape a hotel with one browser visit for bootstrap and HTTP for every review page.
+
+    Returns the same structure as ``AgodaScraper.scrape_hotel`` and honours
+    the scraper's checkpoint store (pages are fetched directly, so resuming
+    costs nothing).
+    """
+    with metrics.span("hotel"):
+        result = _scrape_hotel_via_api(scraper, url, max_reviews, stop_date, **client_kwargs)
+    metrics.inc("hotels_total")
+    return result
+
+
+def _scrape_hotel_via_api(scraper, url: str, max_reviews: int, stop_date: object, **client_kwargs) -> Dict:
+    checkpoint = scraper.checkpoint
+    state = checkpoint.get(url) if checkpoint else None
+    if state and state["status"] == STATUS_COMPLETED:
+        scraper.logger.info(f"Checkpoint: '{state['hotel_name']}' already completed, skipping.")
+        return hotel_result(state["hotel_name"], url, state["overall_statistics"], state["reviews"], max_reviews)
+
+    hotel_name, overall_stats = scraper.open_hotel(url, with_stats=not (state and state["overall_statistics"]))
+    done_reviews, start_page = [], 1
+    if state:
+        overall_stats = overall_stats or state["overall_statistics"]
+        done_reviews, start_page = state["reviews"], state["last_page"] + 1
+    if checkpoint:
+        checkpoint.start_hotel(url, hotel_name, overall_stats)
+
+    index = scraper.index
+    hotel_id = hotel_id_from_url(url)
+    seen_keys = index.keys_for(hotel_id, hotel_name) if index else set()
+    if seen_keys:
+        stop_date = None
+
+    def save_page(page_num, valid_reviews, raw_reviews):
+        if checkpoint:
+            with metrics.span("checkpoint.write"):
+                checkpoint.save_page(url, page_num, valid_reviews, review_key(raw_reviews[-1]))
+
+    client = ReviewApiClient.from_scraper(scraper, **client_kwargs)
+    try:
+        new_reviews = client.fetch_reviews(max_reviews=max(0, max_reviews - len(done_reviews)), stop_date=stop_date,
+                                           start_page=start_page, on_page=save_page, seen_keys=seen_keys)
+    finally:
+        client.close()
+
+    if index:
+        index.add(hotel_id, new_reviews)
+
+    if checkpoint:
+        checkpoint.complete(url)
+    metrics.inc("reviews_total", len(new_reviews))
+    return hotel_result(hotel_name, url, overall_stats, done_reviews + new_reviews, max_reviews)
+
+
+def scrape_multiple_via_api(scraper, search_url: str, max_hotels: int = 3, reviews_per_hotel: int = 20,
+                            stop_dates: Dict[str, object] = None, output_path: str = "agoda_reviews.json",
+                            hotels: List[Dict] = None, catalogue=None, **client_kwargs) -> List[Dict]:
+    """HTTP-engine counterpart of ``AgodaScraper.scrape_multiple``."""
+    target_hotels = hotels if hotels is not None else scraper._discover_hotels(search_url, max_hotels, catalogue)
+    sink = ResultSink(output_path, scraper.logger)
+    target_hotels = [h for h in target_hotels if h["hotel_link"] not in sink.completed_urls]
+    for i, hotel in enumerate(target_hotels):
+        scraper.logger.info(f"Processing hotel {i+1}/{len(target_hotels)}")
+        stop_date = resolve_stop_date(hotel["hotel_name"], stop_dates, hotel["hotel_link"])
+        try:
+            data = scrape_hotel_via_api(scraper, hotel["hotel_link"], max_reviews=reviews_per_hotel,
+                                        stop_date=stop_date, **client_kwargs)
+            with metrics.span("sink.write"):
+                sink.add(data)
+        except Exception as e:
+            scraper.logger.error(f"Failed to scrape hotel {hotel['hotel_link']}: {e}")
+            metrics.inc("hotels_failed_total")
+
+    sink.close()
+    return sink.results
@@ -0,0 +1,221 @@
+import re
+import json
+import logging
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from config import REVIEW_API_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+HOTEL_ID_PATTERNS = (
+    re.compile(r'"hotelId"\s*:\s*(\d+)'),
+    re.compile(r'[?&]hotel_id=(\d+)'),
+)
+
+# Replays the captured review request for several pages at once from inside
+# the page, so the site's own cookies and origin apply; one evaluate round
+# trip returns every page.
+PREFETCH_REVIEWS_JS = """
+    async ([url, method, headers, body, pages]) => Promise.all(pages.map(async (page) => {
+        const payload = JSON.parse(body);
+        payload.page = page;
+        try {
+            const r = await fetch(url, {method, headers, body: JSON.stringify(payload), credentials: "include"});
+            return {page, status: r.status, data: r.ok ? await r.json() : null};
+        } catch (e) {
+            return {page, status: 0, data: null, error: String(e)};
+        }
+    }))
+"""
+
+
+def is_review_api_url(url: str) -> bool:
+    """Whether a response URL belongs to Agoda's review widget API."""
+    return any(pattern in url for pattern in REVIEW_API_PATTERNS)
+
+
+def find_hotel_id(url: str, html: str = "") -> Optional[int]:
+    """Find Agoda's numeric hotel ID in a hotel URL or page source."""
+    for pattern in HOTEL_ID_PATTERNS:
+        match = pattern.search(url) or pattern.search(html)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _format_review_date(comment: Dict) -> Optional[str]:
+    """Render the API date the way the review widget shows it ("Reviewed October 02, 2025")."""
+    formatted = comment.get("formattedReviewDate")
+    if formatted:
+        return formatted if formatted.startswith("Reviewed") else f"Reviewed {formatted}"
+
+    raw = comment.get("reviewDate")
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw[:10]).strftime("Reviewed %B %d, %Y")
+    except ValueError:
+        return raw
+
+
+def _find_comments(payload) -> List[Dict]:
+    """Locate the list of review comments inside a review API payload."""
+    if isinstance(payload, list):
+        return payload
+    if not isinstance(payload, dict):
+        return []
+    for key in ("comments", "reviews"):
+        if isinstance(payload.get(key), list):
+            return payload[key]
+    for key in ("commentList", "data", "result"):
+        if isinstance(payload.get(key), (dict, list)):
+            comments = _find_comments(payload[key])
+            if comments:
+                return comments
+    return []
+
+
+def review_total(payload) -> Optional[int]:
+    """Total review count reported by a review API payload, if any."""
+    if not isinstance(payload, dict):
+        return None
+    for key in ("totalCount", "totalReviews", "total"):
+        if isinstance(payload.get(key), int):
+            return payload[key]
+    for key in ("commentList", "data", "result"):
+        total = review_total(payload.get(key))
+        if total is not None:
+            return total
+    return None
+
+
+def map_review_payload(payload) -> List[Dict]:
+    """Map a review API payload onto the INDIVIDUAL_REVIEWS_QUERY schema."""
+    reviews = []
+    for c in _find_comments(payload):
+        info = c.get("reviewerInfo") or {}
+        nights = info.get("lengthOfStay")
+        reviews.append({
+            "reviewer_score": c.get("rating"),
+            "reviewer_score_text": c.get("ratingText"),
+            "reviewer_name": info.get("displayMemberName"),
+            "reviewer_country": info.get("countryName"),
+            "traveler_type": info.get("reviewGroupName"),
+            "room_type": info.get("roomTypeName"),
+            "stay_duration": f"Stayed {nights} night{'s' if nights != 1 else ''}" if nights else None,
+            "review_title": c.get("reviewTitle"),
+            "review_text": c.get("reviewComments"),
+            "review_date": _format_review_date(c)
+        })
+    return reviews
+
+
+class ReviewResponseCollector:
+    """Capture review API responses fired by the page's review widget.
+
+    Responses are stored as they arrive and only parsed when consumed, so the
+    event handler never blocks the page. The latest captured request is kept
+    as ``last_request`` so other fetchers can replay it; ``reset`` forgets it
+    when the page moves on to another hotel.
+    """
+
+    def __init__(self):
+        self._responses = []
+        self.last_request: Optional[Dict] = None
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    def detach(self, page):
+        page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response):
+        if response.status != 200 or not is_review_api_url(response.url):
+            return
+        self._responses.append(response)
+        request = response.request
+        self.last_request = {
+            "url": request.url,
+            "method": request.method,
+            "headers": dict(request.headers),
+            "post_data": request.post_data
+        }
+
+    def clear(self):
+        self._responses.clear()
+
+    def reset(self):
+        """Forget captured responses and the replayable request, e.g. before opening another hotel."""
+        self._responses.clear()
+        self.last_request = None
+
+    def has_pending(self) -> bool:
+        return bool(self._responses)
+
+    def pop_reviews(self) -> Optional[List[Dict]]:
+        """Reviews from the latest captured response, or None if nothing usable was captured."""
+        responses, self._responses = self._responses, []
+        for response in reversed(responses):
+            try:
+                reviews = map_review_payload(response.json())
+            except Exception as e:
+                logger.debug(f"Unreadable review payload from {response.url}: {e}")
+                continue
+            if reviews:
+                return reviews
+        return None
+
+    async def pop_reviews_async(self) -> Optional[List[Dict]]:
+        """Async variant of ``pop_reviews`` for playwright.async_api pages."""
+        responses, self._responses = self._responses, []
+        for response in reversed(responses):
+            try:
+                reviews = map_review_payload(await response.json())
+            except Exception as e:
+                logger.debug(f"Unreadable review payload from {response.url}: {e}")
+                continue
+            if reviews:
+                return reviews
+        return None
+
+    def request_payload(self, hotel_id: Optional[int] = None) -> Optional[Dict]:
+        """JSON body of the last captured review request, if it had one.
+
+        With ``hotel_id`` a request captured for another hotel counts as none.
+        """
+        if not self.last_request or not self.last_request.get("post_data"):
+            return None
+        try:
+            payload = json.loads(self.last_request["post_data"])
+        except ValueError:
+            return None
+        if hotel_id is not None and str(payload.get("hotelId")) != str(hotel_id):
+            return None
+        return payload
+
+    def prefetch_args(self, pages: List[int], hotel_id: Optional[int] = None) -> Optional[list]:
+        """Arguments for ``PREFETCH_REVIEWS_JS``, or None when no JSON review request (for ``hotel_id``) was captured."""
+        if self.request_payload(hotel_id) is None:
+            return None
+        # Pseudo-headers and browser-managed headers cannot be set from fetch()
+        headers = {k: v for k, v in self.last_request["headers"].items()
+                   if not k.startswith(":") and k.lower() not in ("cookie", "content-length", "host")}
+        return [self.last_request["url"], self.last_request["method"], headers, self.last_request["post_data"], pages]
+
+
+def parse_prefetched(results: List[Dict]) -> Tuple[List[List[Dict]], bool, Optional[int]]:
+    """Split prefetch results into (review pages in order, reviews exhausted, failing HTTP status).
+
+    Pages are kept up to the first failed or empty one; an empty page means
+    the hotel has no more reviews.
+    """
+    pages = []
+    for result in sorted(results or [], key=lambda r: r["page"]):
+        if result.get("status") != 200 or result.get("data") is None:
+            return pages, False, result.get("status")
+        reviews = map_review_payload(result["data"])
+        if not reviews:
+            return pages, True, None
+        pages.append(reviews)
+    return pages, False, None
@@ -0,0 +1,116 @@
+import math
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from config import (
+    SCHEDULE_BUDGET_MINUTES,
+    SCHEDULE_VELOCITY_DAYS,
+    SCHEDULE_HOTEL_OVERHEAD_S,
+    SCHEDULE_PAGE_COST_S,
+    SCHEDULE_REVIEWS_PER_PAGE,
+    SCHEDULE_NEW_HOTEL_REVIEWS,
+    SCHEDULE_MIN_EXPECTED
+)
+from utils import hotel_id_from_url
+
+
+def _to_date(value) -> Optional[date]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)[:19]).date()
+    except ValueError:
+        return None
+
+
+def parse_review_total(value) -> Optional[int]:
+    """Turn ``total_reviews`` values such as "1,234 reviews" into an int."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def estimate_minutes(reviews: float) -> float:
+    """Browser minutes to open a hotel and page through ``reviews`` reviews."""
+    pages = max(1, math.ceil(reviews / SCHEDULE_REVIEWS_PER_PAGE))
+    return (SCHEDULE_HOTEL_OVERHEAD_S + pages * SCHEDULE_PAGE_COST_S) / 60
+
+
+class ScrapeScheduler:
+    """Rank catalogue hotels by expected new reviews and fit them into a budget.
+
+    ``review_stats`` maps the stable hotel ID to what the ``reviews`` table
+    already holds: ``latest`` (newest review date) and ``recent`` (reviews in
+    the last ``SCHEDULE_VELOCITY_DAYS`` days). Expected new reviews are the
+    larger of the growth of Agoda's review total since the last scrape
+    (``review_count`` minus ``scraped_review_count``), and the review velocity
+    times the days since the last scrape. Hotels are then picked greedily by expected reviews per
+    browser-minute until ``budget_minutes`` is spent.
+    """
+
+    def __init__(self, review_stats: Dict[str, Dict] = None, budget_minutes: float = SCHEDULE_BUDGET_MINUTES,
+                 max_reviews: int = 20, logger: logging.Logger = None, today: date = None):
+        self.review_stats = review_stats or {}
+        self.budget_minutes = budget_minutes
+        self.max_reviews = max_reviews
+        self.logger = logger or logging.getLogger(__name__)
+        self.today = today or date.today()
+
+    def expected_new_reviews(self, hotel: Dict) -> float:
+        hotel_id = hotel.get("hotel_id") or hotel_id_from_url(hotel.get("hotel_link"))
+        stats = self.review_stats.get(hotel_id)
+        total = parse_review_total(hotel.get("review_count"))
+        scraped_total = parse_review_total(hotel.get("scraped_review_count"))
+        if not stats and scraped_total is None:
+            return float(total if total is not None else SCHEDULE_NEW_HOTEL_REVIEWS)
+
+        # Only the growth of the total counts: the table never holds every review
+        # (max_reviews, stop dates, deduplication), so total - held never closes
+        stats = stats or {}
+        gap = max(0, total - scraped_total) if total is not None and scraped_total is not None else 0
+
+        last_seen = _to_date(hotel.get("last_scraped")) or _to_date(stats.get("latest"))
+        days = (self.today - last_seen).days if last_seen else SCHEDULE_VELOCITY_DAYS
+        velocity = (stats.get("recent") or 0) / SCHEDULE_VELOCITY_DAYS
+        return float(max(gap, velocity * max(days, 0)))
+
+    def rank(self, hotels: List[Dict]) -> List[Dict]:
+        """Annotate hotels with expected reviews, cost and priority, best first."""
+        ranked = []
+        for hotel in hotels:
+            expected = self.expected_new_reviews(hotel)
+            collectable = min(expected, self.max_reviews)
+            minutes = estimate_minutes(collectable)
+            ranked.append(dict(hotel, expected_new=round(expected, 1), est_minutes=round(minutes, 2),
+                               priority=collectable / minutes))
+        ranked.sort(key=lambda h: h["priority"], reverse=True)
+        return ranked
+
+    def plan(self, hotels: List[Dict]) -> List[Dict]:
+        """Ordered work list that fits the browser-minute budget."""
+        planned, spent, skipped = [], 0.0, 0
+        for hotel in self.rank(hotels):
+            if hotel["expected_new"] < SCHEDULE_MIN_EXPECTED:
+                skipped += 1
+                continue
+            if spent + hotel["est_minutes"] > self.budget_minutes:
+                continue
+            planned.append(hotel)
+            spent += hotel["est_minutes"]
+
+        expected = sum(min(h["expected_new"], self.max_reviews) for h in planned)
+        self.logger.info(
+            f"Schedule: {len(planned)}/{len(hotels)} hotels, ~{spent:.0f}/{self.budget_minutes} browser-minutes, "
+            f"~{expected:.0f} new reviews expected ({skipped} hotels with nothing new skipped)."
+        )
+        for h in planned[:10]:
+            self.logger.info(f"  - {h['hotel_name']}: ~{h['expected_new']} new, {h['est_minutes']} min")
+        return planned
@@ -1,32 +1,74 @@
 import time
+import queue
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from playwright.sync_api import sync_playwright
+from tenacity import Retrying, stop_after_attempt, wait_random_exponential
 from agentql import wrap, configure
 
 from config import (
     AGENTQL_API_KEY,
-    HOTEL_LIST_QUERY,
     OVERALL_REVIEW_STATS_QUERY,
     INDIVIDUAL_REVIEWS_QUERY,
     DEFAULT_VIEWPORT,
-    DEFAULT_USER_AGENT
+    DEFAULT_USER_AGENT,
+    LIGHT_VIEWPORT,
+    BLOCK_RESOURCES,
+    DEFAULT_WORKERS,
+    INTERCEPT_REVIEWS,
+    BACKDROP_SELECTOR,
+    CAPTCHA_SELECTOR,
+    THROTTLE_STATUSES,
+    THROTTLE_RESOURCE_TYPES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    AGODA_HOME_URL,
+    REVIEW_CARD_SELECTOR,
+    FAST_EXTRACT,
+    REVIEW_PREFETCH_PAGES
 )
-from utils import save_data
+from utils import ResultSink, resolve_stop_date, split_at_stop_date, split_at_seen, review_key, hotel_result, hotel_id_from_url
+from review_interceptor import ReviewResponseCollector, PREFETCH_REVIEWS_JS, parse_prefetched, find_hotel_id
+from resource_blocker import ResourceBlocker
+from waits import WaitStrategy
+from checkpoint import CheckpointStore, STATUS_COMPLETED
+from incremental import IncrementalIndex
+from discovery import DiscoveryCrawler, HotelCatalogue
+from rate_limiter import AdaptiveRateLimiter, get_limiter
+from metrics import metrics
+from query_cache import QueryCache
+from extractors import ReviewCardExtractor
 
 # Configure AgentQL
 if AGENTQL_API_KEY:
     configure(api_key=AGENTQL_API_KEY)
 
 class AgodaScraper:
-    def __init__(self, headless: bool = False, slow_mo: int = 300, logger: logging.Logger = None):
+    def __init__(self, headless: bool = False, slow_mo: int = 300, logger: logging.Logger = None, intercept_reviews: bool = INTERCEPT_REVIEWS,
+                 block_resources: bool = BLOCK_RESOURCES, light_viewport: bool = False, checkpoint: CheckpointStore = None,
+                 index: IncrementalIndex = None, rate_limiter: AdaptiveRateLimiter = None, query_cache: QueryCache = None,
+                 fast_extract: bool = FAST_EXTRACT, prefetch_pages: int = REVIEW_PREFETCH_PAGES):
         self.headless = headless
         self.slow_mo = slow_mo
         self.logger = logger or logging.getLogger(__name__)
+        self.intercept_reviews = intercept_reviews
+        self.review_collector = ReviewResponseCollector() if intercept_reviews else None
+        self.block_resources = block_resources
+        self.light_viewport = light_viewport
+        self.resource_blocker = ResourceBlocker() if block_resources else None
+        self.checkpoint = checkpoint
+        self.index = index
+        self.query_cache = query_cache
+        self.card_extractor = ReviewCardExtractor(log=self.logger) if fast_extract else None
+        self.prefetch_pages = prefetch_pages
+        self.rate_limiter = rate_limiter or get_limiter(AGODA_HOME_URL)
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
+        self.waits = WaitStrategy(logger=self.logger)
 
     def start(self):
         """Initialize Playwright and Browser."""
@@ -36,15 +78,41 @@ class AgodaScraper:
             headless=self.headless,
             slow_mo=self.slow_mo if not self.headless else 0
         )
+        self._new_context()
+        self.logger.info("Browser started.")
+
+    def _new_context(self):
+        """Create a fresh isolated context and page on the running browser."""
         self.context = self.browser.new_context(
-            viewport=DEFAULT_VIEWPORT,
+            viewport=LIGHT_VIEWPORT if self.light_viewport else DEFAULT_VIEWPORT,
             user_agent=DEFAULT_USER_AGENT
         )
+        if self.resource_blocker:
+            self.resource_blocker.attach(self.context)
+        self.context.on("response", self._on_response_status)
         self.page = wrap(self.context.new_page())
-        self.logger.info("Browser started.")
+        if self.review_collector:
+            self.review_collector.attach(self.page)
+        self.waits.page = self.page
+
+    def recycle(self):
+        """Replace the context and page to release memory, keeping the browser."""
+        self.logger.info("Recycling browser context...")
+        if self.context:
+            self.context.close()
+        self._new_context()
+
+    def warm_up(self, url: str = AGODA_HOME_URL):
+        """Load a page once so cookies are set and overlays are dismissed."""
+        self.navigate(url)
+        self._turn_off_overlay()
 
     def close(self):
         """Close browser resources."""
+        self.waits.log_report()
+        self.rate_limiter.log_stats(self.logger)
+        if self.resource_blocker:
+            self.resource_blocker.log_stats(self.logger)
         if self.context:
             self.context.close()
         if self.browser:
@@ -56,16 +124,16 @@ class AgodaScraper:
     def _activate_page(self):
         """Right-click to activate Agoda DOM to avoid pointer event interception."""
         try:
-            self.page.wait_for_timeout(1000)
+            self.waits.for_load("activate.load", ceiling_ms=1000)
             self.page.keyboard.press("PageDown")
-            self.page.wait_for_timeout(300)
+            self.waits.for_next_frame("activate.scroll", ceiling_ms=300)
             
             vp = self.page.viewport_size
             cx, cy = vp["width"] // 2, vp["height"] // 2
             
             self.page.mouse.move(cx, cy)
             self.page.mouse.click(cx, cy, button="right")
-            self.page.wait_for_timeout(500)
+            self.waits.for_next_frame("activate.click", ceiling_ms=500)
             self.logger.debug("Right-click activation success.")
         except Exception as e:
             self.logger.warning(f"Right-click activation failed: {e}")
@@ -73,20 +141,23 @@ class AgodaScraper:
     def _turn_off_overlay(self):
         """Attempt to close overlays/backdrops."""
         try:
-            backdrop = self.page.locator("[data-selenium='backdrop']")
+            backdrop = self.page.locator(BACKDROP_SELECTOR)
+            backdrop_gone = lambda: not backdrop.first.is_visible()
             if backdrop.count() > 0 and backdrop.first.is_visible():
                 self.logger.info("Backdrop detected, attempting to close...")
+                metrics.inc("overlays_removed_total")
+                self.rate_limiter.on_throttle("backdrop", soft=True)
                 try:
                     backdrop.first.click()
-                    self.page.wait_for_timeout(200)
-                    return
+                    if self.waits.until("overlay.click", backdrop_gone, ceiling_ms=200):
+                        return
                 except:
                     pass
                 
                 try:
                     self.page.keyboard.press("Escape")
-                    self.page.wait_for_timeout(200)
-                    return
+                    if self.waits.until("overlay.escape", backdrop_gone, ceiling_ms=200):
+                        return
                 except:
                     pass
 
@@ -100,27 +171,52 @@ class AgodaScraper:
                         }
                     }
                 """)
-                self.page.wait_for_timeout(200)
+                self.waits.for_next_frame("overlay.js", ceiling_ms=200)
                 self.logger.info("Backdrop disabled via JS.")
         except Exception as e:
             self.logger.debug(f"Overlay handling error: {e}")
 
+    def _on_response_status(self, response):
+        """Feed throttling status codes of Agoda pages and API calls into the rate limiter."""
+        if (response.status in THROTTLE_STATUSES and self.rate_limiter.name in response.url
+                and response.request.resource_type in THROTTLE_RESOURCE_TYPES):
+            self.rate_limiter.on_throttle(f"HTTP {response.status}")
+
+    def _check_blocked(self):
+        """Raise if the page is a captcha/block page instead of content."""
+        if self.page.locator(CAPTCHA_SELECTOR).count() > 0:
+            self.rate_limiter.on_throttle("captcha")
+            raise RuntimeError("Captcha page detected")
+
     def navigate(self, url: str, max_retries: int = 3):
-        """Navigate to URL with retry logic."""
-        for attempt in range(max_retries):
-            try:
-                self.logger.info(f"Navigating to {url} (Attempt {attempt + 1}/{max_retries})")
-                self.page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                self.page.wait_for_timeout(2000)
-                self._activate_page()
-                return True
-            except Exception as e:
-                self.logger.warning(f"Navigation failed: {e}")
-                if attempt < max_retries - 1:
-                    self.page.wait_for_timeout(2000)
-                else:
-                    self.logger.error("All navigation retries failed.")
-                    raise
+        """Navigate to URL through the rate limiter, retrying with jittered exponential backoff."""
+        retrying = Retrying(stop=stop_after_attempt(max_retries), reraise=True,
+                            wait=wait_random_exponential(multiplier=RETRY_BACKOFF_BASE, max=RETRY_BACKOFF_MAX))
+        try:
+            for attempt in retrying:
+                with attempt, metrics.span("navigate"):
+                    n = attempt.retry_state.attempt_number
+                    if n > 1:
+                        metrics.inc("retries_total", step="navigate")
+                    self.rate_limiter.acquire()
+                    self.logger.info(f"Navigating to {url} (Attempt {n}/{max_retries})")
+                    try:
+                        started = time.perf_counter()
+                        with self.waits.step("navigate.goto"):
+                            response = self.page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                        if response and response.status in THROTTLE_STATUSES:
+                            raise RuntimeError(f"HTTP {response.status}")
+                        self._check_blocked()
+                        self.rate_limiter.on_success(time.perf_counter() - started)
+                    except Exception as e:
+                        self.logger.warning(f"Navigation failed: {e}")
+                        raise
+                    self.waits.for_load("navigate.load", ceiling_ms=2000)
+                    self._activate_page()
+                    return True
+        except Exception:
+            self.logger.error("All navigation retries failed.")
+            raise
         return False
 
     def _click_read_all_reviews(self) -> bool:
@@ -129,10 +225,11 @@ class AgodaScraper:
         locator = self.page.locator("span[label='Read all reviews']")
         
         try:
-            if not locator.is_visible():
-                self._turn_off_overlay()
-            
-            locator.click(force=True, timeout=5000)
+            with metrics.span("read_all_reviews"):
+                if not locator.is_visible():
+                    self._turn_off_overlay()
+
+                locator.click(force=True, timeout=5000)
             self.logger.info("Clicked 'Read all reviews'.")
             return True
         except Exception as e:
@@ -152,147 +249,335 @@ class AgodaScraper:
             cand = loc.nth(i)
             if cand.is_visible():
                 try:
-                    cand.click(force=True, timeout=5000)
-                    try:
-                        self.page.wait_for_load_state("networkidle", timeout=5000)
-                    except:
-                        self.page.wait_for_timeout(500)
+                    with metrics.span("pagination"):
+                        before = self.waits.review_signature()
+                        self.rate_limiter.acquire()
+                        cand.click(force=True, timeout=5000)
+                        self.waits.for_review_list_change("reviews.next_page", before, ceiling_ms=5000, collector=self.review_collector)
                     return True
                 except:
                     continue
         return False
 
-    def scrape_hotel(self, url: str, max_reviews: int = 50, stop_date: object = None) -> Dict:
-        """Scrape a single hotel."""
+    def _query_data(self, query: str, timeout: int, scope: str = None) -> Dict:
+        """Run an AgentQL query, answered from the query cache when ``scope``'s DOM is unchanged."""
+        if self.query_cache:
+            return self.query_cache.query(self.page, query, timeout, scope)
+        return self.page.query_data(query, timeout=timeout)
+
+    def _extract_reviews(self) -> List[Dict]:
+        """Reviews on the current page: intercepted API payload, then review-card selectors, then AgentQL."""
+        if self.review_collector:
+            reviews = self.review_collector.pop_reviews()
+            if reviews:
+                self.logger.info(f"Using {len(reviews)} reviews from intercepted API response.")
+                metrics.inc("review_pages_total", source="intercepted")
+                return reviews
+            self.logger.info("No review payload captured, falling back to page extraction.")
+
+        if self.card_extractor:
+            try:
+                with metrics.span("extract.selectors"):
+                    reviews = self.card_extractor.extract(self.page)
+                if reviews is not None:
+                    metrics.inc("review_pages_total", source="selectors")
+                    return reviews
+            except Exception as e:
+                self.logger.warning(f"Selector extraction failed: {e}")
+
+        with metrics.span("agentql.reviews"):
+            data = self._query_data(INDIVIDUAL_REVIEWS_QUERY, timeout=15000, scope=REVIEW_CARD_SELECTOR)
+        metrics.inc("review_pages_total", source="agentql")
+        return data.get("reviews", [])
+
+    def _prefetch_reviews(self, first_page: int, count: int):
+        """Fetch ``count`` review pages from ``first_page`` in one in-page batch.
+
+        Returns (pages, exhausted), or None when batching is unavailable and the
+        caller should paginate the review list instead.
+        """
+        if not self.review_collector or self.prefetch_pages <= 1:
+            return None
+        args = self.review_collector.prefetch_args(list(range(first_page, first_page + count)),
+                                                   find_hotel_id(self.page.url))
+        if not args:
+            return None
+        self.rate_limiter.acquire(cost=count)
+        try:
+            with metrics.span("reviews.prefetch"):
+                results = self.page.evaluate(PREFETCH_REVIEWS_JS, args)
+        except Exception as e:
+            self.logger.warning(f"Review prefetch failed: {e}")
+            return None
+        finally:
+            # The batch's own responses must not be mistaken for the rendered page's
+            self.review_collector.clear()
+
+        pages, exhausted, status = parse_prefetched(results)
+        if status in THROTTLE_STATUSES:
+            self.rate_limiter.on_throttle(f"HTTP {status}")
+        if not pages and not exhausted:
+            return None
+        if pages:
+            metrics.inc("review_pages_total", len(pages), source="prefetch")
+            self.logger.info(f"Prefetched review pages {first_page}-{first_page + len(pages) - 1} in one batch.")
+        return pages, exhausted
+
+    def open_hotel(self, url: str, with_stats: bool = True):
+        """Open a hotel page and its review list; return (hotel_name, overall_stats)."""
         self.logger.info(f"Scraping hotel: {url}")
+        if self.review_collector:
+            # The previous hotel's review request must not be replayed for this one
+            self.review_collector.reset()
         self.navigate(url)
         
         hotel_name = self.page.title().split(" - ")[0] if " - " in self.page.title() else "Unknown Hotel"
         self.logger.info(f"Hotel Name: {hotel_name}")
 
+        before = self.waits.review_signature()
         if self._click_read_all_reviews():
-            try:
-                self.page.wait_for_load_state("networkidle", timeout=5000)
-            except:
-                self.page.wait_for_timeout(1500)
+            self.waits.for_review_list_change("reviews.open", before, ceiling_ms=5000, collector=self.review_collector)
 
         # Overall Stats
         overall_stats = {}
+        if not with_stats:
+            return hotel_name, overall_stats
         try:
-            overall_stats = self.page.query_data(OVERALL_REVIEW_STATS_QUERY, timeout=10000)
+            with metrics.span("agentql.overall_stats"):
+                overall_stats = self._query_data(OVERALL_REVIEW_STATS_QUERY, timeout=10000)
             self.logger.info(f"Overall Score: {overall_stats.get('overall_score', 'N/A')}")
         except Exception as e:
             self.logger.warning(f"Failed to get overall stats: {e}")
 
+        return hotel_name, overall_stats
+
+    def _skip_to_page(self, target_page: int) -> int:
+        """Click through already-checkpointed review pages without extracting them."""
+        page_num = 1
+        while page_num < target_page and self._click_next_page():
+            page_num += 1
+        if page_num > 1:
+            self.logger.info(f"Checkpoint: resumed at review page {page_num}.")
+        return page_num
+
+    def scrape_hotel(self, url: str, max_reviews: int = 50, stop_date: object = None) -> Dict:
+        """Scrape a single hotel, resuming from the checkpoint store when one is set."""
+        with metrics.span("hotel"):
+            result = self._scrape_hotel(url, max_reviews, stop_date)
+        metrics.inc("hotels_total")
+        metrics.inc("reviews_total", result["total_reviews_scraped"])
+        return result
+
+    def _scrape_hotel(self, url: str, max_reviews: int, stop_date: object) -> Dict:
+        state = self.checkpoint.get(url) if self.checkpoint else None
+        if state and state["status"] == STATUS_COMPLETED:
+            self.logger.info(f"Checkpoint: '{state['hotel_name']}' already completed, skipping.")
+            return hotel_result(state["hotel_name"], url, state["overall_statistics"], state["reviews"], max_reviews)
+
+        hotel_name, overall_stats = self.open_hotel(url, with_stats=not (state and state["overall_statistics"]))
+
         # Reviews
-        from utils import parse_date # Import strictly for usage here
-        
         all_reviews = []
         page_num = 1
+        last_saved = 0
+        if state:
+            overall_stats = overall_stats or state["overall_statistics"]
+            all_reviews = state["reviews"]
+            last_saved = state["last_page"]
+            self.logger.info(f"Checkpoint: resuming '{hotel_name}' with {len(all_reviews)} reviews from {last_saved} pages.")
+            if len(all_reviews) < max_reviews:
+                page_num = self._skip_to_page(last_saved + 1)
+        collected = {review_key(r) for r in all_reviews}
+
+        # Precise incremental stop: first review whose fingerprint is already known
+        hotel_id = hotel_id_from_url(url)
+        seen_keys = self.index.keys_for(hotel_id, hotel_name) if self.index else set()
+        if seen_keys:
+            self.logger.info(f"Incremental index: {len(seen_keys)} known reviews for '{hotel_name}' ({hotel_id}).")
+            stop_date = None
+
+        if self.checkpoint:
+            self.checkpoint.start_hotel(url, hotel_name, overall_stats)
+
         stop_scraping = False
-        
+        prefetched = []  # review pages fetched ahead of the rendered one
+        can_prefetch = True
+        exhausted = False
+        wave = 2
+        dom_page = page_num  # review page currently rendered
+
         while len(all_reviews) < max_reviews and not stop_scraping:
             self.logger.info(f"Scraping reviews page {page_num}...")
             try:
-                data = self.page.query_data(INDIVIDUAL_REVIEWS_QUERY, timeout=15000)
-                reviews = data.get("reviews", [])
+                reviews = prefetched.pop(0) if prefetched else self._extract_reviews()
                 
                 if not reviews:
                     self.logger.info("No reviews found on this page.")
                     break
                 
                 # Check for stop date
-                valid_reviews = []
-                for r in reviews:
-                    r_date_str = r.get("review_date")
-                    r_date = parse_date(r_date_str)
-                    
-                    if stop_date and r_date and r_date <= stop_date:
-                        self.logger.info(f"Encountered old review ({r_date} <= {stop_date}). Stopping scraper for this hotel.")
-                        stop_scraping = True
-                        break # Break inner loop
-                    
-                    valid_reviews.append(r)
+                valid_reviews, stop_scraping = split_at_stop_date(reviews, stop_date)
+                if stop_scraping:
+                    self.logger.info(f"Encountered review older than {stop_date}. Stopping scraper for this hotel.")
+
+                valid_reviews, hit_seen = split_at_seen(valid_reviews, seen_keys)
+                if hit_seen:
+                    self.logger.info("Reached an already-scraped review. Stopping scraper for this hotel.")
+                    stop_scraping = True
+
+                # Drop reviews already collected before a resume
+                valid_reviews = [r for r in valid_reviews if review_key(r) not in collected]
+                collected.update(review_key(r) for r in valid_reviews)
                 
                 all_reviews.extend(valid_reviews)
                 self.logger.info(f"Collected {len(valid_reviews)} new reviews. Total: {len(all_reviews)}/{max_reviews}")
+
+                if self.checkpoint:
+                    last_saved = max(page_num, last_saved + 1)
+                    with metrics.span("checkpoint.write"):
+                        self.checkpoint.save_page(url, last_saved, valid_reviews, review_key(reviews[-1]))
                 
                 if stop_scraping or len(all_reviews) >= max_reviews:
                     break
-                
-                if not self._click_next_page():
+
+                if not prefetched and can_prefetch and not exhausted:
+                    # Batches start small so incremental runs that stop early waste little
+                    pages_left = -(-(max_reviews - len(all_reviews)) // len(reviews))
+                    batch = self._prefetch_reviews(page_num + 1, min(wave, self.prefetch_pages, pages_left))
+                    wave *= 2
+                    if batch is None:
+                        can_prefetch = False
+                    else:
+                        prefetched, exhausted = batch
+                if not prefetched and exhausted:
+                    self.logger.info("No more review pages.")
+                    break
+                if prefetched:
+                    page_num += 1
+                    continue
+
+                # Catch the rendered list up with pages consumed from a prefetch batch
+                while dom_page < page_num and self._click_next_page():
+                    dom_page += 1
+                if dom_page < page_num or not self._click_next_page():
                     self.logger.info("No next page found.")
                     break
-                
+
                 page_num += 1
+                dom_page = page_num
             except Exception as e:
                 self.logger.error(f"Error scraping reviews: {e}")
                 break
 
-        return {
-            "hotel_name": hotel_name,
-            "hotel_url": url,
-            "overall_statistics": overall_stats,
-            "total_reviews_scraped": len(all_reviews),
-            "reviews": all_reviews[:max_reviews]
-        }
-
-    def scrape_multiple(self, search_url: str, max_hotels: int = 3, reviews_per_hotel: int = 20, stop_dates: Dict[str, object] = None, output_path: str = "agoda_reviews.json") -> List[Dict]:
-        """Scrape multiple hotels from search results."""
-        self.logger.info(f"Searching hotels at: {search_url}")
-        self.navigate(search_url)
+        if self.index:
+            self.index.add(hotel_id, all_reviews)
+        if self.checkpoint:
+            self.checkpoint.complete(url)
+        return hotel_result(hotel_name, url, overall_stats, all_reviews, max_reviews)
+
+    def _discover_hotels(self, search_url: str, max_hotels: Optional[int], catalogue: HotelCatalogue = None) -> List[Dict]:
+        """Walk the search results and return up to ``max_hotels`` hotels."""
+        with metrics.span("discover"):
+            hotels = DiscoveryCrawler(self, catalogue, self.logger).crawl(search_url, max_hotels)
+        self.logger.info(f"Found {len(hotels)} hotels.")
+        return [{"hotel_name": h["hotel_name"], "hotel_link": h["hotel_link"]} for h in hotels]
+
+    def scrape_multiple(self, search_url: str, max_hotels: int = 3, reviews_per_hotel: int = 20, stop_dates: Dict[str, object] = None, output_path: str = "agoda_reviews.json", workers: int = DEFAULT_WORKERS,
+                        hotels: List[Dict] = None, catalogue: HotelCatalogue = None) -> List[Dict]:
+        """Scrape multiple hotels from search results, or from ``hotels`` when given (e.g. the catalogue)."""
+        target_hotels = hotels if hotels is not None else self._discover_hotels(search_url, max_hotels, catalogue)
+        if not target_hotels:
+            return []
+
+        sink = ResultSink(output_path, self.logger)
+        if sink.completed_urls:
+            target_hotels = [h for h in target_hotels if h["hotel_link"] not in sink.completed_urls]
+            self.logger.info(f"Resuming {output_path}: {len(sink.completed_urls)} hotels already written, {len(target_hotels)} left.")
+
+        try:
+            if workers > 1 and target_hotels:
+                return self._scrape_parallel(target_hotels, reviews_per_hotel, stop_dates, sink, workers)
+
+            # Pacing between hotels comes from the shared rate limiter in navigate()
+            for i, hotel in enumerate(target_hotels):
+                self.logger.info(f"Processing hotel {i+1}/{len(target_hotels)}")
+                data = self._scrape_target(hotel, reviews_per_hotel, stop_dates)
+                if data:
+                    with metrics.span("sink.write"):
+                        sink.add(data)
+        finally:
+            sink.close()
         
-        # Scroll to load
-        for _ in range(3):
-            self.page.keyboard.press("PageDown")
-            time.sleep(1)
+        return sink.results
+
+    def _scrape_target(self, hotel: Dict, reviews_per_hotel: int, stop_dates: Dict[str, object] = None) -> Optional[Dict]:
+        """Scrape one discovered hotel, returning None on failure."""
+        url = hotel["hotel_link"]
+        hotel_name = hotel.get("hotel_name", "Unknown")
+
+        # Determine stop date for this hotel
+        stop_date = resolve_stop_date(hotel_name, stop_dates, url)
+        if stop_date:
+            self.logger.info(f"Incremental mode: Stopping at date {stop_date} for '{hotel_name}'")
 
-        hotels_list = []
         try:
-            data = self.page.query_data(HOTEL_LIST_QUERY, timeout=15000)
-            hotels_list = data.get("hotels", [])
-            self.logger.info(f"Found {len(hotels_list)} hotels.")
+            return self.scrape_hotel(url, max_reviews=reviews_per_hotel, stop_date=stop_date)
         except Exception as e:
-            self.logger.error(f"Failed to get hotel list: {e}")
-            return []
+            self.logger.error(f"Failed to scrape hotel {url}: {e}")
+            metrics.inc("hotels_failed_total")
+            if self.checkpoint:
+                self.checkpoint.fail(url, str(e))
+            return None
 
-        results = []
-        target_hotels = hotels_list[:max_hotels]
-        
+    def _scrape_parallel(self, target_hotels: List[Dict], reviews_per_hotel: int, stop_dates: Dict[str, object], sink: ResultSink, workers: int) -> List[Dict]:
+        """Scrape hotels concurrently with a pool of worker browsers.
+
+        Playwright's sync API is bound to the thread that started it, so each
+        worker drives its own scraper (browser + isolated context) instead of
+        sharing ``self.browser``. Returned results keep the search-page order;
+        the sink receives them as they complete.
+        """
+        workers = min(workers, len(target_hotels))
+        self.logger.info(f"Parallel mode: {len(target_hotels)} hotels across {workers} workers")
+
+        jobs = queue.Queue()
         for i, hotel in enumerate(target_hotels):
-            url = hotel.get("hotel_link")
-            hotel_name = hotel.get("hotel_name", "Unknown") # Get name from list if possible
-            if not url:
-                continue
-            
-            if url.startswith("/"):
-                url = "https://www.agoda.com" + url
-            
-            self.logger.info(f"Processing hotel {i+1}/{len(target_hotels)}")
-            
-            # Determine stop date for this hotel
-            stop_date = None
-            if stop_dates:
-                # Try exact match or fuzzy match
-                stop_date = stop_dates.get(hotel_name)
-                # You might need better name matching logic here
-                if not stop_date:
-                     for name, date in stop_dates.items():
-                         if name in hotel_name or hotel_name in name:
-                             stop_date = date
-                             break
-            
-            if stop_date:
-                self.logger.info(f"Incremental mode: Stopping at date {stop_date} for '{hotel_name}'")
+            jobs.put((i, hotel))
 
+        results: List[Optional[Dict]] = [None] * len(target_hotels)
+        lock = threading.Lock()
+
+        def run_worker(worker_id: int):
+            worker = type(self)(headless=self.headless, slow_mo=self.slow_mo, logger=self.logger, intercept_reviews=self.intercept_reviews,
+                                  block_resources=self.block_resources, light_viewport=self.light_viewport,
+                                  checkpoint=self.checkpoint, index=self.index, rate_limiter=self.rate_limiter,
+                                  query_cache=self.query_cache, fast_extract=self.card_extractor is not None,
+                                  prefetch_pages=self.prefetch_pages)
             try:
-                data = self.scrape_hotel(url, max_reviews=reviews_per_hotel, stop_date=stop_date)
-                results.append(data)
-                save_data(results, output_path, self.logger)
+                worker.start()
             except Exception as e:
-                self.logger.error(f"Failed to scrape hotel {url}: {e}")
-            
-            if i < len(target_hotels) - 1:
-                time.sleep(3)
-        
-        return results
+                self.logger.error(f"Worker {worker_id} failed to start: {e}")
+                return
+
+            try:
+                while True:
+                    try:
+                        i, hotel = jobs.get_nowait()
+                    except queue.Empty:
+                        break
+
+                    self.logger.info(f"[worker {worker_id}] Processing hotel {i+1}/{len(target_hotels)}")
+                    data = worker._scrape_target(hotel, reviews_per_hotel, stop_dates)
+                    if not data:
+                        continue
+
+                    with lock, metrics.span("sink.write"):
+                        results[i] = data
+                        sink.add(data)
+            finally:
+                worker.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run_worker, range(workers)))
+
+        return [r for r in results if r]
@@ -1,7 +1,9 @@
 import logging
 import json
 import os
-from typing import List, Dict
+import hashlib
+from typing import List, Dict, Iterator, Optional
+from urllib.parse import urlparse, parse_qs
 
 def setup_logging(log_file: str = "scraper.log"):
     """Configure logging."""
@@ -30,6 +32,280 @@ def save_data(data: List[Dict], filename: str, logger=None):
         if os.path.exists(temp_file):
             os.remove(temp_file)
 
+def is_jsonl(filename: str) -> bool:
+    return filename.endswith(".jsonl")
+
+class JsonlWriter:
+    """Append-only JSONL output, one hotel per line.
+
+    Every record is flushed to the OS immediately; ``fsync`` is batched every
+    ``fsync_every`` records. A partial last line left by a crash is trimmed on
+    open so the file can be resumed.
+    """
+
+    def __init__(self, filename: str, fsync_every: int = 10, logger=None):
+        self.filename = filename
+        self.fsync_every = max(1, fsync_every)
+        self.logger = logger
+        self._pending = 0
+        _trim_partial_line(filename)
+        self._file = open(filename, "a", encoding="utf-8")
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+        if self.logger:
+            self.logger.info(f"Closed {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _trim_partial_line(filename: str, chunk_size: int = 65536):
+    """Drop a trailing line without newline (interrupted write)."""
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return
+    with open(filename, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        # Scan backwards for the last complete line
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk_size)
+            f.seek(start)
+            idx = f.read(pos - start).rfind(b"\n")
+            if idx != -1:
+                f.truncate(start + idx + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+def read_jsonl(filename: str) -> Iterator[Dict]:
+    """Stream records from a JSONL file, skipping a truncated final line."""
+    with open(filename, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logging.warning(f"Skipping unreadable line {line_no} in {filename}")
+
+class _JsonStream:
+    """Incremental JSON tokenizer over a text file, reading ``chunk_size`` characters at a time."""
+
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = None) -> bool:
+        if self.eof:
+            return False
+        data = self.f.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, '' at end of input."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON stream, got {ch or 'end of input'!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next complete value, reading more input until it is whole."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+def _stream_hotel(stream: _JsonStream) -> Iterator[tuple]:
+    """Events for one hotel object: ("review", hotel, review) per review, then ("hotel", hotel, None).
+
+    Reviews are decoded one at a time when ``hotel_name`` precedes the
+    ``reviews`` key (as the scraper writes it); otherwise the list is decoded
+    whole so every review still sees the hotel's fields.
+    """
+    hotel = {}
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.expect("}")
+    else:
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "reviews" and "hotel_name" in hotel and stream.peek() == "[":
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.expect("]")
+                else:
+                    while True:
+                        yield "review", hotel, stream.value()
+                        if stream.expect(",]") == "]":
+                            break
+            else:
+                hotel[key] = stream.value()
+            if stream.expect(",}") == "}":
+                break
+    for review in hotel.pop("reviews", None) or []:
+        yield "review", hotel, review
+    yield "hotel", hotel, None
+
+def _stream_json_events(filename: str) -> Iterator[tuple]:
+    """Hotel events from a .json output holding a list of hotels or a single hotel."""
+    with open(filename, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        first = stream.peek()
+        if first == "{":
+            yield from _stream_hotel(stream)
+            return
+        if not first:
+            return
+        stream.expect("[")
+        if stream.peek() == "]":
+            return
+        while True:
+            if stream.peek() == "{":
+                yield from _stream_hotel(stream)
+            else:
+                stream.value()
+            if stream.expect(",]") == "]":
+                return
+
+def iter_hotel_records(filename: str) -> Iterator[Dict]:
+    """Yield hotel records from a scraper .json (list or dict) or .jsonl output.
+
+    Only one hotel is held in memory at a time.
+    """
+    if is_jsonl(filename):
+        yield from read_jsonl(filename)
+        return
+    reviews = []
+    for kind, hotel, review in _stream_json_events(filename):
+        if kind == "review":
+            reviews.append(review)
+        else:
+            yield {**hotel, "reviews": reviews}
+            reviews = []
+
+def iter_reviews(filename: str) -> Iterator[tuple]:
+    """Yield (hotel, review) pairs from a scraper .json or .jsonl output.
+
+    ``hotel`` holds the hotel's other fields (without ``reviews``) and is
+    shared by all of its reviews. Memory is bounded by one review for .json
+    files and by one hotel line for .jsonl files.
+    """
+    if is_jsonl(filename):
+        for record in read_jsonl(filename):
+            hotel = {k: v for k, v in record.items() if k != "reviews"}
+            for review in record.get("reviews") or []:
+                yield hotel, review
+        return
+    for kind, hotel, review in _stream_json_events(filename):
+        if kind == "review":
+            yield hotel, review
+
+def batched(iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most ``size`` items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class ResultSink:
+    """Incremental run output: rewrites a .json file, appends to a .jsonl file."""
+
+    def __init__(self, filename: str, logger=None):
+        self.filename = filename
+        self.logger = logger
+        self.results: List[Dict] = []
+        self.completed_urls = set()
+        self._writer = None
+        if is_jsonl(filename):
+            if os.path.exists(filename):
+                self.completed_urls = {r.get("hotel_url") for r in read_jsonl(filename)}
+            self._writer = JsonlWriter(filename, logger=logger)
+
+    def add(self, data: Dict):
+        self.results.append(data)
+        if self._writer:
+            self._writer.write(data)
+        else:
+            save_data(self.results, self.filename, self.logger)
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+
+def hotel_result(hotel_name: str, hotel_url: str, overall_stats: Dict, reviews: List[Dict], max_reviews: int) -> Dict:
+    """The per-hotel record written by every scrape engine."""
+    return {
+        "hotel_name": hotel_name,
+        "hotel_url": hotel_url,
+        "overall_statistics": overall_stats,
+        "total_reviews_scraped": len(reviews),
+        "reviews": reviews[:max_reviews]
+    }
+
+def save_results(data: List[Dict], filename: str, logger=None):
+    """Final save for a run: full rewrite for .json, append for .jsonl."""
+    if is_jsonl(filename):
+        with JsonlWriter(filename, logger=logger) as writer:
+            for record in data:
+                writer.write(record)
+    else:
+        save_data(data, filename, logger)
+
 from datetime import datetime
 
 def parse_date(date_str):
@@ -47,3 +323,87 @@ def parse_date(date_str):
         except ValueError:
             logging.warning(f"Could not parse date: {date_str}")
             return None
+
+def normalize_hotel_url(url: str) -> str:
+    """Turn a relative Agoda hotel link into an absolute URL."""
+    if url and url.startswith("/"):
+        return "https://www.agoda.com" + url
+    return url
+
+def stop_date_key(hotel_url: str) -> Optional[str]:
+    """``stop_dates`` key of a hotel's stable ID (kept apart from the name keys)."""
+    hotel_id = hotel_id_from_url(hotel_url)
+    return f"id:{hotel_id}" if hotel_id else None
+
+def resolve_stop_date(hotel_name: str, stop_dates: Dict[str, object], hotel_url: str = None):
+    """Find the incremental stop date for a hotel, by stable hotel ID first, then by exact name.
+
+    Search-result names rarely match the page-title names stored in the
+    database, so the ID parsed from ``hotel_url`` is the reliable key;
+    fuzzy substring matching mis-matched similar hotel names.
+    """
+    if not stop_dates:
+        return None
+    key = stop_date_key(hotel_url)
+    if key and key in stop_dates:
+        return stop_dates[key]
+    return stop_dates.get(hotel_name)
+
+def hotel_id_from_url(url: str) -> Optional[str]:
+    """Stable hotel key parsed from an Agoda hotel link.
+
+    Uses the numeric ``hotel_id``/``hid`` query parameter when present,
+    otherwise the ``<slug>/hotel/<city>`` path, which Agoda keeps stable.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    for param in ("hotel_id", "hid", "hotelId"):
+        if query.get(param) and query[param][0].isdigit():
+            return query[param][0]
+    path = parsed.path.lower()
+    if path.endswith(".html"):
+        path = path[:-5]
+    parts = [p for p in path.split("/") if p]
+    # Drop a leading locale segment such as "vi-vn"
+    if len(parts) > 3 and "hotel" in parts and parts.index("hotel") > 1:
+        parts = parts[parts.index("hotel") - 1:]
+    return "/".join(parts) or None
+
+def split_at_stop_date(reviews: List[Dict], stop_date: object = None):
+    """Keep reviews newer than ``stop_date``; report whether an old one was hit."""
+    valid_reviews = []
+    for r in reviews:
+        r_date = parse_date(r.get("review_date"))
+        if stop_date and r_date and r_date <= stop_date:
+            return valid_reviews, True
+        valid_reviews.append(r)
+    return valid_reviews, False
+
+def split_at_seen(reviews: List[Dict], seen_keys: set):
+    """Keep reviews up to the first already-known fingerprint; report whether one was hit."""
+    if not seen_keys:
+        return reviews, False
+    valid_reviews = []
+    for r in reviews:
+        if review_key(r) in seen_keys:
+            return valid_reviews, True
+        valid_reviews.append(r)
+    return valid_reviews, False
+
+def review_key(review: Dict) -> str:
+    """Stable fingerprint of a review (reviewer, review date, start of text).
+
+    Only fields stored in the ``reviews`` table are used, so keys computed
+    from scraped JSON and from database rows match.
+    """
+    r_date = review.get("review_date")
+    if isinstance(r_date, str):
+        r_date = parse_date(r_date) or r_date.replace("Reviewed ", "").strip()
+    parts = [
+        str(review.get("reviewer_name") or "").strip().lower(),
+        r_date.isoformat() if hasattr(r_date, "isoformat") else str(r_date or ""),
+        " ".join(str(review.get("review_text") or "").split())[:200].lower()
+    ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
@@ -0,0 +1,208 @@
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from config import WAIT_POLL_MS, REVIEW_CARD_SELECTOR
+from metrics import metrics
+
+REVIEW_SIGNATURE_JS = """
+    (sel) => {
+        const cards = document.querySelectorAll(sel);
+        if (!cards.length) return "";
+        return cards.length + "|" + cards[0].innerText.slice(0, 200);
+    }
+"""
+
+NEXT_FRAME_JS = "() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)))"
+
+
+class _WaitTimings:
+    """Per-step timing bookkeeping shared by the sync and async strategies."""
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.timings = defaultdict(list)
+        self.timeouts = defaultdict(int)
+
+    def _record(self, name: str, started: float, satisfied: bool):
+        elapsed = time.perf_counter() - started
+        self.timings[name].append(elapsed * 1000)
+        metrics.observe(f"wait.{name}", elapsed)
+        if not satisfied:
+            self.timeouts[name] += 1
+            metrics.inc("wait_ceiling_hits_total", step=name)
+
+    def report(self) -> Dict[str, Dict]:
+        """Count, total/avg/max milliseconds and ceiling hits per wait step."""
+        out = {}
+        for name, values in self.timings.items():
+            out[name] = {
+                "count": len(values),
+                "total_ms": round(sum(values), 1),
+                "avg_ms": round(sum(values) / len(values), 1),
+                "max_ms": round(max(values), 1),
+                "ceiling_hits": self.timeouts[name]
+            }
+        return out
+
+    def log_report(self):
+        report = self.report()
+        if not report:
+            return
+        self.logger.info("Wait timing report:")
+        for name, r in sorted(report.items(), key=lambda kv: -kv[1]["total_ms"]):
+            self.logger.info(
+                f"  - {name}: {r['count']}x, total {r['total_ms']}ms, avg {r['avg_ms']}ms, "
+                f"max {r['max_ms']}ms, ceiling hit {r['ceiling_hits']}x"
+            )
+
+
+class WaitStrategy(_WaitTimings):
+    """Event-driven waits for the sync engine.
+
+    Every wait polls a predicate and returns as soon as it holds; the old
+    fixed delays are only used as ceilings.
+    """
+
+    def __init__(self, page=None, logger: logging.Logger = None, poll_ms: int = WAIT_POLL_MS):
+        super().__init__(logger)
+        self.page = page
+        self.poll_ms = poll_ms
+
+    @contextmanager
+    def step(self, name: str):
+        """Time an arbitrary block under ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, started, True)
+
+    def until(self, name: str, predicate: Callable[[], bool], ceiling_ms: int) -> bool:
+        """Poll ``predicate`` until it holds or ``ceiling_ms`` elapses."""
+        started = time.perf_counter()
+        deadline = started + ceiling_ms / 1000
+        satisfied = False
+        while True:
+            try:
+                satisfied = bool(predicate())
+            except Exception:
+                satisfied = False
+            if satisfied or time.perf_counter() >= deadline:
+                break
+            # wait_for_timeout also lets Playwright dispatch pending events
+            self.page.wait_for_timeout(self.poll_ms)
+        self._record(name, started, satisfied)
+        return satisfied
+
+    def for_load(self, name: str, ceiling_ms: int, state: str = "load") -> bool:
+        started = time.perf_counter()
+        try:
+            self.page.wait_for_load_state(state, timeout=ceiling_ms)
+            satisfied = True
+        except Exception:
+            satisfied = False
+        self._record(name, started, satisfied)
+        return satisfied
+
+    def for_next_frame(self, name: str, ceiling_ms: int) -> bool:
+        """Wait until the page has painted twice (input handlers have run)."""
+        return self.until(name, lambda: self.page.evaluate(NEXT_FRAME_JS) is None, ceiling_ms)
+
+    def review_signature(self) -> str:
+        try:
+            return self.page.evaluate(REVIEW_SIGNATURE_JS, REVIEW_CARD_SELECTOR)
+        except Exception:
+            return ""
+
+    def for_review_list_change(self, name: str, before: str, ceiling_ms: int, collector=None) -> bool:
+        """Wait for the review list to re-render or a review API response to land."""
+        def changed():
+            if collector and collector.has_pending():
+                return True
+            sig = self.review_signature()
+            return bool(sig) and sig != before
+        return self.until(name, changed, ceiling_ms)
+
+    def for_stable_count(self, name: str, selector: str, ceiling_ms: int, stable_polls: int = 2) -> bool:
+        """Wait until the number of ``selector`` matches stops growing."""
+        state = {"count": -1, "stable": 0}
+
+        def stable():
+            count = self.page.locator(selector).count()
+            if count > 0 and count == state["count"]:
+                state["stable"] += 1
+            else:
+                state["stable"] = 0
+            state["count"] = count
+            return state["stable"] >= stable_polls
+        return self.until(name, stable, ceiling_ms)
+
+
+class AsyncWaitStrategy(_WaitTimings):
+    """Async counterpart of ``WaitStrategy`` for playwright.async_api pages."""
+
+    def __init__(self, logger: logging.Logger = None, poll_ms: int = WAIT_POLL_MS):
+        super().__init__(logger)
+        self.poll_ms = poll_ms
+
+    async def until(self, name: str, predicate, ceiling_ms: int) -> bool:
+        """Poll the async ``predicate`` until it holds or ``ceiling_ms`` elapses."""
+        started = time.perf_counter()
+        deadline = started + ceiling_ms / 1000
+        satisfied = False
+        while True:
+            try:
+                satisfied = bool(await predicate())
+            except Exception:
+                satisfied = False
+            if satisfied or time.perf_counter() >= deadline:
+                break
+            await asyncio.sleep(self.poll_ms / 1000)
+        self._record(name, started, satisfied)
+        return satisfied
+
+    async def for_load(self, page, name: str, ceiling_ms: int, state: str = "load") -> bool:
+        started = time.perf_counter()
+        try:
+            await page.wait_for_load_state(state, timeout=ceiling_ms)
+            satisfied = True
+        except Exception:
+            satisfied = False
+        self._record(name, started, satisfied)
+        return satisfied
+
+    async def for_next_frame(self, page, name: str, ceiling_ms: int) -> bool:
+        async def painted():
+            return await page.evaluate(NEXT_FRAME_JS) is None
+        return await self.until(name, painted, ceiling_ms)
+
+    async def review_signature(self, page) -> str:
+        try:
+            return await page.evaluate(REVIEW_SIGNATURE_JS, REVIEW_CARD_SELECTOR)
+        except Exception:
+            return ""
+
+    async def for_review_list_change(self, page, name: str, before: str, ceiling_ms: int, collector=None) -> bool:
+        async def changed():
+            if collector and collector.has_pending():
+                return True
+            sig = await self.review_signature(page)
+            return bool(sig) and sig != before
+        return await self.until(name, changed, ceiling_ms)
+
+    async def for_stable_count(self, page, name: str, selector: str, ceiling_ms: int, stable_polls: int = 2) -> bool:
+        state = {"count": -1, "stable": 0}
+
+        async def stable():
+            count = await page.locator(selector).count()
+            if count > 0 and count == state["count"]:
+                state["stable"] += 1
+            else:
+                state["stable"] = 0
+            state["count"] = count
+            return state["stable"] >= stable_polls
+        return await self.until(name, stable, ceiling_ms)
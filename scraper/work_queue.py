@@ -0,0 +1,250 @@
+"""
+Postgres-backed hotel job queue shared by any number of scraper workers.
+
+    python scraper/main.py --enqueue --schedule --batch 2025-01-31   # producer
+    python scraper/main.py --worker --headless                       # N replicas
+    python scraper/main.py --collect --batch 2025-01-31 --output data/agoda_reviews_latest.json
+
+Workers claim jobs with ``FOR UPDATE SKIP LOCKED`` under a lease that a
+heartbeat thread keeps extending while the hotel is scraped. A job whose
+worker died is picked up again once its lease expires, or marked failed
+if that was its last allowed attempt. Finished hotel
+records are stored on the job row, so the queue table is also the shared
+result sink.
+"""
+
+import json
+import time
+import socket
+import logging
+import threading
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config import (
+    QUEUE_LEASE_SECONDS,
+    QUEUE_HEARTBEAT_SECONDS,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_POLL_SECONDS
+)
+from utils import resolve_stop_date
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{threading.get_native_id()}"
+
+
+class ScrapeQueue:
+    """Job table operations; ``connect`` returns a new psycopg2 connection."""
+
+    def __init__(self, connect: Callable, lease_seconds: int = QUEUE_LEASE_SECONDS,
+                 max_attempts: int = QUEUE_MAX_ATTEMPTS):
+        self.connect = connect
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = connect()
+        self.conn.autocommit = True
+        self.ensure_schema()
+
+    def close(self):
+        self.conn.close()
+
+    def ensure_schema(self):
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_jobs (
+                    id BIGSERIAL PRIMARY KEY,
+                    batch TEXT NOT NULL,
+                    hotel_url TEXT NOT NULL,
+                    hotel_name TEXT,
+                    max_reviews INTEGER NOT NULL,
+                    stop_date DATE,
+                    priority REAL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_until TIMESTAMPTZ,
+                    heartbeat_at TIMESTAMPTZ,
+                    result JSONB,
+                    error TEXT,
+                    created_at TIMESTAMPTZ DEFAULT NOW(),
+                    updated_at TIMESTAMPTZ DEFAULT NOW(),
+                    CONSTRAINT unique_batch_hotel UNIQUE (batch, hotel_url)
+                );
+                CREATE INDEX IF NOT EXISTS idx_scrape_jobs_claim ON scrape_jobs (status, priority DESC, id);
+            """)
+
+    def enqueue(self, batch: str, hotels: List[Dict], max_reviews: int, stop_dates: Dict[str, object] = None) -> int:
+        """Add hotels to ``batch`` (already-queued hotels are left alone); returns rows added."""
+        added = 0
+        with self.conn.cursor() as cur:
+            for i, hotel in enumerate(hotels):
+                stop_date = resolve_stop_date(hotel.get("hotel_name"), stop_dates, hotel["hotel_link"])
+                # Keep the caller's order (e.g. scheduler ranking) when no priority is given
+                priority = hotel.get("priority", len(hotels) - i)
+                cur.execute("""
+                    INSERT INTO scrape_jobs (batch, hotel_url, hotel_name, max_reviews, stop_date, priority)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (batch, hotel_url) DO NOTHING
+                """, (batch, hotel["hotel_link"], hotel.get("hotel_name"), max_reviews, stop_date, priority))
+                added += cur.rowcount
+        return added
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Lease the highest-priority runnable job, or None if the queue is drained."""
+        with self.conn.cursor() as cur:
+            # Expired leases on the last attempt can never be claimed again
+            cur.execute("""
+                UPDATE scrape_jobs SET
+                    status = %s, error = COALESCE(error, 'Lease expired on the last attempt'),
+                    lease_until = NULL, updated_at = NOW()
+                WHERE status = %s AND lease_until < NOW() AND attempts >= %s
+            """, (JOB_FAILED, JOB_RUNNING, self.max_attempts))
+            if cur.rowcount:
+                logging.warning(f"Marked {cur.rowcount} jobs with expired final attempts as failed.")
+            cur.execute("""
+                UPDATE scrape_jobs SET
+                    status = %s, worker = %s, attempts = attempts + 1,
+                    lease_until = NOW() + make_interval(secs => %s), heartbeat_at = NOW(), updated_at = NOW()
+                WHERE id = (
+                    SELECT id FROM scrape_jobs
+                    WHERE (status = %s OR (status = %s AND lease_until < NOW()))
+                      AND attempts < %s
+                    ORDER BY priority DESC, id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, batch, hotel_url, hotel_name, max_reviews, stop_date, attempts
+            """, (JOB_RUNNING, worker, self.lease_seconds, JOB_QUEUED, JOB_RUNNING, self.max_attempts))
+            row = cur.fetchone()
+        if not row:
+            return None
+        return {"id": row[0], "batch": row[1], "hotel_url": row[2], "hotel_name": row[3],
+                "max_reviews": row[4], "stop_date": row[5], "attempts": row[6]}
+
+    def heartbeat(self, job_id: int, worker: str, conn=None) -> bool:
+        """Extend the lease; False if another worker has taken the job over."""
+        with (conn or self.conn).cursor() as cur:
+            cur.execute("""
+                UPDATE scrape_jobs SET lease_until = NOW() + make_interval(secs => %s), heartbeat_at = NOW()
+                WHERE id = %s AND worker = %s AND status = %s
+            """, (self.lease_seconds, job_id, worker, JOB_RUNNING))
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: Dict):
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scrape_jobs SET status = %s, result = %s, error = NULL, lease_until = NULL, updated_at = NOW()
+                WHERE id = %s AND worker = %s
+            """, (JOB_DONE, json.dumps(result, ensure_ascii=False, default=str), job_id, worker))
+
+    def fail(self, job_id: int, worker: str, error: str):
+        """Return the job to the queue, or mark it failed once attempts run out."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE scrape_jobs SET
+                    status = CASE WHEN attempts >= %s THEN %s ELSE %s END,
+                    error = %s, lease_until = NULL, updated_at = NOW()
+                WHERE id = %s AND worker = %s AND status = %s
+            """, (self.max_attempts, JOB_FAILED, JOB_QUEUED, error, job_id, worker, JOB_RUNNING))
+
+    def stats(self, batch: str = None) -> Dict[str, int]:
+        with self.conn.cursor() as cur:
+            if batch:
+                cur.execute("SELECT status, COUNT(*) FROM scrape_jobs WHERE batch = %s GROUP BY status", (batch,))
+            else:
+                cur.execute("SELECT status, COUNT(*) FROM scrape_jobs GROUP BY status")
+            return dict(cur.fetchall())
+
+    def pending(self, batch: str) -> int:
+        """Jobs of ``batch`` that can still finish (a dead worker's last attempt cannot)."""
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT COUNT(*) FROM scrape_jobs
+                WHERE batch = %s AND (status = %s OR (status = %s AND (lease_until >= NOW() OR attempts < %s)))
+            """, (batch, JOB_QUEUED, JOB_RUNNING, self.max_attempts))
+            return cur.fetchone()[0]
+
+    def results(self, batch: str) -> Iterator[Dict]:
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT result FROM scrape_jobs WHERE batch = %s AND status = %s ORDER BY priority DESC, id",
+                        (batch, JOB_DONE))
+            for (result,) in cur:
+                yield result if isinstance(result, dict) else json.loads(result)
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps a claimed job's lease alive on its own connection."""
+
+    def __init__(self, queue: ScrapeQueue, job_id: int, worker: str, logger: logging.Logger):
+        super().__init__(name=f"heartbeat-{job_id}", daemon=True)
+        self.queue = queue
+        self.job_id = job_id
+        self.worker = worker
+        self.logger = logger
+        self.stopped = threading.Event()
+
+    def run(self):
+        conn = self.queue.connect()
+        conn.autocommit = True
+        try:
+            while not self.stopped.wait(QUEUE_HEARTBEAT_SECONDS):
+                try:
+                    if not self.queue.heartbeat(self.job_id, self.worker, conn):
+                        self.logger.warning(f"Lost lease on job {self.job_id}.")
+                        return
+                except Exception as e:
+                    self.logger.warning(f"Heartbeat for job {self.job_id} failed: {e}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def run_worker(queue: ScrapeQueue, scrape: Callable[[str, int, Optional[date]], Dict], worker: str = None,
+               exit_when_empty: bool = False, logger: logging.Logger = None,
+               on_result: Callable[[Dict], None] = None) -> int:
+    """Claim and scrape jobs until the queue is drained (or forever); returns jobs completed."""
+    logger = logger or logging.getLogger(__name__)
+    worker = worker or default_worker_id()
+    done = 0
+    logger.info(f"Queue worker {worker} started.")
+    while True:
+        job = queue.claim(worker)
+        if not job:
+            if exit_when_empty:
+                break
+            time.sleep(QUEUE_POLL_SECONDS)
+            continue
+
+        logger.info(f"[{worker}] Job {job['id']} ({job['batch']}, attempt {job['attempts']}): {job['hotel_url']}")
+        heartbeat = _Heartbeat(queue, job["id"], worker, logger)
+        heartbeat.start()
+        result = None
+        try:
+            result = scrape(job["hotel_url"], job["max_reviews"], job["stop_date"])
+            queue.complete(job["id"], worker, result)
+            done += 1
+        except Exception as e:
+            result = None
+            logger.error(f"[{worker}] Job {job['id']} failed: {e}")
+            queue.fail(job["id"], worker, str(e))
+        finally:
+            heartbeat.stop()
+            heartbeat.join(timeout=5)
+
+        # The job is done either way; a failing callback must not send it back to the queue
+        if result is not None and on_result:
+            try:
+                on_result(result)
+            except Exception as e:
+                logger.warning(f"[{worker}] Result callback for job {job['id']} failed: {e}")
+
+    logger.info(f"Queue worker {worker} finished after {done} jobs.")
+    return done
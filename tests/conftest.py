@@ -0,0 +1,15 @@
+import os
+import sys
+import types
+
+# scraper/ and database/ modules import their siblings by bare name
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "scraper"), os.path.join(ROOT, "database")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# database/ imports scraper.utils as a package, which scraper/scraper.py would shadow
+# now that scraper/ is on the path; register the directory as the package instead
+_package = types.ModuleType("scraper")
+_package.__path__ = [os.path.join(ROOT, "scraper")]
+sys.modules.setdefault("scraper", _package)
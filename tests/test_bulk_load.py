@@ -0,0 +1,71 @@
+import csv
+import io
+from collections import Counter
+from datetime import date
+
+from bulk_load import REVIEW_COLUMNS, CsvRowStream, review_rows
+
+
+def read_csv(stream, size=-1):
+    chunks = []
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if size < 0:
+            break
+    return list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+
+
+def test_csv_escapes_quotes_newlines_and_commas():
+    row = ("Hotel, \"Grand\"", "Ann", 9.0, "Line one\nline \"two\"\r\nend", date(2025, 1, 2),
+           None, None, "VN", "Solo")
+    parsed = read_csv(CsvRowStream([row]))
+
+    assert parsed == [["Hotel, \"Grand\"", "Ann", "9.0", "Line one\nline \"two\"\r\nend", "2025-01-02",
+                       "", "", "VN", "Solo"]]
+
+
+def test_csv_streams_in_small_reads_across_chunks():
+    rows = [(f"Hotel {i}", "ä" * i, None, "x\ny", None, None, None, None, None) for i in range(25)]
+    stream = CsvRowStream(rows, chunk_rows=4)
+    parsed = read_csv(stream, size=7)
+
+    assert stream.rows == 25
+    assert [r[0] for r in parsed] == [f"Hotel {i}" for i in range(25)]
+    assert parsed[24][1] == "ä" * 24
+    assert parsed[3][3] == "x\ny"
+
+
+def test_review_rows_map_columns_and_strip_nul():
+    hotel = {"hotel_name": "Sea\x00 View", "hotel_url": "https://www.agoda.com/sea/hotel/da-nang-vn.html"}
+    review = {"reviewer_name": "Bob\x00", "reviewer_score": "8.4", "review_text": "Nice\x00 stay",
+              "review_date": "Reviewed October 02, 2025", "room_type": "Deluxe", "stay_duration": "2 nights",
+              "reviewer_country": "Japan", "traveler_type": "Couple"}
+    hotels = {}
+    rows = list(review_rows([(hotel, review)], hotels))
+
+    assert len(rows[0]) == len(REVIEW_COLUMNS)
+    assert dict(zip(REVIEW_COLUMNS, rows[0])) == {
+        "hotel_name": "Sea View", "reviewer_name": "Bob", "reviewer_score": 8.4, "review_text": "Nice stay",
+        "review_date": date(2025, 10, 2), "room_type": "Deluxe", "stay_duration": "2 nights",
+        "country": "Japan", "traveler_type": "Couple"
+    }
+    assert hotels == {"Sea View": hotel}
+    assert "\x00" not in read_csv(CsvRowStream(rows))[0][0]
+
+
+def test_review_rows_fill_conflict_key():
+    skipped = Counter()
+    rows = list(review_rows([
+        ({"hotel_name": ""}, {"reviewer_name": "", "review_date": "2025-01-02", "reviewer_score": "n/a"}),
+        ({}, {"reviewer_name": None, "review_date": date(2025, 1, 3)}),
+        ({"hotel_name": "A"}, {"reviewer_name": "C", "review_date": "not a date"}),
+        ({"hotel_name": "A"}, {"reviewer_name": "D"}),
+    ], skipped=skipped))
+
+    assert [r[:2] for r in rows] == [("Unknown", "Unknown"), ("Unknown", "Unknown")]
+    assert [r[4] for r in rows] == [date(2025, 1, 2), date(2025, 1, 3)]
+    assert rows[0][2] is None
+    assert skipped["no_date"] == 2
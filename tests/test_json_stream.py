@@ -0,0 +1,88 @@
+import functools
+import json
+
+import pytest
+
+import utils
+from utils import JsonlWriter, iter_hotel_records, iter_reviews, read_jsonl
+
+HOTELS = [
+    {"hotel_name": "Sea View", "hotel_url": "https://www.agoda.com/sea/hotel/da-nang-vn.html",
+     "overall_statistics": {"overall_score": 8.5, "total_reviews": "1,234"},
+     "reviews": [{"reviewer_name": "Ann", "reviewer_score": 10, "review_text": "Great \"view\", {nice}"},
+                 {"reviewer_name": "Bob", "reviewer_score": 7.25, "review_text": "Okay\nété"}]},
+    {"hotel_name": "Empty", "reviews": []},
+    # reviews before hotel_name: decoded whole, still paired with the hotel's fields
+    {"reviews": [{"reviewer_name": "Cy", "reviewer_score": 123456789}], "hotel_name": "Late Name"},
+]
+
+
+def pairs(filename):
+    return [(h["hotel_name"], r["reviewer_name"], r["reviewer_score"]) for h, r in iter_reviews(filename)]
+
+
+EXPECTED = [("Sea View", "Ann", 10), ("Sea View", "Bob", 7.25), ("Late Name", "Cy", 123456789)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_reviews_survive_chunk_boundaries(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(utils, "_JsonStream", functools.partial(utils._JsonStream, chunk_size=chunk_size))
+    path = tmp_path / "out.json"
+    path.write_text(json.dumps(HOTELS, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert pairs(str(path)) == EXPECTED
+    assert list(iter_reviews(str(path)))[1][1]["review_text"] == "Okay\nété"
+    records = list(iter_hotel_records(str(path)))
+    assert [r["hotel_name"] for r in records] == ["Sea View", "Empty", "Late Name"]
+    assert records[0] == HOTELS[0]
+
+
+def test_single_hotel_dict_and_list_read_the_same(tmp_path):
+    single, listed = tmp_path / "single.json", tmp_path / "list.json"
+    single.write_text(json.dumps(HOTELS[0]), encoding="utf-8")
+    listed.write_text(json.dumps([HOTELS[0]]), encoding="utf-8")
+
+    assert pairs(str(single)) == pairs(str(listed)) == EXPECTED[:2]
+    hotel, _ = next(iter_reviews(str(single)))
+    assert "reviews" not in hotel and hotel["overall_statistics"]["total_reviews"] == "1,234"
+
+
+def test_empty_inputs(tmp_path):
+    for name, text in (("blank.json", ""), ("empty.json", "[]"), ("space.json", " [ ] \n")):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        assert list(iter_reviews(str(path))) == []
+
+
+def test_truncated_json_yields_complete_reviews_then_fails(tmp_path):
+    path = tmp_path / "out.json"
+    text = json.dumps(HOTELS)
+    path.write_text(text[:text.index('"Bob"') + 3], encoding="utf-8")
+
+    reviews = iter_reviews(str(path))
+    assert next(reviews)[1]["reviewer_name"] == "Ann"
+    with pytest.raises(ValueError):
+        next(reviews)
+
+
+def test_jsonl_reviews_and_records(tmp_path):
+    path = tmp_path / "out.jsonl"
+    with JsonlWriter(str(path)) as writer:
+        for hotel in HOTELS:
+            writer.write(hotel)
+
+    assert pairs(str(path)) == EXPECTED
+    assert list(iter_hotel_records(str(path))) == HOTELS
+
+
+def test_jsonl_truncated_tail_is_skipped_and_trimmed(tmp_path):
+    path = tmp_path / "out.jsonl"
+    complete = json.dumps(HOTELS[0]) + "\n"
+    path.write_text(complete + json.dumps(HOTELS[2])[:20], encoding="utf-8")
+
+    assert [r["hotel_name"] for r in read_jsonl(str(path))] == ["Sea View"]
+
+    with JsonlWriter(str(path)) as writer:
+        writer.write(HOTELS[1])
+    assert path.read_text(encoding="utf-8") == complete + json.dumps(HOTELS[1]) + "\n"
+    assert [r["hotel_name"] for r in read_jsonl(str(path))] == ["Sea View", "Empty"]
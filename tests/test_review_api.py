@@ -0,0 +1,159 @@
+import json
+import logging
+from datetime import date
+
+import pytest
+import requests
+from tenacity import wait_none
+
+import review_api
+from rate_limiter import AdaptiveRateLimiter
+from replay_server import start_server
+from review_interceptor import ReviewResponseCollector
+from review_api import ReviewApiClient, ThrottledError
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(ReviewApiClient.fetch_page.retry, "wait", wait_none())
+    monkeypatch.setattr("rate_limiter.RATE_LIMIT_COOLDOWN_BASE", 0)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def _serve(**kwargs):
+        server, endpoint = start_server(**kwargs)
+        servers.append(server)
+        return server.RequestHandlerClass, endpoint
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(endpoint, **kwargs):
+    limiter = AdaptiveRateLimiter("test", rate=1000, max_rate=1000, burst=1000)
+    kwargs.setdefault("concurrency", 2)
+    return ReviewApiClient({"hotelId": 7}, endpoint=endpoint, rate_limiter=limiter, **kwargs)
+
+
+def test_paginates_until_total(serve):
+    handler, endpoint = serve(synthetic_total=45)
+    client = make_client(endpoint, page_size=20)
+    reviews = client.fetch_reviews(max_reviews=100)
+
+    assert len(reviews) == 45
+    assert reviews[0]["review_text"] == "Synthetic review 0 for hotel 7."
+    assert reviews[-1]["review_text"] == "Synthetic review 44 for hotel 7."
+    assert client.total_reviews == 45
+    assert sorted(p for _, p in handler.served) == [1, 2, 3, 4]
+
+
+def test_stops_at_max_reviews(serve):
+    handler, endpoint = serve(synthetic_total=200)
+    reviews = make_client(endpoint, page_size=20, concurrency=1).fetch_reviews(max_reviews=30)
+
+    assert len(reviews) == 30
+    assert [p for _, p in handler.served] == [1, 2]
+
+
+def test_capped_page_size_does_not_end_paging(serve):
+    handler, endpoint = serve(synthetic_total=25, page_size_cap=10)
+    reviews = make_client(endpoint, page_size=20).fetch_reviews(max_reviews=100)
+
+    assert len(reviews) == 25
+    assert len({r["review_text"] for r in reviews}) == 25
+
+
+def test_stops_on_empty_page_without_total(serve, monkeypatch):
+    monkeypatch.setattr(review_api, "review_total", lambda payload: None)
+    handler, endpoint = serve(synthetic_total=40)
+    reviews = make_client(endpoint, page_size=20, concurrency=1).fetch_reviews(max_reviews=100)
+
+    assert len(reviews) == 40
+    assert [p for _, p in handler.served] == [1, 2, 3]
+
+
+def test_retries_throttled_page(serve):
+    handler, endpoint = serve(synthetic_total=20, fail_statuses=[429, 403])
+    client = make_client(endpoint, page_size=20, concurrency=1)
+    reviews = client.fetch_reviews(max_reviews=20)
+
+    assert len(reviews) == 20
+    assert [p for _, p in handler.served] == [1, 1, 1]
+    assert client.rate_limiter.throttles == 2
+
+
+def test_server_error_is_not_retried(serve):
+    handler, endpoint = serve(synthetic_total=20, fail_statuses=[500])
+    with pytest.raises(requests.HTTPError):
+        make_client(endpoint, concurrency=1).fetch_page(1)
+    assert len(handler.served) == 1
+
+
+def test_gives_up_after_repeated_throttling(serve):
+    handler, endpoint = serve(synthetic_total=20, fail_statuses=[429] * 4)
+    with pytest.raises(ThrottledError):
+        make_client(endpoint, concurrency=1).fetch_page(1)
+    assert len(handler.served) == 4
+
+
+def test_stop_date_ends_paging(serve, caplog):
+    handler, endpoint = serve(synthetic_total=200)
+    # Synthetic review i is dated 2025-10-01 minus i days
+    with caplog.at_level("INFO"):
+        reviews = make_client(endpoint, page_size=20, concurrency=1).fetch_reviews(max_reviews=200, stop_date=date(2025, 9, 6))
+
+    assert len(reviews) == 25
+    assert [p for _, p in handler.served] == [1, 2]
+    assert "Reached a review dated on or before 2025-09-06" in caplog.text
+
+
+class FakePage:
+    def __init__(self, url):
+        self.url = url
+
+    def content(self):
+        return "<html></html>"
+
+
+class FakeContext:
+    def cookies(self):
+        return [{"name": "session", "value": "abc"}]
+
+
+class FakeScraper:
+    def __init__(self):
+        self.review_collector = ReviewResponseCollector()
+        self.context = FakeContext()
+        self.logger = logging.getLogger("test")
+        self.page = None
+
+    def open(self, hotel_id, capture=True):
+        self.review_collector.reset()
+        self.page = FakePage(f"https://www.agoda.com/h{hotel_id}/hotel/x.html?hotel_id={hotel_id}")
+        if capture:
+            self.review_collector.last_request = {
+                "url": review_api.REVIEW_API_URL, "method": "POST", "headers": {},
+                "post_data": json.dumps({"hotelId": hotel_id, "pageSize": 50, "captured": True})
+            }
+
+
+def test_from_scraper_uses_each_hotels_own_id():
+    scraper = FakeScraper()
+    scraper.open(111)
+    first = ReviewApiClient.from_scraper(scraper)
+    assert first.payload_template == {"hotelId": 111, "pageSize": 50, "captured": True}
+
+    # Hotel 222's review request has not been seen: never page through hotel 111
+    scraper.open(222, capture=False)
+    scraper.review_collector.last_request = {"post_data": '{"hotelId": 111}'}
+    second = ReviewApiClient.from_scraper(scraper)
+    assert second.payload_template["hotelId"] == 222
+    assert "captured" not in second.payload_template
+    assert second.session.cookies.get("session") == "abc"
+    first.close()
+    second.close()
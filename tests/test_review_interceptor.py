@@ -0,0 +1,37 @@
+import json
+
+from review_interceptor import ReviewResponseCollector, find_hotel_id
+
+
+def captured(hotel_id):
+    collector = ReviewResponseCollector()
+    collector.last_request = {"url": "https://www.agoda.com/api/cronos/property/review/ReviewComments",
+                              "method": "POST", "headers": {"content-type": "application/json", "cookie": "x"},
+                              "post_data": json.dumps({"hotelId": hotel_id, "page": 1})}
+    return collector
+
+
+def test_reset_forgets_the_previous_hotels_request():
+    collector = captured(111)
+    collector.clear()
+    assert collector.request_payload() == {"hotelId": 111, "page": 1}
+
+    collector.reset()
+    assert collector.request_payload() is None
+    assert collector.prefetch_args([2, 3]) is None
+
+
+def test_prefetch_only_replays_the_request_of_the_current_hotel():
+    collector = captured(111)
+
+    assert collector.request_payload(222) is None
+    assert collector.prefetch_args([2], hotel_id=222) is None
+    url, method, headers, body, pages = collector.prefetch_args([2], hotel_id=111)
+    assert (method, json.loads(body)["hotelId"], pages) == ("POST", 111, [2])
+    assert "cookie" not in headers
+
+
+def test_find_hotel_id():
+    assert find_hotel_id("https://www.agoda.com/x/hotel/y.html?hotel_id=42") == 42
+    assert find_hotel_id("https://www.agoda.com/x/hotel/y.html", '{"hotelId": 7}') == 7
+    assert find_hotel_id("https://www.agoda.com/x/hotel/y.html") is None
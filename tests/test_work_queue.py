@@ -0,0 +1,63 @@
+import work_queue
+from work_queue import run_worker
+
+
+class FakeQueue:
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.completed, self.failed = [], []
+
+    def claim(self, worker):
+        return self.jobs.pop(0) if self.jobs else None
+
+    def complete(self, job_id, worker, result):
+        self.completed.append(job_id)
+
+    def fail(self, job_id, worker, error):
+        self.failed.append((job_id, error))
+
+
+class FakeHeartbeat:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def join(self, timeout=None):
+        pass
+
+
+def job(job_id):
+    return {"id": job_id, "batch": "b", "hotel_url": f"https://www.agoda.com/h{job_id}/hotel/x.html",
+            "max_reviews": 5, "stop_date": None, "attempts": 1}
+
+
+def test_failing_result_callback_does_not_fail_a_done_job(monkeypatch):
+    monkeypatch.setattr(work_queue, "_Heartbeat", lambda *args: FakeHeartbeat())
+    queue = FakeQueue([job(1), job(2)])
+    seen = []
+
+    def on_result(result):
+        seen.append(result["hotel_url"])
+        raise OSError("database is locked")
+
+    done = run_worker(queue, lambda url, n, stop: {"hotel_url": url}, worker="w", exit_when_empty=True,
+                      on_result=on_result)
+
+    assert done == 2
+    assert queue.completed == [1, 2] and queue.failed == []
+    assert len(seen) == 2
+
+
+def test_scrape_error_fails_the_job_without_callback(monkeypatch):
+    monkeypatch.setattr(work_queue, "_Heartbeat", lambda *args: FakeHeartbeat())
+    queue = FakeQueue([job(1)])
+    seen = []
+
+    def scrape(url, n, stop):
+        raise RuntimeError("blocked")
+
+    assert run_worker(queue, scrape, worker="w", exit_when_empty=True, on_result=seen.append) == 0
+    assert queue.failed == [(1, "blocked")] and seen == []
+